@@ -24,6 +24,15 @@ fi
 echo "=== Disabling protected-mode ==="
 sudo sed -i 's/^protected-mode yes/protected-mode no/' "$REDIS_CONF"
 
+echo "=== Enabling keyspace notifications (data_crawler control keys) ==="
+# K = keyspace channel, $ = string commands, g = DEL/EXPIRE; data_crawler's
+# change_watch only checks this and polls the control keys when it is off.
+if grep -qE '^notify-keyspace-events' "$REDIS_CONF"; then
+    sudo sed -i -E 's/^notify-keyspace-events.*$/notify-keyspace-events K$g/' "$REDIS_CONF"
+else
+    echo 'notify-keyspace-events K$g' | sudo tee -a "$REDIS_CONF" > /dev/null
+fi
+
 echo "=== Installing sysctl drop-in ==="
 sudo tee "$SYSCTL_DROPIN" > /dev/null <<EOF
 net.ipv4.ip_nonlocal_bind=1
@@ -4,6 +4,7 @@ import socket
 import fcntl
 import struct
 import configparser
+import json
 
 import redis
 from PIL import Image, ImageDraw
@@ -57,6 +58,11 @@ class DisplayManager:
         self.leak_alert_active = False
         self.leak_alert_viewer = LeakAlertViewer()
         self.leak_threshold_sec = 5
+        # leak_events pub/sub (data_crawler fast path): a published leak is already
+        # debounced upstream, so it skips leak_threshold_sec. Polling stays as fallback.
+        self.leak_event_channel = getattr(product, 'LEAK_EVENT_CHANNEL', 'leak_events')
+        self.leak_event_confirmed = False
+        self.leak_event_key = self.leak_redis_key    # board that raised the event (multi-board)
 
 
         self.host_status = False
@@ -188,20 +194,57 @@ class DisplayManager:
             self.leak_start_time = None
             return
         try:
-            val = self.redis.get(self.leak_redis_key)
+            key = self.leak_event_key if self.leak_event_confirmed else self.leak_redis_key
+            val = self.redis.get(key)
             if val is not None and int(val) == 1:
-                if self.leak_start_time is None:
+                if self.leak_event_confirmed:
+                    self.leak_alert_active = True
+                elif self.leak_start_time is None:
                     self.leak_start_time = time.time()
                 elif time.time() - self.leak_start_time >= self.leak_threshold_sec:
                     self.leak_alert_active = True
             else:
                 self.leak_start_time = None
                 self.leak_alert_active = False
+                self.leak_event_confirmed = False
         except Exception:
             self.leak_start_time = None
             self.leak_alert_active = False
             pass
 
+    def leak_event_listener(self):
+        """Subscribe to leak_events; a confirmed leak shows on the next frame."""
+        while not self.stop_event.is_set():
+            ps = None
+            try:
+                ps = self.redis.pubsub(ignore_subscribe_messages=True)
+                ps.subscribe(self.leak_event_channel)
+                while not self.stop_event.is_set():
+                    msg = ps.get_message(timeout=1.0)
+                    if msg is None or msg.get('type') != 'message':
+                        continue
+                    event = json.loads(msg['data'])
+                    leak = int(event.get('leak', 0)) == 1
+                    key = event.get('key', self.leak_redis_key)
+                    if not leak and key != self.leak_event_key:
+                        continue    # another board cleared; the alerting one still leaks
+                    self.leak_event_key = key
+                    self.leak_event_confirmed = leak
+                    if leak and self.config.getboolean('DISPLAY', 'leak', fallback=True):
+                        self.leak_alert_active = True
+                    if 't_raw' in event:
+                        print(f"leak event leak={int(leak)}: "
+                              f"{(time.time() - float(event['t_raw'])) * 1000:.0f} ms after first raw sample")
+            except Exception as e:
+                print(f"leak event subscription lost: {e}")
+                time.sleep(5)
+            finally:
+                if ps is not None:
+                    try:
+                        ps.close()
+                    except Exception:
+                        pass
+
     def _viewer_keys_all_absent(self, viewer):
         """Skip viewers that opted into hide_if_absent when none of their
         redis keys are currently SET (e.g. control_board offline so fan/pump
@@ -375,6 +418,11 @@ class DisplayManager:
         sensor_thread.start()
         graph_thread.start()
 
+        if USE_REAL_DATA:
+            leak_thread = threading.Thread(target=self.leak_event_listener)
+            leak_thread.daemon = True
+            leak_thread.start()
+
         return sensor_thread, graph_thread
 
     def stop(self):
@@ -0,0 +1,254 @@
+"""Staged acquisition engine for data_crawler — one worker thread per stage.
+
+A cycle triggers every acquisition stage at once (serial bus, I2C/GPIO) and waits for
+each up to its own deadline, then hands the results to the publish stage. A stage that
+misses its deadline keeps running in the background and is not re-triggered until it
+finishes; its last good value is used meanwhile. Cycle time is therefore the slowest
+stage (bounded by its deadline) instead of the sum of all stages.
+
+staged=False runs the same stages inline, in order — the pre-engine behaviour, kept
+for comparison via OverrunMeter (loop.staged in pcb_config.yaml).
+
+StageTimings keeps fixed-bucket wall-time histograms per stage/step plus cycle
+overrun and start-jitter counts; data_crawler commits them to Redis for sensor_exporter.
+"""
+import contextlib
+import json
+import logging
+import threading
+import time
+
+log = logging.getLogger('acquisition')
+
+
+class Stage:
+    """A named unit of cycle work on its own daemon thread.
+
+    fn(ctx) gets the per-cycle context passed to trigger() (data_crawler: the cycle's
+    redis_batch.CycleBatch) and returns the stage result; a non-None result becomes
+    the last good value. Exceptions are logged and keep the previous value.
+    """
+
+    def __init__(self, name, fn, deadline_s):
+        self.name = name
+        self.fn = fn
+        self.deadline_s = float(deadline_s)
+        self.value = None
+        self.value_at = None          # monotonic time of the last good value
+        self.last_duration = 0.0
+        self.overruns = 0             # cycles this stage was still busy at its deadline
+        self.timings = None           # StageTimings: run time observed under the stage name
+        self._ctx = None
+        self._go = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, name=f'stage-{self.name}', daemon=True)
+        self._thread.start()
+
+    def busy(self):
+        return not self._done.is_set()
+
+    def trigger(self, ctx=None):
+        """Start one run; False (nothing started) while the previous run is still going."""
+        if self.busy():
+            return False
+        self._ctx = ctx
+        self._done.clear()
+        self._go.set()
+        return True
+
+    def wait(self, until):
+        """Block until the run finishes or `until` (monotonic) passes; True if finished."""
+        if self._done.wait(max(0.0, until - time.monotonic())):
+            return True
+        self.overruns += 1
+        return False
+
+    def run_inline(self, ctx=None):
+        self._ctx = ctx
+        self._run_once()
+
+    def fresh(self, max_age_s):
+        """Last good value if younger than max_age_s, else None."""
+        if self.value_at is None or time.monotonic() - self.value_at > max_age_s:
+            return None
+        return self.value
+
+    def _run_once(self):
+        t0 = time.monotonic()
+        try:
+            v = self.fn(self._ctx)
+            if v is not None:
+                self.value = v
+                self.value_at = time.monotonic()
+        except Exception:
+            log.exception("stage %s failed", self.name)
+        finally:
+            self.last_duration = time.monotonic() - t0
+            if self.timings is not None:
+                self.timings.observe(self.name, self.last_duration)
+
+    def _loop(self):
+        while True:
+            self._go.wait()
+            self._go.clear()
+            self._run_once()
+            self._done.set()
+
+
+class AcquisitionEngine:
+    """Runs acquisition stages concurrently, then the publish stage, once per cycle.
+
+    publish_fn(values, ctx) receives {stage name: last good value (or None if stale)}
+    and the context the cycle was run with. If the publish stage is still busy with the
+    previous cycle, this cycle's context is kept and merge_fn(newer, older) folds it
+    into the next cycle's before that one is published (data_crawler:
+    CycleBatch.absorb), so its writes are delayed by a cycle instead of lost.
+    """
+
+    def __init__(self, stages, publish_fn, publish_deadline_s, staged=True, stale_after_s=5.0,
+                 timings=None, merge_fn=None):
+        self.stages = list(stages)
+        self.staged = staged
+        self.stale_after_s = float(stale_after_s)
+        self.merge_fn = merge_fn
+        self.deferred = 0             # cycles whose publish was carried into the next one
+        self._carry = None
+        self._values = {}
+        self.publish = Stage('publish', lambda ctx: publish_fn(self._values, ctx), publish_deadline_s)
+        for st in self.stages + [self.publish]:
+            st.timings = timings
+        if staged:
+            for st in self.stages + [self.publish]:
+                st.start()
+
+    def run_cycle(self, ctx=None):
+        """One cycle; False if its publish was deferred (publish stage still busy)."""
+        if not self.staged:
+            for st in self.stages:
+                st.run_inline(ctx)
+            self._values = {st.name: st.fresh(self.stale_after_s) for st in self.stages}
+            self.publish.run_inline(ctx)
+            return True
+
+        t0 = time.monotonic()
+        for st in self.stages:
+            if not st.trigger(ctx):
+                log.debug("stage %s still busy — reusing last good value", st.name)
+        for st in self.stages:
+            st.wait(t0 + st.deadline_s)
+        self._values = {st.name: st.fresh(self.stale_after_s) for st in self.stages}
+        if self._carry is not None and self.merge_fn is not None:
+            self.merge_fn(ctx, self._carry)
+        self._carry = None
+        if self.publish.trigger(ctx):
+            self.publish.wait(time.monotonic() + self.publish.deadline_s)
+            return True
+        self.deferred += 1
+        self._carry = ctx
+        log.warning("publish still busy — cycle carried into the next publish")
+        return False
+
+
+class OverrunMeter:
+    """Counts cycles that exceeded cycle_s (and deferred publishes) and logs a
+    summary every `every` cycles."""
+
+    def __init__(self, cycle_s, every=60, label='cycle'):
+        self.cycle_s = cycle_s
+        self.every = every
+        self.label = label
+        self._reset()
+
+    def _reset(self):
+        self.cycles = 0
+        self.overruns = 0
+        self.deferred = 0
+        self.max_elapsed = 0.0
+        self.total_elapsed = 0.0
+
+    def record(self, elapsed, published=True):
+        self.cycles += 1
+        if not published:
+            self.deferred += 1
+        self.total_elapsed += elapsed
+        self.max_elapsed = max(self.max_elapsed, elapsed)
+        if elapsed > self.cycle_s:
+            self.overruns += 1
+        if self.cycles >= self.every:
+            log.log(logging.WARNING if self.deferred else logging.INFO,
+                    "%s: %d/%d overruns (> %.0f ms), %d publishes deferred, mean %.0f ms, max %.0f ms",
+                    self.label, self.overruns, self.cycles, self.cycle_s * 1000, self.deferred,
+                    self.total_elapsed / self.cycles * 1000, self.max_elapsed * 1000)
+            self._reset()
+
+
+# Histogram upper bounds in seconds (Prometheus `le`); +Inf is implicit.
+TIMING_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class StageTimings:
+    """Cumulative wall-time histograms keyed by step name, safe across stage threads.
+
+    `with timings.time('poll'):` or observe(name, seconds). cycle(start, elapsed, early)
+    records the whole cycle, counts overruns (> cycle_s) and, for cycles that were not
+    started early by a change event, the start jitter against the cadence.
+    snapshot() is the {field: JSON} form committed to the crawler_timing hash.
+    """
+
+    def __init__(self, cycle_s=1.0, buckets=TIMING_BUCKETS, publish_every=10):
+        self.cycle_s = cycle_s
+        self.buckets = tuple(buckets)
+        self.publish_every = publish_every
+        self._lock = threading.Lock()
+        self._hist = {}            # name -> [per-bucket counts (+Inf last), sum, count]
+        self.cycles = 0
+        self.overruns = 0
+        self._next_start = None
+
+    def observe(self, name, seconds):
+        with self._lock:
+            h = self._hist.get(name)
+            if h is None:
+                h = self._hist[name] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            i = 0
+            while i < len(self.buckets) and seconds > self.buckets[i]:
+                i += 1
+            h[0][i] += 1
+            h[1] += seconds
+            h[2] += 1
+
+    @contextlib.contextmanager
+    def time(self, name):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - t0)
+
+    def cycle(self, start, elapsed, early=False):
+        """start: monotonic cycle start; early: woken by a change event, not the cadence."""
+        if self._next_start is not None and not early:
+            self.observe('jitter', abs(start - self._next_start))
+        self._next_start = start + max(elapsed, self.cycle_s)
+        self.observe('cycle', elapsed)
+        with self._lock:
+            self.cycles += 1
+            if elapsed > self.cycle_s:
+                self.overruns += 1
+
+    def due(self):
+        """True once every publish_every cycles (snapshot cadence)."""
+        return self.cycles % max(1, self.publish_every) == 0
+
+    def snapshot(self):
+        with self._lock:
+            out = {name: json.dumps({'counts': h[0], 'sum': round(h[1], 6), 'count': h[2]})
+                   for name, h in self._hist.items()}
+            out['le'] = json.dumps(self.buckets)
+            out['cycles'] = self.cycles
+            out['overruns'] = self.overruns
+        return out
@@ -0,0 +1,175 @@
+"""Event-driven change sources for data_crawler — pcb_config.yaml and control keys.
+
+Instead of stat()ing pcb_config.yaml and GETting control_mode every cycle, two watcher
+threads post into a PendingChanges slot the crawler loop checks for free:
+
+  ConfigWatcher   inotify on the config directory (editors and the web UI replace the
+                  file, so the directory is watched for CLOSE_WRITE/MOVED_TO/CREATE).
+  RedisKeyWatcher keyspace notifications for control_mode / manual_pwm_target_*; each
+                  event re-reads the key and posts its value.
+
+Posting also wakes the loop, so a mode switch or config edit is applied within
+milliseconds instead of at the next cycle boundary. Both degrade gracefully: without
+inotify_simple or keyspace notifications `active` stays False and the crawler keeps
+its per-cycle polling. The notifications are server config (notify-keyspace-events,
+set by src/configure/redis/setup-redis.sh); the watcher only checks for them.
+"""
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger('change_watch')
+
+try:
+    from inotify_simple import INotify, flags as _inotify_flags
+    _HAS_INOTIFY = True
+except Exception:
+    _HAS_INOTIFY = False
+
+_RESUBSCRIBE_S = 5.0
+
+
+class PendingChanges:
+    """Thread-safe slot between the watcher threads and the crawler loop."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._config = False
+        self._keys = {}
+
+    def post_config(self):
+        with self._lock:
+            self._config = True
+        self._wake.set()
+
+    def post_keys(self, values):
+        with self._lock:
+            self._keys.update(values)
+        self._wake.set()
+
+    def take_config(self):
+        """True once per config change notification."""
+        with self._lock:
+            changed, self._config = self._config, False
+        return changed
+
+    def take_keys(self):
+        """{key: value (None = deleted)} posted since the last call."""
+        with self._lock:
+            keys, self._keys = self._keys, {}
+        return keys
+
+    def wait(self, timeout):
+        """Sleep up to timeout; returns early (True) when a change is posted."""
+        woke = self._wake.wait(max(0.0, timeout))
+        self._wake.clear()
+        return woke
+
+    def settle(self, seconds):
+        """After an early wake: let the rest of a burst (UI slider writes) land, then
+        re-arm, so the burst costs one early cycle instead of one per post."""
+        time.sleep(max(0.0, seconds))
+        self._wake.clear()
+
+
+class ConfigWatcher:
+    """inotify watch on a single file (via its directory)."""
+
+    def __init__(self, path, pending):
+        self.path = os.path.abspath(path)
+        self.pending = pending
+        self.active = False
+
+    def start(self):
+        if not _HAS_INOTIFY:
+            log.info("inotify_simple not installed — %s polled by mtime",
+                     os.path.basename(self.path))
+            return self
+        try:
+            self._ino = INotify()
+            mask = _inotify_flags.CLOSE_WRITE | _inotify_flags.MOVED_TO | _inotify_flags.CREATE
+            self._ino.add_watch(os.path.dirname(self.path), mask)
+        except OSError as e:
+            log.warning("inotify watch failed (%s) — polling by mtime", e)
+            return self
+        self.active = True
+        threading.Thread(target=self._loop, name='watch-config', daemon=True).start()
+        return self
+
+    def _loop(self):
+        name = os.path.basename(self.path)
+        while True:
+            try:
+                events = self._ino.read()
+            except Exception:
+                log.exception("inotify read failed")
+                time.sleep(_RESUBSCRIBE_S)
+                continue
+            if any(ev.name == name for ev in events):
+                self.pending.post_config()
+
+
+class RedisKeyWatcher:
+    """Keyspace-notification subscription for a fixed key set.
+
+    On every (re)subscribe the current values are read in one MGET and posted, so
+    nothing set while unsubscribed is missed. `active` is False while the subscription
+    is down; the crawler then prefetches the keys per cycle instead.
+    """
+
+    def __init__(self, rd, keys, pending):
+        self.rd = rd
+        self.keys = list(keys)
+        self.pending = pending
+        self.active = False
+        self._db = rd.connection_pool.connection_kwargs.get('db', 0)
+
+    def start(self):
+        if not self._notifications_enabled():
+            return self
+        threading.Thread(target=self._loop, name='watch-redis', daemon=True).start()
+        return self
+
+    def _notifications_enabled(self):
+        """K (keyspace) + $ (string) + g (del/expire) events on? The server config is
+        shared with every client, so it is never changed from here."""
+        try:
+            cur = set(self.rd.config_get('notify-keyspace-events').get('notify-keyspace-events', ''))
+        except Exception as e:
+            log.warning("keyspace notifications unknown (%s) — control keys polled", e)
+            return False
+        if 'K' in cur and ('A' in cur or {'$', 'g'} <= cur):
+            return True
+        log.warning("notify-keyspace-events is %r, not K$g (setup-redis.sh) — control keys polled",
+                    ''.join(sorted(cur)))
+        return False
+
+    def _loop(self):
+        prefix = f'__keyspace@{self._db}__:'
+        while True:
+            ps = None
+            try:
+                ps = self.rd.pubsub(ignore_subscribe_messages=True)
+                ps.subscribe(*[prefix + k for k in self.keys])
+                self.pending.post_keys(dict(zip(self.keys, self.rd.mget(self.keys))))
+                self.active = True
+                log.info("watching %d control keys via keyspace notifications", len(self.keys))
+                for msg in ps.listen():
+                    if msg.get('type') != 'message':
+                        continue
+                    key = msg['channel'][len(prefix):]
+                    op = msg['data']
+                    value = None if op in ('del', 'expired', 'evicted') else self.rd.get(key)
+                    self.pending.post_keys({key: value})
+            except Exception as e:
+                log.warning("keyspace subscription lost (%s) — retrying in %.0fs", e, _RESUBSCRIBE_S)
+            finally:
+                self.active = False
+                if ps is not None:
+                    try:
+                        ps.close()
+                    except Exception:
+                        pass
+            time.sleep(_RESUBSCRIBE_S)
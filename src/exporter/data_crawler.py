@@ -8,16 +8,37 @@ Backend is chosen by ADS1256 presence (pcb_driver.detect_backend):
 
 Air temp/humidity and chassis come from Pi-attached sensors, so they run on both
 backends unconditionally — they keep collecting even when the PCB is powered down.
+
+Each cycle runs as stages (acquisition.AcquisitionEngine): the bus stage (PCB Modbus or
+ADS1256) and the sensors stage (I2C/GPIO) on their own threads with their own deadlines,
+then the Redis-publish stage. A slow DHT read no longer delays the fan curve.
+Redis I/O goes through a per-cycle redis_batch.CycleBatch: one MGET prefetch, one
+pipelined commit of the keys that changed (full refresh every publish_refresh_cycles).
+On the PCB backend the leak input has its own fast path (leak_watch) outside the cycle,
+several boards can share one RS485 segment (modbus.slaves, PCBBus), and every register
+read is kept in a cache served over local Modbus TCP (register_cache).
+Every cycle's values are also appended to a memory-mapped ring file (ring_store,
+history section) for full-resolution short-term history without Redis.
+Every stage and step is timed into fixed-bucket histograms (acquisition.StageTimings,
+crawler_timing hash) so overruns can be traced to the bus, DHT, Redis or control.
 """
+import json
 import logging
 import os
 import time
+from collections import deque
 
 import redis
 
+import acquisition
+import change_watch
 import dlc_sensors
+import leak_watch
 import pcb_driver
+import redis_batch
 import redis_keys as K
+import register_cache
+import ring_store
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,15 +50,47 @@ PCB_CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pcb_
 
 rd = redis.StrictRedis(host='localhost', port=6379, db=0, decode_responses=True)
 
+# Wall time per stage/step (fixed-bucket histograms), committed to crawler_timing every
+# loop.timing_publish_cycles cycles and exposed by sensor_exporter.
+timings = acquisition.StageTimings()
+# Short-term history ring (ring_store); opened in main() from the history section.
+history = None
+
 
 # host writes `host_ttl` with EXPIRE 7 each cycle; key presence = host telemetry
 # is arriving (catches host-script crashes a link check would miss).
 HOST_TTL_KEY = 'host_ttl'
 
+# Control keys written by the web UI. Fed by keyspace notifications when available
+# (change_watch.RedisKeyWatcher), otherwise prefetched every cycle.
+CONTROL_KEYS = (
+    ['control_mode']
+    + [K.manual_pwm_target_pump(i) for i in range(4)]
+    + [K.manual_pwm_target_fan(i) for i in range(8)]
+)
+
+# Every other key a cycle reads — prefetched by the cycle batch in one MGET. The
+# pwm_duty_* readbacks are normally served from poll()'s pending writes; prefetching
+# them covers a cycle where they are unchanged.
+CYCLE_READ_KEYS = (
+    [HOST_TTL_KEY, K.COOLANT_TEMP_OUTLET1]
+    + [K.pwm_duty_pump(i) for i in range(4)]
+    + [K.pwm_duty_fan(i) for i in range(8)]
+)
+
+
+# Keys every board of a multi-board segment shares; the rest are per board (key_prefix).
+# Pi-attached and host keys are shared too: a fan zone may follow air_temp or gpu_temp_*.
+SHARED_KEYS = ('control_mode', HOST_TTL_KEY, K.HOST_STAT, K.AIR_TEMP, K.AIR_HUMIT)
+SHARED_PREFIXES = ('gpu_', 'cpu_')
+
+# Bus utilisation above which the segment is considered full (boards-per-segment estimate).
+_BUS_UTIL_TARGET = 0.8
+
 
-def is_host_alive():
+def is_host_alive(r=rd):
     try:
-        return 1 if rd.exists(HOST_TTL_KEY) else 0
+        return 1 if r.exists(HOST_TTL_KEY) else 0
     except redis.RedisError:
         return 0
 
@@ -45,53 +98,82 @@ def is_host_alive():
 def _apply_manual_pwm(driver, rd, cfg):
     """Apply manual PWM targets from Redis (channel write) — no temperature feedback.
 
-    Reads manual_pwm_target_pump_* / manual_pwm_target_fan_* from Redis, applies pump
-    clamping (min_duty/max_duty) to protect hardware, writes to PCB registers.
+    Fetches every manual_pwm_target_pump_* / manual_pwm_target_fan_* plus the matching
+    pwm_duty_* readback in one MGET, applies pump clamping (min_duty/max_duty) to
+    protect hardware, and writes only channels whose target differs from the readback
+    (or, without a readback, from the last acknowledged write). Contiguous channels go
+    out as one write_registers run, so a stable target costs zero bus writes.
     """
+    from pcb_control import _contiguous_runs
     try:
         wiring = (cfg.get('wiring') or {}).get('pwm') or {}
-        pump_chs = wiring.get('pump_ch') or []
-        fan_chs = wiring.get('fan_ch') or []
+        pump_chs = [ch for ch in (wiring.get('pump_ch') or []) if 1 <= ch <= 4]
+        fan_chs = [ch for ch in (wiring.get('fan_ch') or []) if 5 <= ch <= 12]
         pump_cfg = cfg.get('pump', {}) or {}
         pump_min_duty = int(pump_cfg.get('min_duty', 0))
         pump_max_duty = int(pump_cfg.get('max_duty', 1000))
 
-        # Pump channels: apply clamping (same protection as apply_initial_state)
-        for ch in pump_chs:
-            idx = ch - 1
-            target_key = K.manual_pwm_target_pump(idx)
-            target_str = rd.get(target_key)
-            if target_str is not None:
-                try:
-                    duty = int(target_str)
-                    # Clamp pump duty to safe voltage range (6-12VDC)
-                    if duty <= 0:
-                        clamped_duty = 0
-                    else:
-                        clamped_duty = max(pump_min_duty, min(pump_max_duty, duty))
-                    driver.write_register(pcb_driver.hr_pwm_duty(ch), clamped_duty)
-                except (ValueError, TypeError):
-                    log.warning("manual_pwm_target_pump_%d invalid: %s", idx, target_str)
-
-        # Fan channels: no clamping (fans safe at any duty)
-        for ch in fan_chs:
-            idx = ch - 5
-            target_key = K.manual_pwm_target_fan(idx)
-            target_str = rd.get(target_key)
-            if target_str is not None:
-                try:
-                    duty = int(target_str)
-                    if 0 <= duty <= 1000:
-                        driver.write_register(pcb_driver.hr_pwm_duty(ch), duty)
-                except (ValueError, TypeError):
-                    log.warning("manual_pwm_target_fan_%d invalid: %s", idx, target_str)
-
-        log.debug("manual PWM applied from Redis targets")
+        chans = ([(ch, K.manual_pwm_target_pump(ch - 1), K.pwm_duty_pump(ch - 1)) for ch in pump_chs]
+                 + [(ch, K.manual_pwm_target_fan(ch - 5), K.pwm_duty_fan(ch - 5)) for ch in fan_chs])
+        if not chans:
+            return
+        vals = rd.mget([t for _, t, _ in chans] + [r for _, _, r in chans])
+        targets, readbacks = vals[:len(chans)], vals[len(chans):]
+
+        pending = {}
+        for (ch, target_key, _), target_str, readback in zip(chans, targets, readbacks):
+            if target_str is None:
+                continue
+            try:
+                duty = int(target_str)
+            except (ValueError, TypeError):
+                log.warning("%s invalid: %s", target_key, target_str)
+                continue
+            if ch <= 4:
+                # Clamp pump duty to safe voltage range (6-12VDC)
+                duty = 0 if duty <= 0 else max(pump_min_duty, min(pump_max_duty, duty))
+            elif not 0 <= duty <= 1000:
+                continue   # fans: no clamping (safe at any duty), out-of-range ignored
+            hr = pcb_driver.hr_pwm_duty(ch)
+            current = readback if readback is not None else driver.queue.last_written.get(hr)
+            try:
+                if current is not None and int(current) == duty:
+                    continue
+            except (ValueError, TypeError):
+                pass
+            pending[ch] = duty
+
+        for first_ch, run in _contiguous_runs(list(pending)):
+            driver.write_registers(pcb_driver.hr_pwm_duty(first_ch), [pending[ch] for ch in run])
+        if pending:
+            log.debug("manual PWM applied from Redis targets: %s", pending)
     except Exception:
         log.exception("manual PWM apply failed")
 
 
-def _update_comm_state(fails, timeout_n, disconnect_n):
+def _poll_and_control(driver, rd, controller, cfg):
+    """poll() then, on success, one control update (manual targets or fan curve)."""
+    ok = False
+    try:
+        with timings.time('poll'):
+            ok = driver.poll(rd)
+    except Exception:
+        log.exception("driver.poll raised")
+    if ok:
+        try:
+            with timings.time('control'):
+                # Check control_mode: manual or auto (default)
+                control_mode = rd.get('control_mode') or 'auto'
+                if control_mode == 'manual':
+                    _apply_manual_pwm(driver, rd, cfg)
+                else:
+                    controller.update(driver, rd)
+        except Exception:
+            log.exception("control update failed")
+    return ok
+
+
+def _update_comm_state(rd, fails, timeout_n, disconnect_n):
     if fails == 0:
         rd.set(K.COMM_STATUS, 'ok')
     elif fails >= disconnect_n:
@@ -106,85 +188,271 @@ def _load_yaml(path):
         return yaml.safe_load(f)
 
 
+class PCBCycle:
+    """Serial-bus stage for one control board: reload, liveness, poll, control, comm status.
+
+    owner/board/key_prefix place it on a multi-board segment (see PCBBus); a single
+    board is PCBCycle(cfg, publisher, config_watch).
+    """
+
+    def __init__(self, cfg, publisher, config_watch=None, owner=None, board=0, key_prefix=''):
+        import pcb_control
+        self.publisher = publisher
+        self.config_watch = config_watch
+        self.key_prefix = key_prefix
+        comm_cfg = cfg.get('comm', {}) or {}
+        self.timeout_n = int(comm_cfg.get('timeout_after_failures', 3))
+        self.disconnect_n = int(comm_cfg.get('disconnected_after_failures', 10))
+        self.driver = pcb_driver.PCBDriver(cfg, owner=owner)
+        self.reloader = pcb_control.ConfigReloader(PCB_CONFIG_PATH, cfg, board)
+        self.prev_alive = False
+        self.consecutive_fail = 0
+
+    def view(self, rd):
+        """rd as this board sees it (its own keys on a secondary board)."""
+        if not self.key_prefix:
+            return rd
+        return redis_batch.KeyPrefix(rd, self.key_prefix, SHARED_KEYS, SHARED_PREFIXES)
+
+    def read_keys(self):
+        """Redis keys this board's cycle reads, as seen from the unprefixed side."""
+        keys = list(self.reloader.controller.input_keys())
+        if self.key_prefix:
+            keys += CYCLE_READ_KEYS + CONTROL_KEYS
+        view = self.view(None)
+        return [k if view is None else view.key(k) for k in keys]
+
+    def run(self, rd, changed=None):
+        driver = self.driver
+        tx0 = driver.transactions
+        cw = self.config_watch
+        if changed is None and cw is not None and cw.active:
+            changed = cw.pending.take_config()
+        controller = self.reloader.maybe_reload(driver, changed)
+        driver.sync_read_plan()       # leak fast-path switch requested by leak_watch
+        if self.prev_alive and driver.liveness == 'poll':
+            # Healthy last cycle: the poll block read is the health signal. The
+            # standalone probe only runs to tell "poll failed" from "PCB down".
+            ok = _poll_and_control(driver, rd, controller, self.reloader.cfg)
+            alive = ok or self._health_check()
+            self.consecutive_fail = 0 if ok else self.consecutive_fail + 1
+        else:
+            alive = self._health_check()
+            if alive:
+                if not self.prev_alive:
+                    log.info("PCB slave %d alive — applying initial state", driver.slave)
+                    driver.on_connect(rd)
+                    controller.reset()
+                    self.publisher.force_refresh()
+                ok = _poll_and_control(driver, rd, controller, self.reloader.cfg)
+                self.consecutive_fail = 0 if ok else self.consecutive_fail + 1
+            else:
+                self.consecutive_fail += 1   # PCB down (mainboard off / cycling)
+        if alive:
+            with timings.time('flush_writes'):
+                driver.flush_writes()      # this cycle's control writes, not next cycle's
+        self.prev_alive = alive
+        rd.set(K.COMM_CONSECUTIVE_FAILURES, self.consecutive_fail)
+        _update_comm_state(rd, self.consecutive_fail, self.timeout_n, self.disconnect_n)
+        log.debug("cycle: %d Modbus transactions, write queue %s",
+                  driver.transactions - tx0, driver.queue.stats())
+
+    def _health_check(self):
+        with timings.time('health_check'):
+            return self.driver.health_check()
+
+
+class PCBBus:
+    """Bus stage on the PCB backend: every board of the RS485 segment in its own slot.
+
+    Board i starts i * window / N into the stage (modbus.schedule_window_seconds), so
+    the boards' polls are spread over the cycle instead of queueing behind each other
+    on the bus lock. The first board's driver owns the serial client. It samples bus
+    utilisation (time inside Modbus requests, leak fast path included, over the last
+    cycles) every cycle and publishes it with the timing snapshot (crawler_timing),
+    along with how many boards like these fit the segment at that rate.
+    """
+
+    def __init__(self, cfg, publisher, config_watch=None, cycle_s=1.0):
+        self.boards = []
+        owner = None
+        for i, (board_cfg, prefix) in enumerate(pcb_driver.board_configs(cfg)):
+            board = PCBCycle(board_cfg, publisher, owner=owner, board=i, key_prefix=prefix)
+            owner = owner or board.driver
+            self.boards.append(board)
+        self.driver = self.boards[0].driver
+        self.config_watch = config_watch
+        self.cycle_s = cycle_s
+        self.window_s = float(cfg['modbus'].get('schedule_window_seconds', cycle_s * 0.5))
+        self._window = deque(maxlen=10)     # (bus seconds, wall seconds) per cycle
+        self._last = None
+
+    def read_keys(self):
+        """Fan zone inputs and secondary boards' cycle/control keys, for the cycle
+        batch prefetch (re-read every cycle: a reload may change the zone inputs)."""
+        keys = []
+        for board in self.boards:
+            keys += board.read_keys()
+        return list(dict.fromkeys(keys))
+
+    def run(self, rd):
+        cw = self.config_watch
+        changed = cw.pending.take_config() if cw is not None and cw.active else None
+        t0 = time.monotonic()
+        slot = self.window_s / len(self.boards)
+        for i, board in enumerate(self.boards):
+            delay = t0 + i * slot - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            board.run(board.view(rd), changed)
+        rd.delete(K.INDEX_BOARDS)
+        if len(self.boards) > 1:
+            rd.sadd(K.INDEX_BOARDS, *[b.key_prefix for b in self.boards[1:]])
+        self._sample()
+        if timings.due():
+            rd.hset(K.CRAWLER_TIMING, dict(self.queue_fields(), **self.bus_fields()))
+
+    def queue_fields(self):
+        """Write queue depth/latency per board as crawler_timing fields (write_queue,
+        write_queue_pcb2, ...), merged into the hash _publish commits."""
+        return {('write_queue_' + b.key_prefix.rstrip('_')).rstrip('_'): json.dumps(b.driver.queue.stats())
+                for b in self.boards}
+
+    def _sample(self):
+        now = time.monotonic()
+        bus = sum(b.driver.bus_time_s for b in self.boards)
+        if self._last is not None:
+            self._window.append((bus - self._last[0], now - self._last[1]))
+        self._last = (bus, now)
+
+    def bus_fields(self):
+        """Bus utilisation (%) and boards-fit estimate as crawler_timing fields; a
+        jittery float as a plain key would change (and bump pi_generation) every cycle."""
+        if not self._window:
+            return {}
+        busy = sum(b for b, _ in self._window)
+        wall = sum(w for _, w in self._window)
+        # both from the measured wall time: boards fit = target / per-board utilisation
+        util = busy / wall if wall > 0 else 0.0
+        fit = int(_BUS_UTIL_TARGET * len(self.boards) / util) if util > 0 else 0
+        return {'bus_utilisation': round(util * 100, 1), 'bus_boards_fit': fit}
+
+
+def _poll_legacy(batch):
+    with timings.time('coolant'):
+        dlc_sensors.poll_coolant(batch)
+
+
+def _read_pi_sensors(batch):
+    """I2C/GPIO stage: Pi-attached env/chassis — both backends, independent of PCB."""
+    with timings.time('env'):
+        values = dlc_sensors.read_env()
+    with timings.time('chassis'):
+        values.update(dlc_sensors.read_chassis())
+    return values
+
+
+def _publish(values, batch):
+    """Redis-publish stage: last good Pi-sensor values + host liveness, then commit
+    everything the cycle queued in one pipeline (and append it to the history ring)."""
+    for key, v in (values.get('sensors') or {}).items():
+        batch.set(key, v)
+    batch.set(K.HOST_STAT, str(is_host_alive(batch)))
+    if history is not None:
+        with timings.time('history'):
+            history.append(time.time(), batch.pending(history.keys))
+    if timings.due():
+        batch.hset(K.CRAWLER_TIMING, timings.snapshot())
+    with timings.time('redis_commit'):
+        batch.commit()
+    log.debug("cycle: %d Redis round trips, %d unchanged writes suppressed",
+              batch.round_trips, batch.publisher.suppressed if batch.publisher else 0)
+
+
 def main():
     backend = pcb_driver.detect_backend()
     log.info("backend = %s (temp/humid via Pi-side, always-on)", backend)
 
-    driver = None
-    reloader = None
+    pcb = None
+    global history
     cycle_s = 1.0
-    timeout_n = disconnect_n = None
-    prev_alive = False
-    consecutive_fail = 0
+    cfg = {}
+    loop_cfg = {}
+    publisher = None
+    pending = change_watch.PendingChanges()
+    key_watch = None
+    control_state = {}
 
     if backend == 'pcb':
-        import pcb_control
         cfg = _load_yaml(PCB_CONFIG_PATH)
-        cycle_s = float(cfg.get('loop', {}).get('cycle_seconds', 1.0))
-        comm_cfg = cfg.get('comm', {}) or {}
-        timeout_n = int(comm_cfg.get('timeout_after_failures', 3))
-        disconnect_n = int(comm_cfg.get('disconnected_after_failures', 10))
-        driver = pcb_driver.PCBDriver(cfg)
-        reloader = pcb_control.ConfigReloader(PCB_CONFIG_PATH, cfg)
+        loop_cfg = cfg.get('loop', {}) or {}
+        cycle_s = float(loop_cfg.get('cycle_seconds', 1.0))
+        publisher = redis_batch.ChangePublisher(loop_cfg.get('publish_refresh_cycles', 30))
+        config_watch = change_watch.ConfigWatcher(PCB_CONFIG_PATH, pending).start()
+        pcb = PCBBus(cfg, publisher, config_watch, cycle_s)
         # Always boot into auto (fan-curve) mode — safe default. Manual is entered only
         # via the web UI, which captures the current PWM at switch time (no jump).
         rd.set('control_mode', 'auto')
-        log.info("PCB collector @ %.2fs cadence (liveness via 1Hz health check), mode=auto", cycle_s)
-
+        key_watch = change_watch.RedisKeyWatcher(rd, CONTROL_KEYS, pending).start()
+        watchers = [leak_watch.LeakWatcher(board.driver, rd, board.key_prefix).start()
+                    for board in pcb.boards]
+        server = register_cache.CacheServer.from_config(pcb.driver.regcache, cfg)
+        if server is not None:
+            server.start()
+        log.info("PCB collector @ %.2fs cadence (liveness via %s), mode=auto, slaves %s", cycle_s,
+                 'poll read' if pcb.driver.liveness == 'poll' else '1Hz health check',
+                 [b.driver.slave for b in pcb.boards])
+
+    if publisher is None:
+        publisher = redis_batch.ChangePublisher()
+    history = ring_store.RingWriter.from_config(cfg, cycle_s)
+    if history is not None and pcb is not None:
+        # the leak fast path SETs coolant_leak itself, outside the cycle batch (it may be
+        # turned on by a config reload, so every watcher is a source while it is active)
+        for w in watchers:
+            history.sources[w.leak_key] = lambda w=w: w.debounce.state if w.active else None
+
+    # Per-stage deadlines default to the cycle; publish gets a short slice after them.
+    deadlines = loop_cfg.get('stage_deadline_seconds', {}) or {}
+    staged = bool(loop_cfg.get('staged', True))
+    bus = acquisition.Stage('bus', pcb.run if pcb is not None else _poll_legacy,
+                            deadlines.get('bus', cycle_s * 0.9))
+    sensors = acquisition.Stage('sensors', _read_pi_sensors, deadlines.get('sensors', cycle_s * 0.9))
+    engine = acquisition.AcquisitionEngine(
+        [bus, sensors], _publish, deadlines.get('publish', cycle_s * 0.1),
+        staged=staged, stale_after_s=cycle_s * 5, timings=timings,
+        merge_fn=redis_batch.CycleBatch.absorb,
+    )
+    timings.cycle_s = cycle_s
+    timings.publish_every = int(loop_cfg.get('timing_publish_cycles', 10))
+    meter = acquisition.OverrunMeter(cycle_s, label='staged cycle' if staged else 'sequential cycle')
+    settle_s = float(loop_cfg.get('change_settle_seconds', 0.2))
+
+    early = False
     try:
         while True:
             t0 = time.monotonic()
-
-            if backend == 'pcb':
-                controller = reloader.maybe_reload(driver)
-                alive = driver.health_check()
-                if alive:
-                    if not prev_alive:
-                        log.info("PCB alive — applying initial state")
-                        driver.on_connect(rd)
-                    ok = False
-                    try:
-                        ok = driver.poll(rd)
-                    except Exception:
-                        log.exception("driver.poll raised")
-                    consecutive_fail = 0 if ok else consecutive_fail + 1
-                    if ok:
-                        try:
-                            # Check control_mode: manual or auto (default)
-                            control_mode = rd.get('control_mode') or 'auto'
-                            if control_mode == 'manual':
-                                _apply_manual_pwm(driver, rd, cfg)
-                            else:
-                                controller.update(driver, rd)
-                        except Exception:
-                            log.exception("control update failed")
-                else:
-                    consecutive_fail += 1   # PCB down (mainboard off / cycling)
-                prev_alive = alive
-                rd.set(K.COMM_CONSECUTIVE_FAILURES, consecutive_fail)
-                _update_comm_state(consecutive_fail, timeout_n, disconnect_n)
+            read_keys = CYCLE_READ_KEYS + (pcb.read_keys() if pcb is not None else [])
+            control_state.update(pending.take_keys())
+            if key_watch is not None and key_watch.active:
+                batch = redis_batch.CycleBatch(rd, read_keys, publisher, known=control_state)
             else:
-                try:
-                    dlc_sensors.poll_coolant(rd)
-                except Exception:
-                    log.exception("poll_coolant failed")
-
-            # Pi-attached env/chassis — both backends, always (independent of PCB)
-            try:
-                dlc_sensors.update_env(rd)
-                dlc_sensors.update_chassis(rd)
-            except Exception:
-                log.exception("env/chassis update failed")
-
-            rd.set(K.HOST_STAT, str(is_host_alive()))
-
+                batch = redis_batch.CycleBatch(rd, read_keys + CONTROL_KEYS, publisher)
+            published = engine.run_cycle(batch)
             elapsed = time.monotonic() - t0
-            time.sleep(max(0.0, cycle_s - elapsed))
+            meter.record(elapsed, published)
+            timings.cycle(t0, elapsed, early)
+            # A posted config/control change ends the wait early -> applied after a short
+            # settle (a burst of posts coalesces into one early cycle).
+            early = pending.wait(cycle_s - elapsed)
+            if early:
+                log.debug("change event — starting the next cycle early")
+                pending.settle(min(settle_s, t0 + cycle_s - time.monotonic()))
     except KeyboardInterrupt:
         log.info("interrupted")
     finally:
-        if driver is not None:
-            driver.close()
+        if pcb is not None:
+            pcb.driver.close()
 
 
 if __name__ == '__main__':
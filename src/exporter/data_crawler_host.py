@@ -19,6 +19,19 @@ client = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 
 NVME_KEY_TTL_SEC = 60
 
+# Key-family indexes (SETs of the member key names), replaced in the same pipeline as
+# the values; the exporter discovers nic_*_stat / nvme_*_temp through them (SMEMBERS)
+# instead of KEYS, which scans the whole keyspace and blocks Redis on the Pi.
+NIC_INDEX_KEY = "index_nic_stat"
+NVME_INDEX_KEY = "index_nvme_temp"
+
+# INCR'd at the end of a pass's pipeline when any written value changed since the
+# previous pass (host_ttl, the heartbeat, does not count); sensor_exporter reuses its
+# last scrape while this and the Pi's pi_generation are unchanged. SET NX every pass
+# so the counter exists again right after a Redis restart.
+GENERATION_KEY = "host_generation"
+_last_written = None
+
 
 def get_sensors_json() -> dict:
     p = subprocess.run(
@@ -331,10 +344,18 @@ def get_nvme_temps_from_text(text: str) -> dict:
     return result
 
 
+def replace_index(pipe, name, keys, ex=None):
+    pipe.delete(name)
+    if keys:
+        pipe.sadd(name, *keys)
+        if ex is not None:
+            pipe.expire(name, ex)
+
+
 def clear_stale_nvme_keys(pipe, current_count):
     old_indexes = set()
 
-    for raw_key in client.keys("nvme_*_temp"):
+    for raw_key in client.smembers(NVME_INDEX_KEY):
         key_s = raw_key.decode() if isinstance(raw_key, bytes) else str(raw_key)
         m = re.fullmatch(r"nvme_(\d+)_temp", key_s)
         if m:
@@ -345,6 +366,7 @@ def clear_stale_nvme_keys(pipe, current_count):
 
 
 def write_metrics_once():
+    global _last_written
     sensors_data = get_sensors_json()
     sensors_text = get_sensors_text()
 
@@ -367,9 +389,12 @@ def write_metrics_once():
             pipe.set(str(key), str(value))
 
     # NIC link
+    nic_keys = []
     for nic in curr_link_status:
         key, val = next(iter(nic.items()))
         pipe.set(f"nic_{key}_stat", str(val))
+        nic_keys.append(f"nic_{key}_stat")
+    replace_index(pipe, NIC_INDEX_KEY, nic_keys)
 
     # GPU
     for idx, gpu in enumerate(curr_chipsinfo):
@@ -384,7 +409,8 @@ def write_metrics_once():
     pipe.set("mem_total", curr_meminfo[0])
     pipe.set("mem_usage", curr_meminfo[1])
     pipe.set("mem_available", curr_meminfo[2])
-    pipe.set("cpu_usage", get_cpu_usage_percent())
+    cpu_usage = get_cpu_usage_percent()
+    pipe.set("cpu_usage", cpu_usage)
 
     # IB NIC
     ib_temp = get_ib_nic_asic_temp()
@@ -392,21 +418,30 @@ def write_metrics_once():
         pipe.set("ib_nic_temp", ib_temp)
 
     # NVMe
-    nvme_count = 0
+    nvme_keys = []
 
     for key, value in curr_nvme_temps.items():
         pipe.set(str(key), str(value), ex=NVME_KEY_TTL_SEC)
         if str(key).endswith("_temp"):
-            nvme_count += 1
+            nvme_keys.append(str(key))
+    nvme_count = len(nvme_keys)
 
     pipe.set("nvme_count", str(nvme_count), ex=NVME_KEY_TTL_SEC)
     clear_stale_nvme_keys(pipe, nvme_count)
+    replace_index(pipe, NVME_INDEX_KEY, nvme_keys, ex=NVME_KEY_TTL_SEC)
 
     # Host heartbeat
     pipe.set("host_ttl", int(time.time() * 1000))
     pipe.expire("host_ttl", 7)
 
+    written = repr((curr_cpusinfo[1], curr_ipmi_telemetry, curr_link_status, curr_chipsinfo,
+                    curr_meminfo, cpu_usage, ib_temp, curr_nvme_temps))
+    pipe.set(GENERATION_KEY, 0, nx=True)
+    if written != _last_written:
+        pipe.incr(GENERATION_KEY)
+
     pipe.execute()
+    _last_written = written
 
 
 if __name__ == "__main__":
@@ -10,9 +10,13 @@ Env (air temp/humidity) and chassis are Pi-attached, so they run on both backend
 keep working regardless of PCB/mainboard power.
 """
 import math
+import os
 import sys
+import threading
 import time
+from collections import deque
 
+import redis_keys as K
 from machine_config import MACHINE, COOLANT_CHANNELS
 
 try:
@@ -53,15 +57,22 @@ def _collect_adc_samples(n=30):
     return [_ADC.ADS1256_GetAll() for _ in range(n)]
 
 
+# NTC divider + Steinhart–Hart coefficients (legacy coolant NTCs).
+VREF = 5.0
+VIN_DIV = 3.3
+R_FIXED = 10000.0
+SH_A = 0.0010957
+SH_B = 0.0002395
+SH_C = 0.000000073454
+
+# Legacy ADS1256 inputs besides the NTCs.
+ADC_LEAK_CH = 7
+ADC_LEVEL_CH = 6
+
+
 def get_coolant_temp(ad_index, adc_samples=None):
     if not _ADC_AVAILABLE:
         return None
-    VREF = 5.0
-    VIN_DIV = 3.3
-    R_FIXED = 10000.0
-    SH_A = 0.0010957
-    SH_B = 0.0002395
-    SH_C = 0.000000073454
     try:
         if adc_samples is None:
             adc_samples = _collect_adc_samples()
@@ -96,6 +107,73 @@ def get_coolant_level_detection(adc_samples=None):
     return 0 if float(_median(samples)) > 1.2 else 1
 
 
+# Steinhart–Hart lookup: NTC temperature vs divider voltage, linearly interpolated.
+# 0.5 mV steps keep the interpolation error far below the 0.1 °C published resolution.
+_NTC_LUT_STEP_V = 0.0005
+_NTC_V_MIN = 0.001              # at/below = pinned to a rail (NTC not connected)
+_NTC_V_MAX = VIN_DIV - 0.05
+
+
+def _build_ntc_lut():
+    v = np.arange(_NTC_V_MIN, _NTC_V_MAX + _NTC_LUT_STEP_V, _NTC_LUT_STEP_V)
+    ln_r = np.log((v * R_FIXED) / (VIN_DIV - v))
+    return v, 1.0 / (SH_A + SH_B * ln_r + SH_C * ln_r ** 3) - 273.15
+
+
+class LegacyCoolantEngine:
+    """Vectorized ADS1256 acquisition for poll_coolant.
+
+    Scans only the wired NTC channels plus leak and level (GetChannalValue per channel
+    instead of 8-channel GetAll), into a preallocated (n_samples, n_channels) array;
+    all channel medians come from one np.median and temperatures from the LUT.
+    """
+
+    def __init__(self, adc, channels, n_samples=30):
+        self.adc = adc
+        self.names = list(channels)
+        self.chs = [channels[name] for name in self.names] + [ADC_LEAK_CH, ADC_LEVEL_CH]
+        self._buf = np.empty((n_samples, len(self.chs)), dtype=np.float64)
+        self._lut_v, self._lut_t = _build_ntc_lut()
+
+    def acquire(self):
+        read = self.adc.ADS1256_GetChannalValue
+        buf = self._buf
+        for i in range(len(buf)):
+            for j, ch in enumerate(self.chs):
+                buf[i, j] = read(ch)
+
+    def read(self):
+        """({name: temp °C or None}, leak 0/1, level 0/1) from a fresh acquisition."""
+        self.acquire()
+        volts = np.median(self._buf, axis=0) * (VREF / 0x7fffff)
+        ntc_v = volts[:len(self.names)]
+        temps_c = np.round(np.interp(ntc_v, self._lut_v, self._lut_t), 1)
+        wired = (ntc_v > _NTC_V_MIN) & (ntc_v < _NTC_V_MAX)
+        temps = {name: (float(t) if ok else None)
+                 for name, t, ok in zip(self.names, temps_c, wired)}
+        leak = 1 if volts[-2] < 3.0 else 0
+        level = 0 if volts[-1] > 1.2 else 1
+        return temps, leak, level
+
+
+_legacy_engine = None
+
+
+def legacy_engine():
+    global _legacy_engine
+    if _legacy_engine is None and _ADC_AVAILABLE and _HAS_NP:
+        _legacy_engine = LegacyCoolantEngine(_ADC, COOLANT_CHANNELS.get(MACHINE, {}))
+    return _legacy_engine
+
+
+def _read_coolant_scalar():
+    """Pre-engine path (no NumPy): 30 full GetAll scans + per-value conversion."""
+    adc = _collect_adc_samples()
+    temps = {name: get_coolant_temp(idx, adc)
+             for name, idx in COOLANT_CHANNELS.get(MACHINE, {}).items()}
+    return temps, get_coolant_leak_detection(adc), get_coolant_level_detection(adc)
+
+
 # ── Air temp/humidity — HDC302x → AHT20 (I2C, instant) → DHT11 (catch-all). Both backends. ──
 def _probe_hdc302x():
     try:
@@ -123,8 +201,8 @@ def _probe_aht20():
 
 def _probe_dht11():
     # Last-resort catch-all: DHT11 is a 1-wire GPIO sensor with no I2C address to probe,
-    # so we only set up the GPIO (no read = no startup delay). Runtime reads in
-    # get_air_temp/humit retry, since DHT11 reads are flaky.
+    # so we only set up the GPIO (no read = no startup delay). Runtime reads go through
+    # TempHumidSampler, whose median absorbs the flaky DHT11 reads.
     try:
         import adafruit_dht, board
         return adafruit_dht.DHT11(board.D4)
@@ -184,6 +262,81 @@ def get_air_humit():
     return _read_n(_read_humid_once)
 
 
+# Natural sample period per sensor. DHT11 needs >=1 s between transactions (the driver
+# caches the last result for 2 s); the I2C parts convert in tens of ms.
+_SAMPLE_PERIOD_S = {'hdc302x': 0.5, 'aht20': 0.5, 'dht11': 2.0}
+_RING_SIZE = 5
+# Snapshots older than this are treated as "no reading" (sensor unplugged / stuck).
+_ENV_MAX_AGE_S = 10.0
+
+
+class TempHumidSampler:
+    """Background thread reading temperature + humidity together at the sensor's rate.
+
+    One transaction yields both values (a DHT11 read returns the pair), pushed into a
+    small ring buffer; the median of the buffer is kept current on every push so
+    snapshot() is a lock-protected lookup that never touches the sensor.
+    """
+
+    def __init__(self, dev, kind, period_s, size=_RING_SIZE):
+        self.dev = dev
+        self.kind = kind
+        self.period_s = period_s
+        self._temps = deque(maxlen=size)
+        self._humids = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self._temp = None
+        self._humid = None
+        self._at = None
+        self._thread = threading.Thread(target=self._loop, name=f'sampler-{kind}', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _read_pair(self):
+        t = self.dev.temperature
+        h = self.dev.humidity if self.kind == 'dht11' else self.dev.relative_humidity
+        return t, h
+
+    def _loop(self):
+        while True:
+            t0 = time.monotonic()
+            try:
+                t, h = self._read_pair()
+            except Exception:
+                t = h = None   # flaky DHT checksum etc. — next period retries
+            if t is not None or h is not None:
+                with self._lock:
+                    if t is not None:
+                        self._temps.append(t)
+                        self._temp = _median(list(self._temps))
+                    if h is not None:
+                        self._humids.append(h)
+                        self._humid = _median(list(self._humids))
+                    self._at = time.monotonic()
+            time.sleep(max(0.0, self.period_s - (time.monotonic() - t0)))
+
+    def snapshot(self):
+        """(temp median, humidity median, age seconds) — (None, None, None) before the first sample."""
+        with self._lock:
+            if self._at is None:
+                return None, None, None
+            return self._temp, self._humid, time.monotonic() - self._at
+
+
+_env_sampler = None
+
+
+def env_sampler():
+    """Sampler for the detected temp/humid sensor, started on first use; None if no sensor."""
+    global _env_sampler
+    if _env_sampler is None and _temp_humid_dev is not None:
+        _env_sampler = TempHumidSampler(
+            _temp_humid_dev, _temp_humid_kind, _SAMPLE_PERIOD_S[_temp_humid_kind]).start()
+    return _env_sampler
+
+
 # ── Gyro — MPU6050 (dg5w only). Both backends (moves to PCB on Rev_D). ──
 _gyro_dev = None
 if MACHINE == 'dg5w':
@@ -196,11 +349,19 @@ if MACHINE == 'dg5w':
 
 
 def get_chassis_stabil():
-    """1=stable, 0=unstable, None=non-dg5w (caller omits the key)."""
+    """1=stable, 0=unstable, None=non-dg5w (caller omits the key).
+
+    Windowed over everything sampled since the previous call when the background
+    GyroSampler runs; otherwise the original two-sample (10 ms apart) check.
+    """
     if MACHINE != 'dg5w':
         return None
     if _gyro_dev is None:
         return 1
+    sampler = gyro_sampler()
+    if sampler is not None:
+        stats = sampler.window_stats()
+        return 1 if stats is None else stats['stabil']
     try:
         a = _gyro_dev.get_gyro_data()
         time.sleep(0.01)
@@ -212,19 +373,149 @@ def get_chassis_stabil():
         return 1
 
 
+# Unstable when consecutive samples (10 ms apart at 100 Hz, as in the original
+# two-sample check) jump by more than this on x AND y, or on z.
+_GYRO_DELTA_DPS = 5.0
+_GYRO_RATE_HZ = 100
+_GYRO_RING_S = 4            # ring covers a few cycles in case a window is late
+_GYRO_DRAIN_S = 0.05        # FIFO drain period (100 Hz x 6 B = 30 B per drain, FIFO 1 KiB)
+# GADGETINI_GYRO_STATS=1 also publishes chassis_gyro_peak_delta / chassis_gyro_rms next to
+# chassis_stabil. Off by default: the RMS moves every cycle, so it would be re-sent (and
+# bump pi_generation) every cycle.
+_PUBLISH_GYRO_STATS = os.environ.get('GADGETINI_GYRO_STATS', '0').strip().lower() in ('1', 'true', 'yes')
+
+# MPU6050 registers not wrapped by the mpu6050 library (datasheet RM-MPU-6000A).
+_MPU_SMPLRT_DIV = 0x19
+_MPU_FIFO_EN    = 0x23
+_MPU_INT_STATUS = 0x3A
+_MPU_USER_CTRL  = 0x6A
+_MPU_FIFO_COUNT = 0x72
+_MPU_FIFO_RW    = 0x74
+_FIFO_GYRO_XYZ  = 0x70      # XG | YG | ZG
+_FIFO_OFLOW     = 0x10
+_FIFO_CHUNK     = 30        # <= 32 B SMBus block, whole 6-byte samples
+
+
+class GyroSampler:
+    """Background MPU6050 gyro acquisition at a fixed rate into a NumPy ring buffer.
+
+    Samples come from the chip FIFO (DLPF 42 Hz, 1 kHz / (1 + 9) = 100 Hz); if the
+    FIFO cannot be configured, get_gyro_data() is polled at the same rate instead.
+    window_stats() reduces everything written since its previous call, so the
+    stability check covers the whole cycle interval, not a 10 ms slice of it.
+    """
+
+    def __init__(self, dev, rate_hz=_GYRO_RATE_HZ, ring_s=_GYRO_RING_S):
+        self.dev = dev
+        self.rate_hz = rate_hz
+        self._buf = np.zeros((rate_hz * ring_s, 3), dtype=np.float32)
+        self._written = 0       # total samples ever written (ring index = written % size)
+        self._consumed = 0      # _written at the previous window_stats()
+        self._lock = threading.Lock()
+        self._fifo = False
+        self._scale = 131.0
+        self._thread = threading.Thread(target=self._loop, name='sampler-gyro', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _setup_fifo(self):
+        bus, addr = self.dev.bus, self.dev.address
+        self._scale = {250: 131.0, 500: 65.5, 1000: 32.8, 2000: 16.4}.get(
+            self.dev.read_gyro_range(), 131.0)
+        self.dev.set_filter_range(self.dev.FILTER_BW_42)                # gyro rate 1 kHz
+        bus.write_byte_data(addr, _MPU_SMPLRT_DIV, 1000 // self.rate_hz - 1)
+        bus.write_byte_data(addr, _MPU_FIFO_EN, _FIFO_GYRO_XYZ)
+        bus.write_byte_data(addr, _MPU_USER_CTRL, 0x44)                 # FIFO_EN | FIFO_RESET
+        self._fifo = True
+
+    def _drain_fifo(self):
+        bus, addr = self.dev.bus, self.dev.address
+        if bus.read_byte_data(addr, _MPU_INT_STATUS) & _FIFO_OFLOW:
+            bus.write_byte_data(addr, _MPU_USER_CTRL, 0x44)             # lost sync -> reset
+            return None
+        hi, lo = bus.read_i2c_block_data(addr, _MPU_FIFO_COUNT, 2)
+        n = ((hi << 8) | lo) // 6 * 6
+        raw = bytearray()
+        while len(raw) < n:
+            raw += bytes(bus.read_i2c_block_data(addr, _MPU_FIFO_RW, min(_FIFO_CHUNK, n - len(raw))))
+        return np.frombuffer(bytes(raw), dtype='>i2').reshape(-1, 3) / self._scale
+
+    def _push(self, samples):
+        size = len(self._buf)
+        with self._lock:
+            idx = (self._written + np.arange(len(samples))) % size
+            self._buf[idx] = samples
+            self._written += len(samples)
+
+    def _loop(self):
+        try:
+            self._setup_fifo()
+        except Exception as e:
+            print(f"Gyro FIFO setup failed, polling at {self.rate_hz} Hz: {e}", flush=True)
+        period = _GYRO_DRAIN_S if self._fifo else 1.0 / self.rate_hz
+        while True:
+            t0 = time.monotonic()
+            try:
+                if self._fifo:
+                    samples = self._drain_fifo()
+                else:
+                    g = self.dev.get_gyro_data()
+                    samples = np.array([[g['x'], g['y'], g['z']]], dtype=np.float32)
+                if samples is not None and len(samples):
+                    self._push(samples)
+            except Exception:
+                pass    # transient I2C error — keep sampling
+            time.sleep(max(0.0, period - (time.monotonic() - t0)))
+
+    def window_stats(self):
+        """{'stabil', 'peak_delta', 'rms', 'samples'} over samples since the last call.
+
+        The previous window's last sample is included so the first delta is not lost.
+        None when nothing new was sampled (sampler stalled).
+        """
+        size = len(self._buf)
+        with self._lock:
+            written = self._written
+            if written <= self._consumed:
+                return None
+            start = max(self._consumed - 1, written - size, 0)
+            win = self._buf[np.arange(start, written) % size]
+            self._consumed = written
+        if len(win) < 2:
+            return {'stabil': 1, 'peak_delta': 0.0, 'rms': 0.0, 'samples': len(win)}
+        d = np.abs(np.diff(win, axis=0))
+        jumps = ((d[:, 0] > _GYRO_DELTA_DPS) & (d[:, 1] > _GYRO_DELTA_DPS)) | (d[:, 2] > _GYRO_DELTA_DPS)
+        return {
+            'stabil': 0 if jumps.any() else 1,
+            'peak_delta': round(float(d.max()), 2),
+            'rms': round(float(np.sqrt(win.var(axis=0).sum())), 2),
+            'samples': len(win),
+        }
+
+
+_gyro_sampler = None
+
+
+def gyro_sampler():
+    """GyroSampler for the MPU6050, started on first use; None without gyro or NumPy."""
+    global _gyro_sampler
+    if _gyro_sampler is None and _gyro_dev is not None and _HAS_NP:
+        _gyro_sampler = GyroSampler(_gyro_dev).start()
+    return _gyro_sampler
+
+
 # ── Entry points called by data_crawler.py ─────────────────────────
 def poll_coolant(rd):
     """ADS1256 -> coolant_temp_*, delta_t, leak, level. Legacy only; no-op without ADC."""
     if not _ADC_AVAILABLE:
         return
-    adc = _collect_adc_samples()
-    channels = COOLANT_CHANNELS.get(MACHINE, {})
+    engine = legacy_engine()
+    temps, leak, level = engine.read() if engine is not None else _read_coolant_scalar()
     pipe = rd.pipeline(transaction=False)
 
-    temps = {}
-    for name, idx in channels.items():
-        temp = get_coolant_temp(idx, adc)
-        temps[name] = temp
+    for name, temp in temps.items():
         key = f"coolant_temp_{name}"
         if temp is None:
             pipe.delete(key)
@@ -241,27 +532,57 @@ def poll_coolant(rd):
     _delta_or_clear('inlet1', 'outlet1', 'coolant_delta_t1')
     _delta_or_clear('inlet2', 'outlet2', 'coolant_delta_t2')
 
-    leak = get_coolant_leak_detection(adc)
     if leak is not None:
         pipe.set("coolant_leak", leak)
-    level = get_coolant_level_detection(adc)
     if level is not None:
         pipe.set("coolant_level", level)
     pipe.execute()
 
 
-def update_env(rd):
-    """air_temp, air_humit -> Redis. Both backends (Pi-attached, always-on)."""
-    t = get_air_temp()
+def read_env():
+    """{'air_temp', 'air_humit'} rounded to 0.1 from the sampler; non-blocking.
+
+    A missing or stale (> _ENV_MAX_AGE_S) reading is omitted.
+    """
+    sampler = env_sampler()
+    if sampler is None:
+        return {}
+    t, h, age = sampler.snapshot()
+    if age is None or age > _ENV_MAX_AGE_S:
+        return {}
+    out = {}
     if t is not None:
-        rd.set("air_temp", round(t, 1))
-    h = get_air_humit()
+        out["air_temp"] = round(t, 1)
     if h is not None:
-        rd.set("air_humit", round(h, 1))
+        out["air_humit"] = round(h, 1)
+    return out
+
+
+def read_chassis():
+    """{'chassis_stabil'} (+ gyro window stats) on dg5w, {} elsewhere. Non-blocking
+    when the gyro sampler runs."""
+    if MACHINE != 'dg5w':
+        return {}
+    sampler = gyro_sampler()
+    if sampler is None:
+        return {"chassis_stabil": get_chassis_stabil()}
+    stats = sampler.window_stats()
+    if stats is None:
+        return {"chassis_stabil": 1}   # sampler stalled — same fail-safe as a read error
+    out = {"chassis_stabil": stats['stabil']}
+    if _PUBLISH_GYRO_STATS:
+        out[K.CHASSIS_GYRO_PEAK] = stats['peak_delta']
+        out[K.CHASSIS_GYRO_RMS] = stats['rms']
+    return out
+
+
+def update_env(rd):
+    """air_temp, air_humit -> Redis. Both backends (Pi-attached, always-on)."""
+    for key, v in read_env().items():
+        rd.set(key, v)
 
 
 def update_chassis(rd):
     """chassis_stabil -> Redis. dg5w only (None is skipped)."""
-    stabil = get_chassis_stabil()
-    if stabil is not None:
-        rd.set("chassis_stabil", stabil)
+    for key, v in read_chassis().items():
+        rd.set(key, v)
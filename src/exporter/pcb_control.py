@@ -1,14 +1,23 @@
 """Control-board cooling policy — fan-duty control + config hot-reload.
 
-Fan duty is a linear interpolation of outlet1 temperature between (min_temp, min_duty)
-and (max_temp, max_duty). Pump duty is fixed (no flow sensor). There is no state
-machine: the 12V supply being mainboard-gated is the hardware interlock.
+By default fan duty is a linear interpolation of outlet1 temperature between
+(min_temp, min_duty) and (max_temp, max_duty) (fan_curve, edited by the Web UI) and
+pump duty is fixed (no flow sensor). fan_zones replaces that with per-group curves:
+each zone (radiator fans, chassis fans, pumps, ...) has its own piecewise-linear or
+monotone-spline curve over any input keys, with hysteresis, compiled at (re)load
+into a duty table indexed by 0.1 C. There is no state machine: the 12V supply being
+mainboard-gated is the hardware interlock.
 
-Hot-reload: on a pcb_config.yaml mtime change, fan_curve / pump duty / DOUT are applied
-at runtime (web UI edit -> REST API -> file write -> picked up next cycle).
+Hot-reload: on a pcb_config.yaml change, fan_curve / fan_zones / pump duty / DOUT are applied
+at runtime (web UI edit -> REST API -> file write -> inotify event, or the mtime check
+next cycle when inotify is unavailable; see change_watch).
 """
+import bisect
 import logging
+import math
 import os
+import time
+from array import array
 
 import yaml
 
@@ -40,78 +49,289 @@ def _contiguous_runs(channels):
     return runs
 
 
-class FanCurveController:
-    """Linear interpolation between (min_temp, min_duty) and (max_temp, max_duty)."""
-
-    def __init__(self, fan_curve_cfg, fan_pwm_chs):
-        cfg = fan_curve_cfg or {}
-        self.min_temp = float(cfg.get('min_temp', 25))
-        self.max_temp = float(cfg.get('max_temp', 60))
-        self.min_duty = int(cfg.get('min_duty', 80))
-        self.max_duty = int(cfg.get('max_duty', 1000))
-        if self.max_temp <= self.min_temp:
-            self.max_temp = self.min_temp + 1.0
-        self.fan_chs = list(fan_pwm_chs or [])
-        # Consecutive channels are written in one FC16 transaction (atomic).
-        self._runs = _contiguous_runs(self.fan_chs)
+def _monotone_spline(xs, ys):
+    """Fritsch-Carlson monotone cubic through (xs, ys): no overshoot between points."""
+    n = len(xs)
+    d = [(ys[i + 1] - ys[i]) / (xs[i + 1] - xs[i]) for i in range(n - 1)]
+    m = [d[0]] + [0.0 if d[i - 1] * d[i] <= 0 else (d[i - 1] + d[i]) / 2 for i in range(1, n - 1)] + [d[-1]]
+    for i in range(n - 1):
+        if d[i] == 0:
+            m[i] = m[i + 1] = 0.0
+            continue
+        a, b = m[i] / d[i], m[i + 1] / d[i]
+        if a * a + b * b > 9:
+            t = 3 / math.sqrt(a * a + b * b)
+            m[i], m[i + 1] = t * a * d[i], t * b * d[i]
+
+    def f(x):
+        i = max(0, min(n - 2, bisect.bisect_right(xs, x) - 1))
+        h = xs[i + 1] - xs[i]
+        u = (x - xs[i]) / h
+        return ((2 * u ** 3 - 3 * u ** 2 + 1) * ys[i] + (u ** 3 - 2 * u ** 2 + u) * h * m[i]
+                + (-2 * u ** 3 + 3 * u ** 2) * ys[i + 1] + (u ** 3 - u ** 2) * h * m[i + 1])
+    return f
+
+
+def _linear(xs, ys):
+    def f(x):
+        i = max(0, min(len(xs) - 2, bisect.bisect_right(xs, x) - 1))
+        frac = (x - xs[i]) / (xs[i + 1] - xs[i])
+        return ys[i] + frac * (ys[i + 1] - ys[i])
+    return f
+
+
+class CurveTable:
+    """Duty curve compiled to an integer table indexed by 0.1 C.
+
+    points: [(temp C, duty 0~1000), ...] — two points is the classic linear curve.
+    Below the first / above the last point the end duties hold. Compiled once per
+    config (re)load, so a control update is one index computation + list lookup.
+    """
+
+    def __init__(self, points, interp='linear', clamp=None):
+        pts = sorted((float(t), float(d)) for t, d in points)
+        if len(pts) < 2:
+            raise ValueError("a curve needs at least two points")
+        xs = [t for t, _ in pts]
+        ys = [d for _, d in pts]
+        if len(set(xs)) != len(xs):
+            raise ValueError(f"duplicate curve temperature in {points}")
+        f = _monotone_spline(xs, ys) if interp == 'spline' and len(pts) > 2 else _linear(xs, ys)
+        self.lo = int(round(xs[0] * 10))
+        hi = int(round(xs[-1] * 10))
+        clamp = clamp or (lambda d: d)
+        self.table = array('H', (clamp(max(0, min(1000, int(round(f(i / 10.0))))))
+                                 for i in range(self.lo, hi + 1)))
+        self.min_duty = min(self.table)
+        self.max_duty = max(self.table)
+
+    def duty(self, temp_c):
+        i = int(round(temp_c * 10)) - self.lo
+        return self.table[0 if i < 0 else min(i, len(self.table) - 1)]
+
+
+class FanZone:
+    """One channel group on one curve: inputs -> hysteresis -> table -> channel writes.
+
+    The curve input is the highest of the zone's input keys (e.g. every gpu_temp_*).
+    Hysteresis is a play band: a rising input moves the curve at once, a falling one
+    only after it has dropped hysteresis_c below the temperature in use, so the duty
+    does not hunt on a sensor sitting at a breakpoint.
+    """
+
+    def __init__(self, name, channels, inputs, curve, hysteresis_c=0.0, limit=1000):
+        self.name = name
+        self.channels = list(channels)
+        self.inputs = list(inputs)
+        self.curve = curve
+        self.hysteresis_c = float(hysteresis_c)
+        self.limit = limit          # ceiling for curve + feed-forward (pump.max_duty on pumps)
+        # Consecutive channels are queued as one run (flushed as one FC16, atomic).
+        self._runs = _contiguous_runs(self.channels)
+        self._temp = None           # temperature the curve is evaluated at
         self._last_written = None
+        self._missing = False
+
+    def _effective(self, temp_c):
+        t = self._temp
+        if t is None or temp_c > t:
+            t = temp_c
+        elif temp_c < t - self.hysteresis_c:
+            t = temp_c + self.hysteresis_c
+        self._temp = t
+        return t
 
-    def _compute_duty(self, temp_c):
-        if temp_c <= self.min_temp:
-            return self.min_duty
-        if temp_c >= self.max_temp:
-            return self.max_duty
-        frac = (temp_c - self.min_temp) / (self.max_temp - self.min_temp)
-        return int(round(self.min_duty + frac * (self.max_duty - self.min_duty)))
+    def update(self, pcb, values, boost=0):
+        """values: {input key: raw Redis value}; boost: feed-forward duty added on top
+        of the curve. Queues the zone's duty if it moved."""
+        temps = []
+        for key in self.inputs:
+            try:
+                temps.append(float(values.get(key)))
+            except (TypeError, ValueError):
+                pass
+        if not temps:
+            # No input (NTC unwired / read failed / host down) — fall back to the idle
+            # baseline. Never leave duty at 0: 0 PWM = fan runs at 100% (no control signal).
+            duty = self.curve.table[0]
+            if not self._missing:
+                log.warning("zone %s: no %s — duty -> %d (idle baseline)", self.name, self.inputs, duty)
+            self._missing = True
+            self._temp = None
+        else:
+            self._missing = False
+            duty = self.curve.duty(self._effective(max(temps)))
+        if boost:
+            duty = max(duty, min(self.limit, duty + boost))
+
+        # deadband, but always emit once when reaching the min/max clamp
+        if self._last_written is not None and abs(duty - self._last_written) < _WRITE_DEADBAND:
+            if duty not in (self.curve.min_duty, self.curve.max_duty, self.limit) or self._last_written == duty:
+                return
+        # Queued on the driver's command queue; it flushes them as FC16 runs at the end
+        # of the bus stage (a failed flush is logged there and retried).
+        for first_ch, run in self._runs:
+            pcb.write_registers(pcb_driver.hr_pwm_duty(first_ch), [duty] * len(run))
+        self._last_written = duty
+        log.debug("zone %s: %s C -> duty=%d -> CH %s", self.name, self._temp, duty, self.channels)
+
+
+class FanCurveController:
+    """Auto-mode control: every zone evaluated from one MGET of their inputs.
+
+    All zones queue onto the driver's command queue, where adjacent channels of
+    different zones (pumps CH1~4 next to fans CH5~12) merge into one FC16 run.
+    """
 
-    def update(self, pcb, rd):
-        """Read outlet1 -> compute duty -> write to all configured fan channels.
+    def __init__(self, zones, feed_forward=None):
+        self.zones = list(zones)
+        self.feed_forward = feed_forward
+
+    def reset(self):
+        """Forget the last written duties (PCB power cycle: on_connect rewrote them)."""
+        for zone in self.zones:
+            zone._last_written = None
+
+    def input_keys(self):
+        keys = [k for z in self.zones for k in z.inputs]
+        if self.feed_forward is not None:
+            keys += self.feed_forward.inputs
+        return list(dict.fromkeys(keys))
+
+    def update(self, pcb, rd, now=None):
+        """Read the zone inputs -> compute duties -> queue writes for changed zones.
 
         The Web UI reads duty back via PCBDriver.poll (register readback), so this
         only writes the channels; it does not publish to Redis itself.
         """
-        if not self.fan_chs:
+        keys = self.input_keys()
+        if not keys:
             return
-        v = rd.get(K.COOLANT_TEMP_OUTLET1)
-        temp_c = None
-        if v is not None:
+        values = dict(zip(keys, rd.mget(keys)))
+        ff = self.feed_forward
+        boost = ff.step(values, time.monotonic() if now is None else now) if ff is not None else 0
+        for zone in self.zones:
+            zone.update(pcb, values, boost if ff is not None and zone.name in ff.zones else 0)
+
+
+class FeedForward:
+    """Heat-load feed-forward: fan duty from host CPU/GPU power, ahead of the NTCs.
+
+    The outlet NTCs see a load step only after the coolant has carried the heat round
+    the loop (tens of seconds). The host publishes gpu_curr_pwr_* / cpu_curr_pwr_*
+    every second, so the summed power, as a fraction of idle_watts..full_watts, adds
+
+        gain_duty * load + lead_duty * max(0, load - lagged load)
+
+    to the zones' curve duty. lagged load follows load with lag_seconds (about the
+    loop's thermal lag), so the lead term is a transient boost on a step up that fades
+    as the curve takes over; gain_duty is the steady part. No power keys (host down)
+    -> no boost.
+    """
+
+    def __init__(self, inputs, zones, idle_w, full_w, gain_duty=0, lead_duty=0, lag_s=30.0):
+        self.inputs = list(inputs)
+        self.zones = set(zones)
+        self.idle_w = float(idle_w)
+        self.full_w = max(float(full_w), self.idle_w + 1.0)
+        self.gain_duty = int(gain_duty)
+        self.lead_duty = int(lead_duty)
+        self.lag_s = max(float(lag_s), 0.1)
+        self.load = None
+        self.boost = 0
+        self._lagged = None
+        self._t = None
+
+    @classmethod
+    def from_config(cls, cfg, zones):
+        """FeedForward for cfg['feed_forward'], or None when it is disabled."""
+        ff = cfg.get('feed_forward', {}) or {}
+        if not ff.get('enabled', False):
+            return None
+        inputs = ff.get('inputs') or ([f'gpu_curr_pwr_{i}' for i in range(8)]
+                                      + [f'cpu_curr_pwr_{i}' for i in range(2)])
+        names = ff.get('zones') or [z.name for z in zones if all(ch > 4 for ch in z.channels)]
+        return cls(inputs, names, ff.get('idle_watts', 500), ff.get('full_watts', 4000),
+                   ff.get('gain_duty', 200), ff.get('lead_duty', 400), ff.get('lag_seconds', 30))
+
+    def step(self, values, now):
+        """Boost duty for this cycle from {key: raw Redis value}."""
+        watts = []
+        for key in self.inputs:
             try:
-                temp_c = float(v)
+                watts.append(float(values.get(key)))
             except (TypeError, ValueError):
-                temp_c = None
-        if temp_c is None:
-            # No outlet temp (NTC unwired / read failed) — fall back to idle (min_duty).
-            # Never leave duty at 0 because 0 PWM = fan runs at 100% (no control signal).
-            log.warning("no %s — fan duty -> min_duty (idle baseline %d)", K.COOLANT_TEMP_OUTLET1, self.min_duty)
-            duty = self.min_duty
+                pass
+        if not watts:
+            self.load = self._lagged = self._t = None
+            self.boost = 0
+            return 0
+        load = max(0.0, min(1.0, (sum(watts) - self.idle_w) / (self.full_w - self.idle_w)))
+        if self._lagged is None:
+            self._lagged = load
         else:
-            duty = self._compute_duty(temp_c)
+            self._lagged += (load - self._lagged) * min(1.0, (now - self._t) / self.lag_s)
+        self._t = now
+        self.load = load
+        self.boost = int(round(self.gain_duty * load + self.lead_duty * max(0.0, load - self._lagged)))
+        return self.boost
 
-        # deadband, but always emit once when reaching the min/max clamp
-        if self._last_written is not None and abs(duty - self._last_written) < _WRITE_DEADBAND:
-            if duty in (self.min_duty, self.max_duty) and self._last_written != duty:
-                pass
-            else:
-                return
-        for first_ch, run in self._runs:
-            base_hr = pcb_driver.hr_pwm_duty(first_ch)
-            if len(run) == 1:
-                ok = pcb.write_register(base_hr, duty)
-            else:
-                ok = pcb.write_registers(base_hr, [duty] * len(run))
-            if not ok:
-                log.warning("fan duty write failed: CH %s (HR %d) duty=%d", run, base_hr, duty)
 
-        self._last_written = duty
-        log.debug("outlet=%s C -> duty=%d -> CH %s", temp_c, duty, self.fan_chs)
+def _wired_chs(cfg, group):
+    return (cfg.get('wiring', {}).get('pwm') or {}).get(f'{group}_ch') or []
+
+
+def _pump_clamp(cfg):
+    """Pump tables are clamped to pump.min_duty/max_duty at compile time (0 = off)."""
+    pump_cfg = cfg.get('pump', {}) or {}
+    lo = int(pump_cfg.get('min_duty', 0))
+    hi = int(pump_cfg.get('max_duty', 1000))
+    return lambda d: 0 if d <= 0 else max(lo, min(hi, d))
+
 
+def _legacy_zone(cfg):
+    """fan_curve (min/max temp + duty, edited by the Web UI) as a single outlet1 zone."""
+    fc = cfg.get('fan_curve', {}) or {}
+    min_temp = float(fc.get('min_temp', 25))
+    max_temp = float(fc.get('max_temp', 60))
+    if max_temp <= min_temp:
+        max_temp = min_temp + 1.0
+    curve = CurveTable([(min_temp, int(fc.get('min_duty', 80))),
+                        (max_temp, int(fc.get('max_duty', 1000)))])
+    return FanZone('fan_curve', _wired_chs(cfg, 'fan'), [K.COOLANT_TEMP_OUTLET1], curve)
 
-def _fan_chs(cfg):
-    return (cfg.get('wiring', {}).get('pwm') or {}).get('fan_ch') or []
+
+def _zone(name, zcfg, cfg):
+    channels = zcfg.get('channels', 'fan')
+    if isinstance(channels, str):
+        channels = _wired_chs(cfg, channels)
+    channels = [ch for ch in channels if 1 <= ch <= 12]
+    inputs = zcfg.get('input', K.COOLANT_TEMP_OUTLET1)
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    pumps = [ch for ch in channels if ch <= 4]
+    if pumps and len(pumps) != len(channels):
+        raise ValueError(f"fan_zones.{name}: pump (CH1~4) and fan channels in one zone")
+    curve = CurveTable(zcfg['points'], zcfg.get('interp', 'linear'),
+                       _pump_clamp(cfg) if pumps else None)
+    limit = int((cfg.get('pump', {}) or {}).get('max_duty', 1000)) if pumps else 1000
+    return FanZone(name, channels, inputs, curve, zcfg.get('hysteresis_c', 0.0), limit)
 
 
 def make_controller(cfg):
-    return FanCurveController(cfg.get('fan_curve', {}), _fan_chs(cfg))
+    """fan_zones when configured, else the single fan_curve zone.
+
+    Raises ValueError on a bad curve (ConfigReloader keeps the previous cfg).
+    """
+    zones_cfg = cfg.get('fan_zones') or {}
+    if not zones_cfg:
+        zones = [_legacy_zone(cfg)]
+    else:
+        zones = [_zone(name, zcfg or {}, cfg) for name, zcfg in zones_cfg.items()]
+        claimed = [ch for z in zones for ch in z.channels]
+        if len(claimed) != len(set(claimed)):
+            raise ValueError(f"fan_zones: a channel is in more than one zone ({claimed})")
+    return FanCurveController(zones, FeedForward.from_config(cfg, zones))
 
 
 class ConfigReloader:
@@ -119,12 +339,18 @@ class ConfigReloader:
 
     Pump duty / DOUT are re-written only when they actually change (fan duty is
     written by the controller anyway). A failed reload keeps the previous cfg.
+    board: index into pcb_driver.board_configs() on a multi-board segment.
     """
 
-    def __init__(self, config_path, cfg):
+    def __init__(self, config_path, cfg, board=0):
         self.path = config_path
         self.cfg = cfg
-        self.controller = make_controller(cfg)
+        self.board = board
+        try:
+            self.controller = make_controller(cfg)
+        except (ValueError, KeyError, TypeError):
+            log.exception("fan_zones invalid — using fan_curve until the config is fixed")
+            self.controller = FanCurveController([_legacy_zone(cfg)])
         self.last_mtime = self._mtime()
         self.last_pump = self._pump_duties(cfg)
         self.last_dout = int(cfg.get('initial_dout_bitmask', 0))
@@ -140,14 +366,20 @@ class ConfigReloader:
         pump = (cfg.get('initial_pwm_duty', {}) or {}).get('pump') or {}
         return {k: int(v) for k, v in pump.items()}
 
-    def maybe_reload(self, driver):
-        """Reload on change and apply to driver; always returns the current controller."""
+    def maybe_reload(self, driver, changed=None):
+        """Reload on change and apply to driver; always returns the current controller.
+
+        changed=None stats the file (mtime polling); True/False come from an event
+        source (change_watch.ConfigWatcher), so an unchanged cycle costs no syscall.
+        """
+        if changed is False:
+            return self.controller
         m = self._mtime()
-        if m is None or m == self.last_mtime:
+        if m is None or (changed is None and m == self.last_mtime):
             return self.controller
         try:
             with open(self.path) as f:
-                new_cfg = yaml.safe_load(f)
+                new_cfg = pcb_driver.board_configs(yaml.safe_load(f))[self.board][0]
             new_controller = make_controller(new_cfg)
             new_pump = self._pump_duties(new_cfg)
             new_dout = int(new_cfg.get('initial_dout_bitmask', 0))
@@ -159,7 +391,7 @@ class ConfigReloader:
             self.cfg = new_cfg
             self.controller = new_controller
             self.last_mtime = m
-            log.info("pcb_config.yaml reloaded (mtime change)")
+            log.info("pcb_config.yaml reloaded (%s)", 'mtime change' if changed is None else 'inotify')
         except Exception:
             log.exception("config reload failed; keeping previous cfg")
             self.last_mtime = m   # don't retry the same broken file every cycle
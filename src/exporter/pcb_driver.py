@@ -2,17 +2,24 @@
 
 Backend family is selected by detect_backend() via ADS1256 presence, not a one-shot
 Modbus probe: on Rev_C the PCB is powered from the mainboard and cycles with it, so
-liveness is tracked every cycle by health_check().
+liveness is tracked every cycle — by health_check(), or by the poll read itself when
+modbus.liveness is 'poll'.
 
 Register map: board manual section 4 (Rev2).
 """
+import contextlib
+import json
 import logging
 import os
+import queue
+import threading
+import time
 from collections import deque
 
 from pymodbus.client import ModbusSerialClient
 
 import redis_keys as K
+import register_cache
 
 log = logging.getLogger('pcb_driver')
 
@@ -38,6 +45,35 @@ NTC_DISCONNECT_SENTINEL = -999
 # always-on env path in the main loop is never starved.
 _MODBUS_TIMEOUT = 0.3
 
+# FC03/FC04 / FC16 limits per request (Modbus spec).
+MODBUS_MAX_READ = 125
+MODBUS_MAX_WRITE = 123
+
+# Command queue priorities (lower is flushed first). Duty and DOUT drive the pumps and
+# fans, so they go out before PWM frequency changes and before the cycle's reads.
+PRIO_SAFETY = 0
+PRIO_CONFIG = 1
+
+# Unused registers a block read may span to merge two needed ranges. At 9600 baud a
+# filler register costs ~2 ms on the wire vs tens of ms per extra round trip, so e.g.
+# modbus.read_gap: 16 keeps the whole IR map in one FC04 — but it also reads reserved
+# registers (IR 1~12 with the full map), which the firmware is not confirmed to allow.
+# The default reads mapped registers only.
+_DEFAULT_READ_GAP = 0
+
+# Last locked port/baud, tried first on the next start (modbus.lock_cache overrides).
+_DEFAULT_LOCK_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.pcb_lock.json')
+
+# While the PCB does not answer, probes back off 1, 2, 4 .. max seconds (mainboard off
+# can last hours); health_check() returns False without touching the bus meanwhile.
+_DEFAULT_BACKOFF_MAX_S = 8.0
+
+# Liveness modes (modbus.liveness):
+#   probe = health_check() runs every cycle and reads the plan (IR 0 included).
+#   poll  = a successful poll block read is the health signal; health_check() is a
+#           standalone IR 0 probe, run only while the PCB is down or after a failed poll.
+LIVENESS_MODES = ('probe', 'poll')
+
 
 def hr_pwm_duty(ch1to12):
     return HR_PWM_DUTY_BASE + (ch1to12 - 1)
@@ -48,6 +84,125 @@ def s16(u16):
     return u16 - 0x10000 if u16 >= 0x8000 else u16
 
 
+def _replace_index(pipe, name, keys):
+    """Replace the key-family index SET `name` with keys (DEL + SADD in the same pipeline)."""
+    pipe.delete(name)
+    if keys:
+        pipe.sadd(name, *keys)
+
+
+def plan_blocks(addresses, max_gap=0, max_count=MODBUS_MAX_READ):
+    """{0,17,18,25} -> [(0,26)] with max_gap>=16 — merge addresses into block reads.
+
+    Two neighbouring addresses share a block when at most max_gap unused registers
+    lie between them and the block stays within max_count registers.
+    """
+    if not addresses:
+        return []
+    addrs = sorted(set(addresses))
+    blocks = []
+    start = last = addrs[0]
+    for a in addrs[1:]:
+        if a - last - 1 <= max_gap and a - start + 1 <= max_count:
+            last = a
+            continue
+        blocks.append((start, last - start + 1))
+        start = last = a
+    blocks.append((start, last - start + 1))
+    return blocks
+
+
+class RegisterImage:
+    """Register values from one execution of the read plan, keyed by address."""
+
+    __slots__ = ('ir', 'hr', 'read_at')
+
+    def __init__(self):
+        self.ir = {}
+        self.hr = {}
+        self.read_at = time.monotonic()
+
+
+def write_priority(address):
+    if HR_PWM_FREQ_TIM1 <= address <= HR_PWM_FREQ_TIM8:
+        return PRIO_CONFIG
+    return PRIO_SAFETY
+
+
+class CommandQueue:
+    """Pending PCB register writes, coalesced per register and drained by priority.
+
+    put() from any thread replaces a still-pending value for the same register (the
+    latest target wins; the original enqueue time is kept for latency). runs() groups
+    pending registers of equal priority into contiguous FC16 runs. An entry is only
+    removed by done() if it was not superseded while its write was on the wire.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}          # address -> (value, priority, enqueued monotonic)
+        self._latencies = deque(maxlen=256)
+        self.last_written = {}      # address -> last value the PCB acknowledged
+        self.max_depth = 0
+        self.coalesced = 0
+        self.written = 0            # registers written
+        self.transactions = 0       # FC06/FC16 requests issued by flushes
+
+    def put(self, address, value, priority=None):
+        if priority is None:
+            priority = write_priority(address)
+        with self._lock:
+            prev = self._pending.get(address)
+            if prev is not None:
+                self.coalesced += 1
+                t_enq = prev[2]
+                priority = min(priority, prev[1])
+            else:
+                t_enq = time.monotonic()
+            self._pending[address] = (int(value), priority, t_enq)
+            self.max_depth = max(self.max_depth, len(self._pending))
+
+    def depth(self):
+        with self._lock:
+            return len(self._pending)
+
+    def runs(self):
+        """[(priority, start, [values])] in flush order."""
+        with self._lock:
+            pending = dict(self._pending)
+        out = []
+        for prio in sorted({p for _, p, _ in pending.values()}):
+            addrs = [a for a, (_, p, _) in pending.items() if p == prio]
+            for start, count in plan_blocks(addrs, 0, MODBUS_MAX_WRITE):
+                out.append((prio, start, [pending[a][0] for a in range(start, start + count)]))
+        return out
+
+    def done(self, start, values):
+        now = time.monotonic()
+        with self._lock:
+            self.transactions += 1
+            for addr, v in zip(range(start, start + len(values)), values):
+                cur = self._pending.get(addr)
+                self.last_written[addr] = v
+                if cur is not None and cur[0] == v:
+                    del self._pending[addr]
+                    self._latencies.append(now - cur[2])
+                    self.written += 1
+
+    def stats(self):
+        with self._lock:
+            lat = list(self._latencies)
+            return {
+                'depth': len(self._pending),
+                'max_depth': self.max_depth,
+                'coalesced': self.coalesced,
+                'written': self.written,
+                'transactions': self.transactions,
+                'latency_ms_avg': round(sum(lat) / len(lat) * 1000, 1) if lat else None,
+                'latency_ms_max': round(max(lat) * 1000, 1) if lat else None,
+            }
+
+
 def detect_backend():
     """'pcb' or 'legacy'.
 
@@ -64,23 +219,103 @@ def detect_backend():
     return 'legacy' if dlc_sensors._ADC_AVAILABLE else 'pcb'
 
 
+# Board entry keys that are not cfg sections (see board_configs).
+_BOARD_META = ('id', 'key_prefix')
+
+
+def board_configs(cfg):
+    """[(board cfg, Redis key prefix)] for every control board on the segment.
+
+    Without modbus.slaves this is the single modbus.slave board, unprefixed. With it,
+    the first entry is the primary board (unprefixed keys, as before) and every other
+    board gets key_prefix (default 'pcb<id>_'). Top-level sections an entry names
+    (wiring, initial_pwm_duty, fan_curve, pump, leak, ...) replace the shared ones.
+    """
+    slaves = (cfg.get('modbus') or {}).get('slaves')
+    if not slaves:
+        return [(cfg, '')]
+    out = []
+    for i, entry in enumerate(slaves):
+        if not isinstance(entry, dict):
+            entry = {'id': entry}
+        board = dict(cfg)
+        board.update({k: v for k, v in entry.items() if k not in _BOARD_META})
+        board['modbus'] = dict(cfg['modbus'], slave=int(entry['id']))
+        prefix = '' if i == 0 else entry.get('key_prefix', f"pcb{int(entry['id'])}_")
+        out.append((board, prefix))
+    return out
+
+
+def segment_slaves(cfg):
+    mb = cfg.get('modbus') or {}
+    slaves = mb.get('slaves')
+    if not slaves:
+        return [int(mb['slave'])]
+    return [int(e['id'] if isinstance(e, dict) else e) for e in slaves]
+
+
 class PCBDriver:
     """Modbus client + sensor read + actuator write for the control board.
 
     The serial port is a Pi UART, present regardless of PCB power, so it is opened
     once and reused; when the PCB is off, reads simply time out. The live baud/port
     is locked on the first response.
+
+    On a multi-board RS485 segment the first board's driver owns the client; the
+    others are built with owner=<that driver> and share its client and bus lock,
+    each with its own slave id, read plan, write queue and backoff.
     """
 
-    def __init__(self, cfg):
+    def __init__(self, cfg, owner=None):
         self.cfg = cfg
+        self.owner = owner
         mb = cfg['modbus']
         self.ports = mb['port'] if isinstance(mb['port'], list) else [mb['port']]
         self.bauds = mb['baud'] if isinstance(mb['baud'], list) else [mb['baud']]
         self.slave = int(mb['slave'])
-        self.cli = None          # locked ModbusSerialClient
+        # autodetect locks on any board of the segment, own id first
+        self.segment = [self.slave] + [s for s in segment_slaves(cfg) if s != self.slave]
+        self.read_gap = int(mb.get('read_gap', _DEFAULT_READ_GAP))
+        self.liveness = str(mb.get('liveness', 'probe')).lower()
+        if self.liveness not in LIVENESS_MODES:
+            log.warning("unknown modbus.liveness '%s' — using 'probe'", self.liveness)
+            self.liveness = 'probe'
+        self._cli = None         # locked ModbusSerialClient (owner only)
         self.port = None
         self.baud = None
+        self.transactions = 0    # Modbus requests issued (incl. failed), for bus accounting
+        self.bus_time_s = 0.0    # wall time spent in those requests (bus utilisation)
+        self.lock_cache = mb.get('lock_cache', _DEFAULT_LOCK_CACHE)
+        self._cached = self._load_lock_cache()
+        self.backoff_max_s = float(mb.get('probe_backoff_max_seconds', _DEFAULT_BACKOFF_MAX_S))
+        self._backoff_s = 0.0
+        self._next_probe_at = 0.0
+        # register_cache.full_map: also read IR 0 and HR 12~15 (PWM freq, DOUT) in the
+        # plan blocks they already adjoin, so the cache holds the whole register map
+        self.full_map = self._full_map(cfg)
+
+        # leak handled by leak_watch: poll() neither reads nor publishes it. leak_watch
+        # only requests the switch; the bus thread applies it (sync_read_plan)
+        self.leak_fastpath = False
+        self._leak_fastpath_wanted = False
+
+        # block read plan (rebuilt on wiring change) + image read by health_check for poll
+        self._ir_blocks = []
+        self._hr_blocks = []
+        self._image = None
+        self._build_read_plan()
+
+        # every register write goes through the queue (see flush_writes)
+        self.queue = CommandQueue()
+        # serializes bus transactions between the crawler's bus stage, the leak fast
+        # path (leak_watch.LeakWatcher) and the other boards of the segment
+        self.bus_lock = owner.bus_lock if owner is not None else threading.RLock()
+        # last value of every register read or written on the segment (CacheServer)
+        self.regcache = owner.regcache if owner is not None else register_cache.RegisterCache(self.slave)
+        # HR address -> value forced on every write while set (leak interlock); the
+        # values callers asked for meanwhile are kept and restored on release
+        self._overrides = {}
+        self._overridden = {}
 
         # sticky connection + DIN debounce state (per instance)
         self._fan_connected = set()
@@ -91,6 +326,22 @@ class PCBDriver:
         self._leak_confirmed = None
         self._level_confirmed = None
 
+    @property
+    def cli(self):
+        return self.owner.cli if self.owner is not None else self._cli
+
+    @contextlib.contextmanager
+    def _transaction(self, locked=True):
+        """Count one request and its bus time; holds the bus lock unless locked=False."""
+        lock = self.bus_lock if locked else contextlib.nullcontext()
+        with lock:
+            self.transactions += 1
+            t0 = time.monotonic()
+            try:
+                yield
+            finally:
+                self.bus_time_s += time.monotonic() - t0
+
     # ── connect / liveness ─────────────────────────────────────────
     def _make_client(self, port, baud):
         return ModbusSerialClient(
@@ -98,38 +349,145 @@ class PCBDriver:
             stopbits=1, bytesize=8, timeout=_MODBUS_TIMEOUT, retries=0,
         )
 
-    def _probe(self, cli):
-        try:
-            rr = cli.read_input_registers(IR_SYSTEM_TIMER, count=1, device_id=self.slave)
-            return rr is not None and not rr.isError()
-        except Exception:
-            return False
+    def _probe(self, cli, slave=None, locked=True):
+        """One IR 0 read on cli (autodetect probes run unlocked on their own clients)."""
+        with self._transaction(locked):
+            try:
+                slave = self.slave if slave is None else slave
+                rr = cli.read_input_registers(IR_SYSTEM_TIMER, count=1, device_id=slave)
+                if rr is None or rr.isError():
+                    return False
+                self.regcache.update(slave, register_cache.IR, IR_SYSTEM_TIMER, rr.registers)
+                return True
+            except Exception:
+                return False
 
     def health_check(self):
-        """True if alive. Locks baud/port on first response; cheap single read after."""
-        if self.cli is not None:
-            return self._probe(self.cli)   # locked; PCB may be off -> fail fast
+        """True if alive. Locks baud/port on first response.
+
+        Once locked, 'probe' liveness executes the whole read plan (IR 0 is part of
+        the IR block) and keeps the image for the following poll(), so a healthy cycle
+        costs one FC04 + one FC03 in total. 'poll' liveness is a single IR 0 read —
+        the caller only asks while the PCB is down or after a failed poll.
 
-        for port in self.ports:
-            for baud in self.bauds:
+        After a failure the next probes back off exponentially (backing_off()), so a
+        powered-down board costs no bus time on most cycles.
+        """
+        now = time.monotonic()
+        if now < self._next_probe_at:
+            return False
+        if self.owner is not None and self.cli is None:
+            return False         # the owner's health check locks the segment
+        if self.cli is not None:
+            # locked; PCB may be off -> fail fast
+            if self.liveness == 'poll':
+                alive = self._probe(self.cli)
+            else:
+                self._image = self._read_plan()
+                alive = self._image is not None
+        else:
+            alive = self._autodetect()
+        self._note_probe(alive, now)
+        return alive
+
+    def backing_off(self):
+        """True while the PCB is considered down and probes are deferred."""
+        return time.monotonic() < self._next_probe_at
+
+    def _note_probe(self, alive, now):
+        if alive:
+            if self._backoff_s:
+                log.info("PCB answered — probe backoff reset")
+            self._backoff_s = 0.0
+            self._next_probe_at = 0.0
+            return
+        self._backoff_s = min(self.backoff_max_s, self._backoff_s * 2 if self._backoff_s else 1.0)
+        self._next_probe_at = now + self._backoff_s
+        log.debug("PCB not answering — next probe in %.0fs", self._backoff_s)
+
+    def _candidates(self):
+        """{port: [baud, ...]} with the cached lock first."""
+        ports = list(self.ports)
+        order = {p: [int(b) for b in self.bauds] for p in ports}
+        cached = self._cached
+        if cached and cached.get('port') in order:
+            port, baud = cached['port'], int(cached.get('baud', 0))
+            if baud in order[port]:
+                order[port].remove(baud)
+                order[port].insert(0, baud)
+            ports.remove(port)
+            ports.insert(0, port)
+        return {p: order[p] for p in ports}
+
+    def _autodetect(self):
+        """Probe every port on its own thread (bauds in turn); the first answer locks.
+
+        A powered-down board costs one probe timeout per baud instead of one per
+        (port, baud) pair. Losing workers stop at their next baud and close their client.
+        """
+        candidates = self._candidates()
+        won = threading.Event()
+        pick = threading.Lock()
+        results = queue.Queue()
+
+        def worker(port, bauds):
+            for baud in bauds:
+                if won.is_set():
+                    break
                 cli = self._make_client(port, baud)
                 try:
-                    if cli.connect() and self._probe(cli):
-                        self.cli, self.port, self.baud = cli, port, int(baud)
-                        log.info("PCB locked on %s @ %d, slave %d", port, self.baud, self.slave)
-                        return True
+                    answered = cli.connect() and next(
+                        (s for s in self.segment if self._probe(cli, s, locked=False)), None)
+                    if answered is not None:
+                        with pick:
+                            if not won.is_set():
+                                won.set()
+                                results.put((cli, port, baud, answered))
+                                return
                 except Exception:
                     pass
                 try:
                     cli.close()
                 except Exception:
                     pass
+            results.put(None)
+
+        for port, bauds in candidates.items():
+            threading.Thread(target=worker, args=(port, bauds), name='pcb-probe', daemon=True).start()
+        for _ in candidates:
+            r = results.get()
+            if r is not None:
+                self._cli, self.port, self.baud, answered = r
+                log.info("PCB locked on %s @ %d, slave %d", self.port, self.baud, answered)
+                self._save_lock_cache()
+                # locked through another board of the segment: this one may still be off
+                return answered == self.slave or self._probe(self._cli)
         return False
 
+    def _load_lock_cache(self):
+        try:
+            with open(self.lock_cache) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_lock_cache(self):
+        entry = {'port': self.port, 'baud': self.baud, 'slave': self.slave}
+        if entry == self._cached:
+            return
+        try:
+            tmp = self.lock_cache + '.tmp'
+            with open(tmp, 'w') as f:
+                json.dump(entry, f)
+            os.replace(tmp, self.lock_cache)
+            self._cached = entry
+        except OSError as e:
+            log.warning("lock cache %s not written: %s", self.lock_cache, e)
+
     def close(self):
-        if self.cli is not None:
+        if self.owner is None and self._cli is not None:
             try:
-                self.cli.close()
+                self._cli.close()
             except Exception:
                 pass
 
@@ -137,42 +495,146 @@ class PCBDriver:
     def read_input_registers(self, address, count):
         if self.cli is None:
             return None
-        try:
-            rr = self.cli.read_input_registers(address, count=count, device_id=self.slave)
-            if rr is None or rr.isError():
+        with self._transaction():
+            try:
+                rr = self.cli.read_input_registers(address, count=count, device_id=self.slave)
+                if rr is None or rr.isError():
+                    return None
+                self.regcache.update(self.slave, register_cache.IR, address, rr.registers)
+                return rr.registers
+            except Exception:
                 return None
-            return rr.registers
-        except Exception:
-            return None
 
     def read_holding_registers(self, address, count):
         if self.cli is None:
             return None
-        try:
-            rr = self.cli.read_holding_registers(address, count=count, device_id=self.slave)
-            if rr is None or rr.isError():
+        with self._transaction():
+            try:
+                rr = self.cli.read_holding_registers(address, count=count, device_id=self.slave)
+                if rr is None or rr.isError():
+                    return None
+                self.regcache.update(self.slave, register_cache.HR, address, rr.registers)
+                return rr.registers
+            except Exception:
                 return None
-            return rr.registers
-        except Exception:
-            return None
 
-    def write_register(self, address, value):
-        if self.cli is None:
-            return False
-        try:
-            rr = self.cli.write_register(address, value, device_id=self.slave)
-            return rr is not None and not rr.isError()
-        except Exception:
-            return False
+    def write_register(self, address, value, priority=None):
+        """Queue a holding-register write; it goes out on the next flush_writes()."""
+        forced = self._overrides.get(address)
+        if forced is not None:
+            self._overridden[address] = int(value)
+            value, priority = forced, PRIO_SAFETY
+        self.queue.put(address, value, priority)
+        return True
+
+    def write_registers(self, address, values, priority=None):
+        for i, v in enumerate(values):
+            self.write_register(address + i, v, priority)
+        return True
 
-    def write_registers(self, address, values):
+    def set_overrides(self, values):
+        """Force {HR address: value} (PRIO_SAFETY) until release_overrides().
+
+        Control writes to those registers are held back meanwhile; the latest held
+        value per register is queued again on release.
+        """
+        self._overrides = {a: int(v) for a, v in values.items()}
+        for address, value in self._overrides.items():
+            self.queue.put(address, value, PRIO_SAFETY)
+
+    def release_overrides(self, fallback=None):
+        """Lift the overrides; registers nobody wrote meanwhile get fallback[addr]."""
+        released, self._overrides = self._overrides, {}
+        held, self._overridden = self._overridden, {}
+        for address in released:
+            value = held.get(address, (fallback or {}).get(address))
+            if value is not None:
+                self.queue.put(address, value)
+
+    def _write_now(self, address, values):
+        """One FC06 (single register) or FC16 (run) on the bus."""
         if self.cli is None:
             return False
-        try:
-            rr = self.cli.write_registers(address, values, device_id=self.slave)
-            return rr is not None and not rr.isError()
-        except Exception:
-            return False
+        with self._transaction():
+            try:
+                if len(values) == 1:
+                    rr = self.cli.write_register(address, values[0], device_id=self.slave)
+                else:
+                    rr = self.cli.write_registers(address, values, device_id=self.slave)
+                if rr is None or rr.isError():
+                    return False
+                self.regcache.update(self.slave, register_cache.HR, address, values)
+                return True
+            except Exception:
+                return False
+
+    def flush_writes(self):
+        """Drain the command queue: safety writes first, adjacent registers as FC16.
+
+        Stops at the first failed write (PCB likely off — one timeout, not one per run);
+        the rest stays queued for the next flush unless superseded. True if drained.
+        """
+        with self.bus_lock:
+            for prio, start, values in self.queue.runs():
+                if not self._write_now(start, values):
+                    log.warning("queued write failed: HR %d..%d = %s (prio %d), %d still pending",
+                                start, start + len(values) - 1, values, prio, self.queue.depth())
+                    return False
+                self.queue.done(start, values)
+        return True
+
+    # ── block read plan ────────────────────────────────────────────
+    def _needed_registers(self):
+        """(IR set, HR set) the current wiring actually decodes."""
+        wiring = self.cfg.get('wiring', {}) or {}
+        # IR 0 is only needed when the plan doubles as the health check (or for the cache)
+        ir = {IR_SYSTEM_TIMER} if self.liveness == 'probe' or self.full_map else set()
+        for ch in (wiring.get('ntc', {}) or {}).values():
+            if ch is not None and 13 <= ch <= 16:
+                ir.add(IR_NTC_TEMP_BASE + (ch - 13))
+        if (wiring.get('din', {}) or {}).get('level_bit') is not None:
+            ir.add(IR_DIN_BITMASK)
+        leak_ch = (wiring.get('ain', {}) or {}).get('leak_ch')
+        if leak_ch is not None and 1 <= leak_ch <= 8 and not self.leak_fastpath:
+            ir.add(IR_VOLTAGE_BASE + (leak_ch - 1))
+        # fan tach CH5~12 is published for every slot, independent of wiring
+        ir.update(IR_PULSE_FREQ_BASE + (ch - 1) for ch in range(5, 13))
+        hr = {hr_pwm_duty(ch) for ch in range(1, 13)}
+        if self.full_map:
+            hr.update((HR_PWM_FREQ_TIM1, HR_PWM_FREQ_TIM2, HR_PWM_FREQ_TIM8, HR_DOUT_BITMASK))
+        return ir, hr
+
+    @staticmethod
+    def _full_map(cfg):
+        rc = cfg.get('register_cache') or {}
+        return bool(rc.get('enabled', False) and rc.get('full_map', False))
+
+    def _build_read_plan(self):
+        ir, hr = self._needed_registers()
+        self._ir_blocks = plan_blocks(ir, self.read_gap)
+        self._hr_blocks = plan_blocks(hr, self.read_gap)
+        self._image = None
+        log.info("read plan: FC04 %s, FC03 %s", self._ir_blocks, self._hr_blocks)
+
+    def _read_plan(self):
+        """Execute the block plan -> RegisterImage, or None if any block read failed.
+
+        Queued writes go out first, so reads never delay a pump/fan command and the
+        duty readback already reflects it.
+        """
+        self.flush_writes()
+        image = RegisterImage()
+        for start, count in self._ir_blocks:
+            regs = self.read_input_registers(start, count)
+            if regs is None:
+                return None
+            image.ir.update(zip(range(start, start + count), regs))
+        for start, count in self._hr_blocks:
+            regs = self.read_holding_registers(start, count)
+            if regs is None:
+                return None
+            image.hr.update(zip(range(start, start + count), regs))
+        return image
 
     # ── initial state ──────────────────────────────────────────────
     def apply_pwm_freq(self):
@@ -225,6 +687,7 @@ class PCBDriver:
 
     def on_connect(self, rd):
         """Run once on a PCB down->up transition: re-apply state + reset comm status."""
+        self._image = None   # duties are rewritten below; poll must read them back fresh
         self.apply_pwm_freq()
         self.apply_initial_state()
         rd.set(K.COMM_STATUS, 'ok')
@@ -233,23 +696,40 @@ class PCBDriver:
     def set_config(self, cfg):
         """Apply a hot-reloaded cfg (modbus section is not changed at runtime)."""
         self.cfg = cfg
+        self.full_map = self._full_map(cfg)
+        self._build_read_plan()
+
+    def request_leak_fastpath(self, enabled):
+        """leak_watch thread: take the leak input out of (True) / back into the read
+        plan. Applied by sync_read_plan() on the bus thread, never during a poll."""
+        self._leak_fastpath_wanted = enabled
+
+    def sync_read_plan(self):
+        """Bus thread, before the cycle's reads: apply a requested leak fast-path switch."""
+        if self._leak_fastpath_wanted != self.leak_fastpath:
+            self.leak_fastpath = self._leak_fastpath_wanted
+            self._build_read_plan()
 
     # ── sensor poll ────────────────────────────────────────────────
     def poll(self, rd):
         """One cycle: coolant_*, leak, level, flow, fan_rpm, pwm_duty.
 
         Air temp/humidity are Pi-attached, not on the PCB, so they are not handled
-        here. Returns True if every PCB read succeeded.
+        here. Decodes the image health_check() just read, or executes the read plan
+        itself. Returns True if every PCB read succeeded.
         """
+        image, self._image = self._image, None
+        if image is None:
+            image = self._read_plan()
+            if image is None:
+                return False
+
         cfg = self.cfg
         wiring = cfg.get('wiring', {}) or {}
         pump_cfg = cfg.get('pump', {}) or {}
         pipe = rd.pipeline(transaction=False)
 
         # NTC (IR 28~31). -999 sentinel = disconnected -> delete the key.
-        ntcs = self.read_input_registers(IR_NTC_TEMP_BASE, 4)
-        if ntcs is None:
-            return False
         ntc_map = wiring.get('ntc', {}) or {}
         ntc_values = {}
         for logical, ch in ntc_map.items():
@@ -261,7 +741,7 @@ class PCBDriver:
             rkey = K.NTC_LOGICAL_TO_KEY.get(logical)
             if rkey is None:
                 continue
-            signed = s16(ntcs[idx])
+            signed = s16(image.ir[IR_NTC_TEMP_BASE + idx])
             if signed == NTC_DISCONNECT_SENTINEL:
                 pipe.delete(rkey)
                 ntc_values[logical] = None
@@ -282,34 +762,26 @@ class PCBDriver:
         self._delta_t(pipe, ntc_values, 'inlet2', 'outlet2', K.COOLANT_DELTA_T2)
 
         # Level: DIN bit (IR 25), N-of-M debounced
-        din_regs = self.read_input_registers(IR_DIN_BITMASK, 1)
-        if din_regs is None:
-            return False
-        bits = din_regs[0]
         din_map = wiring.get('din', {}) or {}
         level_bit = din_map.get('level_bit')
         if level_bit is not None:
+            bits = image.ir[IR_DIN_BITMASK]
             raw = 1 if (bits >> level_bit) & 1 else 0
             self._level_confirmed = self._debounce(self._level_history, raw, self._level_confirmed)
             pipe.set(K.COOLANT_LEVEL, self._level_confirmed)
 
-        # Leak: AIN voltage (IR 32~39, 0.01V), threshold + debounce
+        # Leak: AIN voltage (IR 32~39, 0.01V), threshold + debounce. With the fast path
+        # on, leak_watch samples and publishes it instead.
         ain_map = wiring.get('ain', {}) or {}
         leak_ch = ain_map.get('leak_ch')
-        if leak_ch is not None and 1 <= leak_ch <= 8:
-            voltages = self.read_input_registers(IR_VOLTAGE_BASE, 8)
-            if voltages is None:
-                return False
-            v_reg = voltages[leak_ch - 1]
+        if leak_ch is not None and 1 <= leak_ch <= 8 and not self.leak_fastpath:
+            v_reg = image.ir[IR_VOLTAGE_BASE + (leak_ch - 1)]
             threshold_reg = int(float(ain_map.get('leak_threshold_v', 5.0)) * 100)
             raw = 1 if v_reg < threshold_reg else 0
             self._leak_confirmed = self._debounce(self._leak_history, raw, self._leak_confirmed)
             pipe.set(K.COOLANT_LEAK, self._leak_confirmed)
 
         # Pulse freq (IR 13~24) -> sticky pump/fan connection detection
-        pulses = self.read_input_registers(IR_PULSE_FREQ_BASE, 12)
-        if pulses is None:
-            return False
         pwm_map = wiring.get('pwm', {}) or {}
         pump_pwm_chs = pwm_map.get('pump_ch') or []
 
@@ -317,29 +789,31 @@ class PCBDriver:
         # Publish fan RPM for every fan slot CH5~12 by PHYSICAL index (fan_rpm_0~7), so it
         # lines up with the per-channel PWM duty. Sticky: a slot is "connected" once it
         # ever shows pulses; slots with no tach read 0 and the key is deleted.
+        pulses = {ch: image.ir[IR_PULSE_FREQ_BASE + (ch - 1)] for ch in range(5, 13)}
         for ch in range(5, 13):
-            if pulses[ch - 1] > 0:
+            if pulses[ch] > 0:
                 self._fan_connected.add(ch - 5)
 
         # Fan RPM for connected slots only (2 pulses/rev -> RPM = Hz * 30).
         for ch in range(5, 13):
             i = ch - 5
             if i in self._fan_connected:
-                pipe.set(K.fan_rpm(i), pulses[ch - 1] * 30)
+                pipe.set(K.fan_rpm(i), pulses[ch] * 30)
             else:
                 pipe.delete(K.fan_rpm(i))
+        _replace_index(pipe, K.INDEX_FAN_RPM, [K.fan_rpm(i) for i in sorted(self._fan_connected)])
 
         # PWM duty readback (HR 0~11): published as-is for EVERY physical channel,
         # independent of tach (duty and tach are separate). pump CH1~4 -> pwm_duty_pump_0~3,
         # fan CH5~12 -> pwm_duty_fan_0~7. This includes fixed channels (e.g. CH10 RPi fan
         # @100%) that the fan curve never touches, so the UI can show them too.
-        duties = self.read_holding_registers(HR_PWM_DUTY_BASE, 12)
-        if duties is None:
-            return False
+        duties = [image.hr[hr_pwm_duty(ch)] for ch in range(1, 13)]
         for ch in range(1, 5):
             pipe.set(K.pwm_duty_pump(ch - 1), duties[ch - 1])
         for ch in range(5, 13):
             pipe.set(K.pwm_duty_fan(ch - 5), duties[ch - 1])
+        _replace_index(pipe, K.INDEX_PWM_DUTY_PUMP, [K.pwm_duty_pump(i) for i in range(4)])
+        _replace_index(pipe, K.INDEX_PWM_DUTY_FAN, [K.pwm_duty_fan(i) for i in range(8)])
 
         # Pump flow estimate (no flow sensor): from mean wired-pump commanded duty
         wired_pump_duties = [
@@ -0,0 +1,307 @@
+"""Per-cycle Redis batch for data_crawler — one MGET in, one pipeline out.
+
+A CycleBatch is created at the start of every crawler cycle. It prefetches the keys
+the cycle will read (control_mode, host_ttl, fan-curve input, manual PWM targets) in a
+single MGET, collects every SET/DELETE the stages issue, and commits them in one
+non-transactional pipeline at the end of the cycle.
+
+It quacks like the subset of redis.StrictRedis the stages use (get/set/delete/exists,
+sadd, pipeline() returning itself, execute() as a no-op), so PCBDriver.poll, the fan
+controller, manual PWM and dlc_sensors.* work unchanged when handed a batch. Reads
+see the cycle's own pending writes first (the fan curve reads the outlet temperature
+poll() just decoded). Writes arriving after commit() — a stage that overran its
+deadline — go straight to Redis (key writes with the pi_generation INCR) instead of
+being lost.
+
+With a ChangePublisher attached, commit() only sends keys whose value changed since
+the last write (plus a full refresh every N cycles / on demand) and records the change
+time per key in the last_changed hash. A commit in which a key changed also INCRs
+pi_generation in the same pipeline; the hashes (crawler_timing, last_changed) and the
+periodic refresh of unchanged keys do not. A SET built in the cycle (DEL + SADD, the
+key-family indexes) is one value to the filter: it is re-sent as DEL + SADD only when
+its members change.
+"""
+import logging
+import threading
+import time
+
+import redis_keys as K
+
+log = logging.getLogger('redis_batch')
+
+_DELETE = object()
+_MISSING = object()
+
+
+class _Members(tuple):
+    """Pending SET value (sorted members); str() is stable for the change filter."""
+
+
+class ChangePublisher:
+    """Cross-cycle change filter for CycleBatch.commit().
+
+    Remembers the last value written per key (as the string Redis stores) and drops
+    writes that would not change it. Every refresh_every commits — and on the next
+    commit after force_refresh() (PCB reconnect, failed commit) — everything is
+    written anyway, so TTL/staleness-based consumers and a restarted Redis still see
+    every key. Writes carrying an expiry always go through (they would lapse).
+    """
+
+    def __init__(self, refresh_every=30):
+        self.refresh_every = max(1, int(refresh_every))
+        self._last = {}
+        self._since_refresh = 0
+        self._force = True
+        self.suppressed = 0     # writes dropped by the last filter() call
+
+    def force_refresh(self):
+        self._force = True
+
+    def filter(self, writes):
+        """writes -> (writes to send, {key: change time ms} for keys that changed)."""
+        self._since_refresh += 1
+        refresh = self._force or self._since_refresh >= self.refresh_every
+        if refresh:
+            self._force = False
+            self._since_refresh = 0
+        now_ms = int(time.time() * 1000)
+        out, changed = {}, {}
+        for key, w in writes.items():
+            v = None if w is _DELETE else str(w[0])
+            if self._last.get(key, _MISSING) != v:
+                changed[key] = now_ms
+                out[key] = w
+            elif refresh or (w is not _DELETE and w[1] is not None):
+                out[key] = w
+            self._last[key] = v
+        self.suppressed = len(writes) - len(out)
+        return out, changed
+
+
+class CycleBatch:
+
+    def __init__(self, rd, prefetch_keys=(), publisher=None, known=None):
+        """known: values the caller already holds (event-fed), served like prefetched ones."""
+        self.rd = rd
+        self.publisher = publisher
+        self._lock = threading.Lock()
+        self._writes = {}           # key -> (value, ex) | _DELETE, last write wins
+        self._hashes = {}           # name -> {field: value}, always sent (no change filter)
+        self._committed = False
+        self.round_trips = 0
+        keys = list(prefetch_keys)
+        self._reads = dict(known or {})
+        if keys:
+            self.round_trips += 1
+            try:
+                self._reads.update(zip(keys, rd.mget(keys)))
+            except Exception as e:
+                # Redis down/restarting: reads fall back to live GETs (which fail inside
+                # the stages' own error handling, as before batching).
+                log.warning("cycle prefetch failed: %s", e)
+
+    # ── reads ──────────────────────────────────────────────────────
+    def get(self, key):
+        with self._lock:
+            w = self._writes.get(key)
+            if w is not None:
+                return None if w is _DELETE else w[0]
+            if key in self._reads:
+                return self._reads[key]
+        log.debug("cycle batch: %s not prefetched — extra GET", key)
+        self.round_trips += 1
+        return self.rd.get(key)
+
+    def mget(self, keys):
+        """Pending writes / prefetched values; one live MGET for any key not covered."""
+        keys = list(keys)
+        out = {}
+        with self._lock:
+            for key in keys:
+                w = self._writes.get(key)
+                if w is not None:
+                    out[key] = None if w is _DELETE else w[0]
+                elif key in self._reads:
+                    out[key] = self._reads[key]
+        missing = [k for k in keys if k not in out]
+        if missing:
+            log.debug("cycle batch: %s not prefetched — extra MGET", missing)
+            self.round_trips += 1
+            out.update(zip(missing, self.rd.mget(missing)))
+        return [out[k] for k in keys]
+
+    def exists(self, key):
+        return 1 if self.get(key) is not None else 0
+
+    def pending(self, keys):
+        """{key: value} of the cycle's pending SETs among keys (the history snapshot)."""
+        with self._lock:
+            out = {}
+            for key in keys:
+                w = self._writes.get(key)
+                if w is not None and w is not _DELETE:
+                    out[key] = w[0]
+            return out
+
+    def absorb(self, older):
+        """Take over an uncommitted older batch (its publish was skipped): its writes
+        and hash fields go out with this commit unless this cycle rewrote them, and
+        writes still arriving at it (an overrunning stage) go straight to Redis."""
+        with older._lock:
+            writes, older._writes = older._writes, {}
+            hashes, older._hashes = older._hashes, {}
+            older._committed = True
+        with self._lock:
+            for key, w in writes.items():
+                self._writes.setdefault(key, w)
+            for name, mapping in hashes.items():
+                self._hashes[name] = dict(mapping, **self._hashes.get(name, {}))
+
+    # ── writes ─────────────────────────────────────────────────────
+    def set(self, key, value, ex=None):
+        with self._lock:
+            if not self._committed:
+                self._writes[key] = (value, ex)
+                return self
+        self._direct(lambda pipe: pipe.set(key, value, ex=ex))
+        return self
+
+    def delete(self, *keys):
+        with self._lock:
+            if not self._committed:
+                for key in keys:
+                    self._writes[key] = _DELETE
+                return self
+        self._direct(lambda pipe: pipe.delete(*keys))
+        return self
+
+    def sadd(self, name, *members):
+        with self._lock:
+            if not self._committed:
+                w = self._writes.get(name)
+                base = w[0] if w is not None and w is not _DELETE and isinstance(w[0], _Members) else ()
+                self._writes[name] = (_Members(sorted(set(base) | set(members))), None)
+                return self
+        self._direct(lambda pipe: pipe.sadd(name, *members))
+        return self
+
+    def hset(self, name, mapping):
+        with self._lock:
+            if not self._committed:
+                self._hashes.setdefault(name, {}).update(mapping)
+                return self
+        self._direct(lambda pipe: pipe.hset(name, mapping=mapping), sensor=False)
+        return self
+
+    def _direct(self, write, sensor=True):
+        """A write after commit() (overrunning stage): straight to Redis, a key write
+        with the pi_generation INCR so the exporter does not keep serving the older values."""
+        pipe = self.rd.pipeline(transaction=False)
+        write(pipe)
+        if sensor:
+            pipe.incr(K.PI_GENERATION)
+        self.round_trips += 1
+        pipe.execute()
+
+    # pipeline-compatible surface (PCBDriver.poll / poll_coolant build "pipelines")
+    def pipeline(self, transaction=False):
+        return self
+
+    def execute(self):
+        return []
+
+    # ── commit ─────────────────────────────────────────────────────
+    def commit(self):
+        """Flush pending writes (changed ones only, with a publisher) in one pipeline;
+        later writes go direct."""
+        with self._lock:
+            writes, self._writes = self._writes, {}
+            hashes, self._hashes = self._hashes, {}
+            self._committed = True
+        if self.publisher is not None:
+            writes, changed = self.publisher.filter(writes)
+        else:
+            changed = dict.fromkeys(writes)
+        if not writes and not hashes:
+            return
+        pipe = self.rd.pipeline(transaction=False)
+        for key, w in writes.items():
+            if w is _DELETE:
+                pipe.delete(key)
+            elif isinstance(w[0], _Members):
+                pipe.delete(key)
+                pipe.sadd(key, *w[0])
+            else:
+                value, ex = w
+                pipe.set(key, value, ex=ex)
+        if changed and self.publisher is not None:
+            pipe.hset(K.LAST_CHANGED, mapping=changed)
+        for name, mapping in hashes.items():
+            pipe.hset(name, mapping=mapping)
+        if changed:
+            pipe.incr(K.PI_GENERATION)   # timing / diagnostic hashes alone leave it
+        self.round_trips += 1
+        try:
+            pipe.execute()
+        except Exception:
+            if self.publisher is not None:
+                self.publisher.force_refresh()   # the filter's view of Redis is now unknown
+            raise
+
+
+class KeyPrefix:
+    """Key-prefixed view of a CycleBatch / redis client for a secondary PCB board.
+
+    Every key gets `prefix` except the `shared` ones (control_mode, host liveness) and
+    those starting with a `shared_prefixes` entry (host gpu_/cpu_ keys a fan zone may
+    follow), so PCBDriver.poll, the fan controller and manual PWM write and read the
+    board's own keys unchanged. pipeline() returns a prefixed view of the underlying
+    pipeline.
+    """
+
+    def __init__(self, rd, prefix, shared=(), shared_prefixes=()):
+        self.rd = rd
+        self.prefix = prefix
+        self.shared = frozenset(shared)
+        self.shared_prefixes = tuple(shared_prefixes)
+
+    def key(self, key):
+        if key in self.shared or key.startswith(self.shared_prefixes):
+            return key
+        return self.prefix + key
+
+    def get(self, key):
+        return self.rd.get(self.key(key))
+
+    def mget(self, keys):
+        return self.rd.mget([self.key(k) for k in keys])
+
+    def exists(self, key):
+        return self.rd.exists(self.key(key))
+
+    def set(self, key, value, ex=None):
+        self.rd.set(self.key(key), value, ex=ex)
+        return self
+
+    def delete(self, *keys):
+        self.rd.delete(*[self.key(k) for k in keys])
+        return self
+
+    def sadd(self, name, *members):
+        # index SETs hold key names, which are the board's own keys too
+        self.rd.sadd(self.key(name), *[self.key(m) for m in members])
+        return self
+
+    def hset(self, name, mapping):
+        self.rd.hset(self.key(name), mapping=mapping)
+        return self
+
+    def publish(self, channel, message):
+        return self.rd.publish(channel, message)
+
+    def pipeline(self, transaction=False):
+        return KeyPrefix(self.rd.pipeline(transaction=transaction), self.prefix, self.shared,
+                         self.shared_prefixes)
+
+    def execute(self):
+        return self.rd.execute()
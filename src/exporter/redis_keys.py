@@ -18,6 +18,11 @@ AIR_HUMIT            = 'air_humit'
 CHASSIS_STABIL       = 'chassis_stabil'
 HOST_STAT            = 'host_stat'
 
+# Gyro window stats next to chassis_stabil (dg5w, with GADGETINI_GYRO_STATS=1): largest
+# sample-to-sample jump and RMS deviation over the cycle, both in deg/s.
+CHASSIS_GYRO_PEAK    = 'chassis_gyro_peak_delta'
+CHASSIS_GYRO_RMS     = 'chassis_gyro_rms'
+
 NTC_LOGICAL_TO_KEY = {
     'inlet1':  COOLANT_TEMP_INLET1,
     'outlet1': COOLANT_TEMP_OUTLET1,
@@ -41,6 +46,18 @@ def pwm_duty_pump(idx):
 def pwm_duty_fan(idx):
     return f'pwm_duty_fan_{idx}'
 
+# Key-family indexes: SETs of the member key names currently published, replaced by
+# the writer in the same pipeline as the values, so readers discover a family with
+# SMEMBERS (O(family)) instead of KEYS (O(keyspace), blocks Redis).
+# PCBDriver.poll: fan_rpm_*, pwm_duty_pump_*, pwm_duty_fan_*.
+# data_crawler_host (host side, literal names): index_nic_stat, index_nvme_temp.
+INDEX_FAN_RPM       = 'index_fan_rpm'
+INDEX_PWM_DUTY_PUMP = 'index_pwm_duty_pump'
+INDEX_PWM_DUTY_FAN  = 'index_pwm_duty_fan'
+# Key prefixes of the secondary boards on a multi-board segment (pcb2_, ...), each
+# with its own <prefix>index_* SETs; absent with a single board.
+INDEX_BOARDS        = 'index_boards'
+
 # Manual PWM target (intended duty per channel, user-controlled in manual mode)
 # 0-based index; same physical-channel convention as pwm_duty_*.
 # Written by web UI (manual mode) or mode switch, read by data_crawler._apply_manual_pwm.
@@ -50,6 +67,33 @@ def manual_pwm_target_pump(idx):
 def manual_pwm_target_fan(idx):
     return f'manual_pwm_target_fan_{idx}'
 
+# Hash: key -> epoch ms of the last cycle its value changed (data_crawler change-only
+# publishing; unchanged keys are re-written only on the periodic refresh).
+LAST_CHANGED = 'last_changed'
+
+# Generation counters: INCR'd by each writer in the same pipeline as its writes (Pi:
+# every CycleBatch commit in which a sensor key changed — not the crawler_timing /
+# last_changed hashes alone — and every leak event; host: every data_crawler_host pass
+# whose values changed), so sensor_exporter can reuse its last scrape while both
+# are unchanged.
+PI_GENERATION   = 'pi_generation'
+HOST_GENERATION = 'host_generation'
+
+# Hash: data_crawler stage timing histograms (acquisition.StageTimings.snapshot()).
+# field per step -> JSON {"counts": per-bucket (+Inf last), "sum": s, "count": n};
+# "le" -> JSON bucket bounds (s); "cycles" / "overruns" -> totals since start;
+# "write_queue" (primary board) / "write_queue_pcb<id>" -> JSON PCBDriver write queue
+# stats (CommandQueue.stats(): depth, max_depth, coalesced, written, transactions,
+# latency_ms_avg/max over the recent writes); "bus_utilisation" -> % of wall time inside
+# Modbus requests over the last cycles (RS485 segment load, PCB path), "bus_boards_fit"
+# -> how many boards with the current per-board cost fit at 80 %.
+CRAWLER_TIMING = 'crawler_timing'
+
+# Pub/sub channel (not a key): leak_watch publishes every confirmed coolant_leak
+# transition as JSON {"leak": 0/1, "key": leak key, "t_raw": epoch s, "t_pub": epoch s}
+# (key is pcb<id>_coolant_leak for a secondary board on a multi-board segment).
+LEAK_EVENTS = 'leak_events'
+
 # Comm status (PCB path only — from health check / poll results).
 COMM_STATUS               = 'comm_status'
 COMM_CONSECUTIVE_FAILURES = 'comm_consecutive_failures'
@@ -0,0 +1,184 @@
+"""PCB register cache — last value + read time of every register the crawler touches.
+
+Only data_crawler talks to the PCB. PCBDriver records every successful block read,
+probe and write here (one cache per RS485 segment, keyed by slave id), and
+CacheServer serves it read-only over Modbus TCP on localhost, so diagnostics and the
+web UI can read any PCB register (system timer, DOUT mask, PWM frequencies, ...)
+without opening the serial port or adding RS485 traffic:
+
+  FC04 IR n / FC03 HR n      cached value; unit id = slave id (0/255 = primary board)
+  FC04 IR 10000+n            age of IR n in 0.1 s (65535 = never read)
+  FC04 IR 20000+n            age of HR n in 0.1 s
+
+A register that was never read answers exception 02; one older than max_age_seconds
+(PCB off, bus backing off) answers 0B (gateway target failed to respond), so a
+reader never mistakes a stale image for a live one. Writes (FC06/16) answer 01:
+actuators stay on the Redis control path (manual_pwm_*, control_mode).
+
+    mbpoll -m tcp -p 5020 -a 1 -t 3 -r 1 -c 4 127.0.0.1        # IR 0~3
+
+The framing is a small MBAP server rather than pymodbus.server, whose datastore API
+is being replaced (see test/pcb_emulator.py).
+"""
+import logging
+import socketserver
+import struct
+import threading
+import time
+
+log = logging.getLogger('register_cache')
+
+IR, HR = 'ir', 'hr'
+
+AGE_IR_BASE = 10000
+AGE_HR_BASE = 20000
+_AGE_NEVER = 0xFFFF
+
+_DEFAULT_PORT = 5020
+_DEFAULT_MAX_AGE_S = 5.0
+_MAX_READ = 125
+
+
+class RegisterCache:
+    """{(slave, table, address): (value, monotonic read time)}, thread-safe."""
+
+    def __init__(self, primary=None):
+        self._lock = threading.Lock()
+        self._regs = {}
+        self.primary = primary     # slave answering unit id 0/255
+        self.updates = 0
+
+    def update(self, slave, table, address, values, now=None):
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for i, v in enumerate(values):
+                self._regs[(slave, table, address + i)] = (int(v), now)
+            self.updates += 1
+
+    def read(self, slave, table, address, count):
+        """[(value, read time) or None] for address .. address+count-1."""
+        with self._lock:
+            return [self._regs.get((slave, table, a)) for a in range(address, address + count)]
+
+    def snapshot(self, slave=None):
+        """{slave: {table: {address: (value, age s)}}} — for logs and ad-hoc tools."""
+        now = time.monotonic()
+        out = {}
+        with self._lock:
+            for (s, table, a), (v, t) in self._regs.items():
+                if slave is None or s == slave:
+                    out.setdefault(s, {}).setdefault(table, {})[a] = (v, round(now - t, 1))
+        return out
+
+
+# ── Modbus TCP server ──────────────────────────────────────────────
+class _Handler(socketserver.BaseRequestHandler):
+
+    def handle(self):
+        sock = self.request
+        while True:
+            head = _recv_exact(sock, 7)
+            if head is None:
+                return
+            tid, pid, length, unit = struct.unpack('>HHHB', head)
+            pdu = _recv_exact(sock, length - 1) if length > 1 else b''
+            if pdu is None or pid != 0:
+                return
+            reply = self.server.owner.respond(unit, pdu)
+            sock.sendall(struct.pack('>HHHB', tid, 0, len(reply) + 1, unit) + reply)
+
+
+def _recv_exact(sock, n):
+    buf = b''
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class CacheServer:
+    """Read-only Modbus TCP view of a RegisterCache (register_cache section of pcb_config)."""
+
+    def __init__(self, cache, host='127.0.0.1', port=_DEFAULT_PORT, max_age_s=_DEFAULT_MAX_AGE_S):
+        self.cache = cache
+        self.host = host
+        self.port = int(port)
+        self.max_age_s = float(max_age_s)
+        self.requests = 0
+        self._server = None
+
+    @classmethod
+    def from_config(cls, cache, cfg):
+        """Server for cfg['register_cache'], or None when it is disabled."""
+        rc = cfg.get('register_cache', {}) or {}
+        if not rc.get('enabled', False):
+            return None
+        return cls(cache, rc.get('host', '127.0.0.1'), rc.get('port', _DEFAULT_PORT),
+                   rc.get('max_age_seconds', _DEFAULT_MAX_AGE_S))
+
+    def start(self):
+        try:
+            self._server = _TCPServer((self.host, self.port), _Handler)
+        except OSError as e:
+            log.warning("register cache server not started on %s:%d: %s", self.host, self.port, e)
+            return self
+        self._server.owner = self
+        self.port = self._server.server_address[1]     # port 0 = any free port
+        threading.Thread(target=self._server.serve_forever, name='register-cache', daemon=True).start()
+        log.info("register cache served on %s:%d (Modbus TCP, read-only)", self.host, self.port)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def respond(self, unit, pdu):
+        """Response PDU for one request PDU."""
+        self.requests += 1
+        if not pdu:
+            return b'\x80\x01'
+        fc = pdu[0]
+
+        def exc(code):
+            return bytes([0x80 | fc, code])
+
+        if fc not in (3, 4):
+            return exc(1)
+        if len(pdu) < 5:
+            return exc(3)
+        address, count = struct.unpack('>HH', pdu[1:5])
+        if not 1 <= count <= _MAX_READ:
+            return exc(3)
+        slave = self.cache.primary if unit in (0, 255) else unit
+        if fc == 4 and address >= AGE_IR_BASE:
+            values = self._ages(slave, address, count)
+            if values is None:
+                return exc(2)
+        else:
+            entries = self.cache.read(slave, IR if fc == 4 else HR, address, count)
+            if any(e is None for e in entries):
+                return exc(2)
+            now = time.monotonic()
+            if any(now - t > self.max_age_s for _, t in entries):
+                return exc(0x0B)
+            values = [v for v, _ in entries]
+        return bytes([fc, 2 * count]) + struct.pack(f'>{count}H', *values)
+
+    def _ages(self, slave, address, count):
+        if AGE_IR_BASE <= address and address + count <= AGE_HR_BASE:
+            table, base = IR, AGE_IR_BASE
+        elif AGE_HR_BASE <= address and address + count <= AGE_HR_BASE + AGE_IR_BASE:
+            table, base = HR, AGE_HR_BASE
+        else:
+            return None
+        now = time.monotonic()
+        return [_AGE_NEVER if e is None else min(_AGE_NEVER - 1, int((now - e[1]) * 10))
+                for e in self.cache.read(slave, table, address - base, count)]
@@ -0,0 +1,239 @@
+"""Short-term full-resolution history — a fixed-size, memory-mapped ring file.
+
+Redis holds only the latest value per key. data_crawler appends every cycle's
+snapshot here (RingWriter, publish stage), so the display, sensor_exporter and
+diagnostics can read the last hours at 1 Hz straight from the page cache
+(RingReader, numpy.memmap) without a Redis round trip per point.
+
+Layout (little-endian), struct-of-arrays so one key's window is one contiguous slice:
+
+  0     8s   magic b'DLCRING1'
+  8     u32  version (1)
+  12    u32  capacity (rows)
+  16    u32  column count
+  20    u32  period (ms, nominal)
+  24    u64  rows ever written — row i lives at i % capacity; bumped after the row
+  32    f64  file created (epoch s)
+  40    u32  data offset
+  44    u32  names length, then the column names as JSON
+  data  f64[capacity] epoch timestamps, then f32[capacity] per column (NaN = no value)
+
+The writer is stdlib mmap + struct (numpy is only needed to read). A file whose
+columns/capacity no longer match is replaced with os.replace, so a reader holding
+the old map keeps a consistent (frozen) file and picks up the new one on reopen().
+The default path is tmpfs (/dev/shm): no SD card wear, gone after a reboot.
+
+    python3 ring_store.py [path] [--tail 10] [--keys coolant_temp_outlet1,air_temp]
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import time
+
+import redis_keys as K
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+log = logging.getLogger('ring_store')
+
+MAGIC = b'DLCRING1'
+VERSION = 1
+_HEADER = struct.Struct('<8sIIII')
+_COUNT_OFF = 24
+_CREATED_OFF = 32
+_LAYOUT_OFF = 40
+_PAGE = 4096
+
+DEFAULT_PATH = '/dev/shm/dlc_history.ring'
+DEFAULT_SECONDS = 6 * 3600
+
+# Numeric keys data_crawler publishes (both backends); history.extra_keys adds more
+# (e.g. a secondary board's pcb2_coolant_temp_outlet1).
+DEFAULT_KEYS = (
+    [K.COOLANT_TEMP_INLET1, K.COOLANT_TEMP_OUTLET1, K.COOLANT_TEMP_INLET2, K.COOLANT_TEMP_OUTLET2,
+     K.COOLANT_DELTA_T1, K.COOLANT_DELTA_T2, K.COOLANT_LEAK, K.COOLANT_LEVEL, K.COOLANT_FLOW_LPM,
+     K.AIR_TEMP, K.AIR_HUMIT, K.CHASSIS_STABIL, K.HOST_STAT, K.COMM_CONSECUTIVE_FAILURES]
+    + [K.fan_rpm(i) for i in range(8)]
+    + [K.pwm_duty_pump(i) for i in range(4)]
+    + [K.pwm_duty_fan(i) for i in range(8)]
+)
+
+
+def _layout(capacity, names):
+    blob = json.dumps(list(names)).encode()
+    data_off = -(-(48 + len(blob)) // _PAGE) * _PAGE
+    size = data_off + capacity * 8 + capacity * 4 * len(names)
+    return blob, data_off, size
+
+
+def _read_header(buf):
+    magic, version, capacity, ncols, period_ms = _HEADER.unpack_from(buf, 0)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("not a DLCRING1 file")
+    data_off, names_len = struct.unpack_from('<II', buf, _LAYOUT_OFF)
+    names = json.loads(bytes(buf[48:48 + names_len]))
+    return capacity, period_ms, data_off, names
+
+
+class RingWriter:
+    """Appends one row per cycle; reuses an existing file with the same layout."""
+
+    def __init__(self, path, keys, capacity, period_s=1.0):
+        self.path = path
+        self.keys = list(dict.fromkeys(keys))
+        self.capacity = int(capacity)
+        self.period_ms = int(round(period_s * 1000))
+        self.sources = {}          # key -> callable, for values published outside the batch
+        self._open()
+
+    @classmethod
+    def from_config(cls, cfg, period_s):
+        """Writer for cfg['history'] (defaults when absent), or None when disabled."""
+        h = cfg.get('history', {}) or {}
+        if not h.get('enabled', True):
+            return None
+        keys = DEFAULT_KEYS + list(h.get('extra_keys') or [])
+        capacity = int(float(h.get('seconds', DEFAULT_SECONDS)) / max(period_s, 0.01))
+        try:
+            return cls(h.get('path', DEFAULT_PATH), keys, capacity, period_s)
+        except (OSError, ValueError) as e:
+            log.warning("history ring not opened: %s", e)
+            return None
+
+    def _open(self):
+        blob, self._data_off, size = _layout(self.capacity, self.keys)
+        reuse = False
+        try:
+            with open(self.path, 'rb') as f:
+                head = f.read(self._data_off)
+            capacity, period_ms, data_off, names = _read_header(head)
+            reuse = (capacity, period_ms, data_off, names) == (
+                self.capacity, self.period_ms, self._data_off, self.keys) and os.path.getsize(self.path) == size
+        except (OSError, ValueError, struct.error):
+            pass
+        if not reuse:
+            tmp = self.path + '.tmp'
+            with open(tmp, 'wb') as f:
+                f.truncate(size)
+                f.write(_HEADER.pack(MAGIC, VERSION, self.capacity, len(self.keys), self.period_ms))
+                f.write(struct.pack('<Qd', 0, time.time()))
+                f.write(struct.pack('<II', self._data_off, len(blob)))
+                f.write(blob)
+            os.replace(tmp, self.path)
+            log.info("history ring %s: %d keys x %d rows (%.1f MB)", self.path, len(self.keys),
+                     self.capacity, size / 1e6)
+        self._f = open(self.path, 'r+b')
+        self._mm = mmap.mmap(self._f.fileno(), size)
+        self.count = struct.unpack_from('<Q', self._mm, _COUNT_OFF)[0]
+        if reuse:
+            log.info("history ring %s reused (%d rows)", self.path, min(self.count, self.capacity))
+        self._col_off = [self._data_off + self.capacity * 8 + self.capacity * 4 * i
+                         for i in range(len(self.keys))]
+
+    def append(self, t, values):
+        """One row: t epoch s, values {key: value}; missing / non-numeric -> NaN."""
+        i = self.count % self.capacity
+        mm = self._mm
+        struct.pack_into('<d', mm, self._data_off + 8 * i, t)
+        for key, off in zip(self.keys, self._col_off):
+            v = values.get(key)
+            if v is None and key in self.sources:
+                v = self.sources[key]()
+            try:
+                v = float(v)
+            except (TypeError, ValueError):
+                v = math.nan
+            struct.pack_into('<f', mm, off + 4 * i, v)
+        self.count += 1
+        struct.pack_into('<Q', mm, _COUNT_OFF, self.count)   # publish the row last
+
+    def close(self):
+        self._mm.close()
+        self._f.close()
+
+
+class RingReader:
+    """numpy view of a ring file; window() slices are zero-copy unless they wrap.
+
+    Returned arrays are views into the live map: copy() them to keep a window past
+    the next capacity rows.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        if np is None:
+            raise ImportError("RingReader needs numpy")
+        self.path = path
+        self.reopen()
+
+    def reopen(self):
+        """(Re)map the file — after the writer replaced it with a new layout."""
+        self._ino = os.stat(self.path).st_ino
+        self._mm = np.memmap(self.path, dtype=np.uint8, mode='r')
+        self.capacity, period_ms, data_off, self.keys = _read_header(self._mm)
+        self.period_s = period_ms / 1000.0
+        self._count = self._mm[_COUNT_OFF:_COUNT_OFF + 8].view('<u8')
+        self.ts = self._mm[data_off:data_off + self.capacity * 8].view('<f8')
+        base = data_off + self.capacity * 8
+        self.cols = {k: self._mm[base + self.capacity * 4 * i:base + self.capacity * 4 * (i + 1)].view('<f4')
+                     for i, k in enumerate(self.keys)}
+
+    def replaced(self):
+        try:
+            return os.stat(self.path).st_ino != self._ino
+        except OSError:
+            return False
+
+    @property
+    def count(self):
+        return int(self._count[0])
+
+    def window(self, keys=None, seconds=None, rows=None):
+        """(timestamps, {key: values}) for the newest rows (or seconds), oldest first."""
+        count = self.count
+        n = min(count, self.capacity)
+        if rows is not None:
+            n = min(n, int(rows))
+        elif seconds is not None:
+            n = min(n, int(math.ceil(seconds * 1000.0 / max(1, self.period_s * 1000))))
+        end = count % self.capacity
+        start = (end - n) % self.capacity
+        if n == 0:
+            idx = slice(0, 0)
+        elif start < end or end == 0:
+            idx = slice(start, start + n)
+        else:
+            idx = np.r_[start:self.capacity, 0:end]      # wrapped: one copy per array
+        keys = self.keys if keys is None else keys
+        return self.ts[idx], {k: self.cols[k][idx] for k in keys}
+
+    def latest(self):
+        """{key: value} of the newest row (NaN for missing values)."""
+        ts, vals = self.window(rows=1)
+        return {k: float(v[0]) for k, v in vals.items()} if len(ts) else {}
+
+
+def main():
+    import argparse
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('path', nargs='?', default=DEFAULT_PATH)
+    ap.add_argument('--tail', type=int, default=10, help='rows')
+    ap.add_argument('--keys', help='comma-separated (default: all)')
+    args = ap.parse_args()
+    r = RingReader(args.path)
+    keys = args.keys.split(',') if args.keys else r.keys
+    ts, vals = r.window(keys, rows=args.tail)
+    print(f"{args.path}: {len(r.keys)} keys, {min(r.count, r.capacity)}/{r.capacity} rows, "
+          f"period {r.period_s:g} s")
+    print('time     ' + ' '.join(f'{k:>12.12}' for k in keys))
+    for i, t in enumerate(ts):
+        print(time.strftime('%H:%M:%S', time.localtime(t)) + ' ' + ' '.join(f'{vals[k][i]:>12.4g}' for k in keys))
+
+
+if __name__ == '__main__':
+    main()
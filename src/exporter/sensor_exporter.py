@@ -7,9 +7,25 @@
 #   host   = data_crawler_host.py (the monitored host).
 #
 # Unconnected channels and unfitted sensors have no key at all (writer skips the SET) →
-# automatically excluded by the exporter's `client.exists()` / `client.keys()` gates.
+# automatically excluded by the exporter's presence / key-index gates (one
+# discovery pipeline + one MGET per scrape, see fetch()).
 # The table lists "all possible keys".
 # Diagnostic helper key: comm_consecutive_failures(count) — SET by control_board.
+# Pub/sub channel leak_events — data_crawler publishes each confirmed coolant_leak
+# transition (PCB leak fast path); exposed as leak_events / leak_event_latency.
+# Diagnostic helper hash: crawler_timing — data_crawler per-stage wall-time histograms,
+# exposed as dlc_crawler_step_seconds{step} + cycle/overrun counters, and the PCB write
+# queue fields as dlc_crawler_write_queue_depth / _write_latency_seconds / _writes and
+# the RS485 load fields as dlc_crawler_bus_utilisation_percent / _bus_boards_fit.
+# Diagnostic helper hash: last_changed(key -> epoch ms of last value change) — HSET by
+# data_crawler, which only re-writes unchanged keys every publish_refresh_cycles.
+# Generation counters pi_generation / host_generation — INCR'd by the writers with
+# their writes; unchanged since the last build = reuse it (see DLCCollector).
+# dlc_system_sensor_window{stat=min|max|avg|count} — the fast-moving series over the
+# last GADGETINI_EXPORTER_WINDOW_SECONDS (default 15, 0 = off; snapshot mode only),
+# see window_stats.py.
+# :9003 serves a snapshot rebuilt in the background every GADGETINI_EXPORTER_SNAPSHOT_SECONDS
+# (default 1, plain or gzip, Age / X-Snapshot-Age headers); 0 = collect per request.
 #
 # ===============================================================================
 # MACHINE: dg5r
@@ -65,6 +81,9 @@
 #   air_temp                °C           gadget   internal air temp (DHT11)
 #   air_humit               %RH          gadget   internal air humidity
 #   chassis_stabil          0/1 bool     gadget   chassis stable (MPU6050)
+#   chassis_gyro_peak_delta deg/s        gadget   max gyro jump over cycle
+#   chassis_gyro_rms        deg/s        gadget   gyro RMS deviation over
+#                                                   cycle
 #   coolant_flow_lpm        L/min        gadget   flow estimated from pump
 #                                                   duty
 #   fan_rpm_{0~N-1}         rpm          gadget   per-fan tach RPM
@@ -89,163 +108,588 @@
 #   host_ttl                ms epoch     host     TTL key; expires in 5s
 # ===============================================================================
 
+import gzip
+import json
+import threading
 import time
 import os
-from prometheus_client import start_http_server, CollectorRegistry
-from prometheus_client.core import GaugeMetricFamily
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from prometheus_client import start_http_server, CollectorRegistry, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
 import redis
 from machine_config import MACHINE, MACHINE_LABEL, COOLANT_CHANNELS, GPU_COUNT, CPU_COUNT
+from window_stats import WindowStats
 
 REDIS_HOST = os.environ.get("GADGETINI_REDIS_HOST", "localhost")
 REDIS_PORT = int(os.environ.get("GADGETINI_REDIS_PORT", "6379"))
 REDIS_DB = int(os.environ.get("GADGETINI_REDIS_DB", "0"))
 client = redis.StrictRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, decode_responses=True)
 
+# Seconds between background snapshot rebuilds (the crawler publishes once a second);
+# 0 = build the metrics inside every HTTP request (prometheus_client's own server).
+SNAPSHOT_SECONDS = float(os.environ.get("GADGETINI_EXPORTER_SNAPSHOT_SECONDS", "1"))
+# Rolling min/max/avg/count window of the fast-moving series (dlc_system_sensor_window);
+# set it to the Prometheus scrape interval, 0 = off. It is sampled by the snapshot
+# thread, so it is off too when SNAPSHOT_SECONDS is 0 (one sample per scrape would make
+# the statistics meaningless).
+WINDOW_SECONDS = float(os.environ.get("GADGETINI_EXPORTER_WINDOW_SECONDS", "15"))
+
 CHANNELS = COOLANT_CHANNELS.get(MACHINE, {})
 
 
-def get_float(key, default=0.0):
+def as_float(v, default=0.0):
     try:
-        v = client.get(key)
         return float(v) if v is not None else default
-    except:
+    except (TypeError, ValueError):
         return default
 
 
-def get_int(key, default=0):
+def as_int(v, default=0):
     try:
-        v = client.get(key)
         return int(v) if v is not None else default
-    except:
+    except (TypeError, ValueError):
         return default
 
 
+# ── Scrape fetch plan ──────────────────────────────────────────────
+# A scrape costs two Redis round trips regardless of GPU/NIC/NVMe count (three with
+# secondary boards, below): one pipeline
+# discovers the dynamic keys (+ the crawler_timing hash), one MGET reads every value.
+# Metrics are then built from the returned dict. A key that is absent reads as None,
+# which is what the per-key client.exists() gates used to test.
+# Discovery is SMEMBERS of the writers' key-family indexes (index_* SETs, replaced in
+# the same pipeline as the values), not KEYS, which scans the whole keyspace.
+# An indexed key that has since expired (nvme_* TTL) reads as None and is skipped.
+# An empty family has no SET either, so a missing index only means "not indexed" when
+# its writer's generation counter is missing too (a writer not yet upgraded — the
+# host crawler is deployed separately): that family falls back to SCAN MATCH.
+# Secondary boards on a multi-board segment (index_boards: their key prefixes) have
+# their own pcb<id>_index_* SETs, read in one more pipeline; their series carry the
+# prefix in `extra` (pcb2_0).
+# (family, index SET, SCAN pattern, writer's generation counter)
+_DISCOVER = (
+    ("fan_rpm",       "index_fan_rpm",       "fan_rpm_*",       "pi_generation"),
+    ("pwm_duty_pump", "index_pwm_duty_pump", "pwm_duty_pump_*", "pi_generation"),
+    ("pwm_duty_fan",  "index_pwm_duty_fan",  "pwm_duty_fan_*",  "pi_generation"),
+    ("nic",           "index_nic_stat",      "nic_*_stat",      "host_generation"),
+    ("nvme",          "index_nvme_temp",     "nvme_*_temp",     "host_generation"),
+)
+_BOARD_FAMILIES = _DISCOVER[:3]        # per-board PCB families
+BOARDS_INDEX = "index_boards"
+_scan_warned = set()
+
+_FIXED_KEYS = [
+    "coolant_leak", "coolant_level", "coolant_delta_t1", "coolant_delta_t2",
+    "chassis_stabil", "coolant_flow_lpm", "comm_status", "comm_consecutive_failures",
+    "air_temp", "air_humit", "cpu_usage", "mem_total", "mem_available", "mem_usage",
+    "ib_nic_temp", "host_ttl", "host_stat",
+]
+
+
+def _gpu_keys(i):
+    return [f"gpu_name_{i}", f"gpu_temp_{i}", f"gpu_curr_pwr_{i}", f"gpu_max_pwr_{i}",
+            f"gpu_curr_mem_{i}", f"gpu_max_mem_{i}"]
+
+
+def _board_idx(key, family):
+    """fan_rpm_3 -> '3', pcb2_fan_rpm_3 -> 'pcb2_3' (secondary board's key prefix kept)."""
+    head, _, idx = key.rpartition("_")
+    return head[:len(head) - len(family)] + idx
+
+
+_EMPTY_FOUND = {"fan_rpm": [], "pwm_duty_pump": [], "pwm_duty_fan": [], "nic": [], "nvme": []}
+_last_fetch = ({}, _EMPTY_FOUND, None)
+
+
+def fetch():
+    """One scrape's Redis state: (values {key: str|None}, discovered key lists, crawler_timing,
+    redis ok). On a Redis error (restart, socket timeout) the previous scrape's state is
+    returned (empty before the first) with ok False, so the scrape still answers."""
+    global _last_fetch
+    try:
+        state = _fetch()
+    except redis.RedisError as e:
+        print(f"redis fetch failed — serving the previous values: {e}")
+        return _last_fetch + (False,)
+    _last_fetch = state
+    return state + (True,)
+
+
+def _fetch():
+    pipe = client.pipeline(transaction=False)
+    pipe.mget(["pi_generation", "host_generation"])
+    pipe.smembers(BOARDS_INDEX)
+    for _, index, _, _ in _DISCOVER:
+        pipe.exists(index)
+        pipe.smembers(index)
+    pipe.hgetall("crawler_timing")
+    res = pipe.execute(raise_on_error=False)
+    res = [None if isinstance(r, Exception) else r for r in res]
+    writers = dict(zip(["pi_generation", "host_generation"], res[0] or [None, None]))
+    boards = sorted(res[1] or ())
+    timing = res[-1]
+
+    families = {}
+    for n, (family, index, pattern, writer) in enumerate(_DISCOVER):
+        exists, members = res[2 + 2 * n], res[3 + 2 * n]
+        if not exists and writers.get(writer) is None:
+            if family not in _scan_warned:
+                _scan_warned.add(family)
+                print(f"{index} missing and {writer} unset (writer not upgraded?) — SCAN {pattern}")
+            members = client.scan_iter(match=pattern, count=1000)
+        families[family] = sorted(members or ())
+
+    if boards:
+        pipe = client.pipeline(transaction=False)
+        for prefix in boards:
+            for _, index, _, _ in _BOARD_FAMILIES:
+                pipe.smembers(prefix + index)
+        res = iter(pipe.execute())
+        for prefix in boards:
+            for family, _, _, _ in _BOARD_FAMILIES:
+                families[family] += sorted(next(res))
+
+    fan_keys, pump_keys, fan_duty_keys, nic_keys = (
+        families["fan_rpm"], families["pwm_duty_pump"], families["pwm_duty_fan"], families["nic"])
+    nvme_keys = families["nvme"]
+
+    nvme = []
+    for nvme_key in nvme_keys:
+        parts = nvme_key.split("_")
+        if len(parts) == 3 and parts[0] == "nvme" and parts[1].isdigit() and parts[2] == "temp":
+            nvme.append((int(parts[1]), nvme_key))
+    nvme.sort()
+
+    keys = list(_FIXED_KEYS)
+    keys += [f"coolant_temp_{name}" for name in CHANNELS]
+    for i in range(GPU_COUNT):
+        keys += _gpu_keys(i)
+    for i in range(CPU_COUNT):
+        keys += [f"cpu_temp_{i}", f"cpu_curr_pwr_{i}"]
+    keys += fan_keys + pump_keys + fan_duty_keys + nic_keys
+    for i, nvme_key in nvme:
+        keys += [nvme_key, f"nvme_{i}_name"]
+    values = dict(zip(keys, client.mget(keys)))
+
+    def present(family):
+        return [k for k in family if values.get(k) is not None]
+
+    found = {"fan_rpm": present(fan_keys), "pwm_duty_pump": present(pump_keys),
+             "pwm_duty_fan": present(fan_duty_keys), "nic": present(nic_keys),
+             "nvme": [(i, k) for i, k in nvme if values.get(k) is not None]}
+    return values, found, timing
+
+
+# Leak state fed by data_crawler's leak_events pub/sub (PCB fast path). While the
+# subscription is up a scrape reports the last published state instead of GET'ing
+# coolant_leak; legacy units never publish, so the key stays authoritative there.
+LEAK_EVENTS_CHANNEL = "leak_events"
+leak_state = {"subscribed": False, "leak": None, "events": 0, "latency": None}
+
+
+def leak_event_listener():
+    while True:
+        ps = None
+        try:
+            ps = client.pubsub(ignore_subscribe_messages=True)
+            ps.subscribe(LEAK_EVENTS_CHANNEL)
+            leak_state["leak"] = None      # unknown until the next event: GET coolant_leak
+            leak_state["subscribed"] = True
+            for msg in ps.listen():
+                if msg.get("type") != "message":
+                    continue
+                event = json.loads(msg["data"])
+                leak_state["events"] += 1
+                if event.get("key", "coolant_leak") == "coolant_leak":  # primary board only
+                    leak_state["leak"] = int(event.get("leak", 0))
+                if "t_raw" in event and "t_pub" in event:
+                    leak_state["latency"] = float(event["t_pub"]) - float(event["t_raw"])
+        except Exception as e:
+            print(f"leak_events subscription lost: {e}")
+        finally:
+            leak_state["subscribed"] = False
+            leak_state["leak"] = None      # may have cleared while disconnected
+            if ps is not None:
+                try:
+                    ps.close()
+                except Exception:
+                    pass
+        time.sleep(5)
+
+
+# Generation short-circuit: the writers INCR these in the same pipeline as their
+# writes, so while both (and the pub/sub leak state) are unchanged a scrape re-yields
+# the previous families after a single MGET. Expiries change the output without a
+# write (host_ttl, nvme_* TTL), so a cached build is reused for at most
+# _GENERATION_REUSE_S; a missing counter (writer not yet updated) disables reuse.
+SENSOR_LABELS = ["server", "component", "metric", "unit", "extra"]
+
+GENERATION_KEYS = ["pi_generation", "host_generation"]
+_GENERATION_REUSE_S = 5.0
+
+# dlc_system_sensor series (by metric label) that move faster than the scrape interval.
+# Each collect() feeds their current values to a WindowStats at most once per bucket
+# (one bucket = one snapshot interval), reused builds included. Only the snapshot
+# thread samples at a steady rate, so without it there is no window.
+WINDOW_METRICS = {
+    "power_current", "power", "temperature", "fan_rpm", "pump_pwm_duty", "fan_pwm_duty",
+    "delta_t1", "delta_t2", "outlet1_temp", "outlet2_temp", "coolant_flow",
+}
+
+
 class DLCCollector:
+    def __init__(self, window_s=None, sample_s=SNAPSHOT_SECONDS):
+        self.reused = 0
+        self._cache_key = None
+        self._cache = None
+        self._built = 0.0
+        if window_s is None:
+            window_s = WINDOW_SECONDS if sample_s > 0 else 0
+        self.window = WindowStats(window_s, max(1.0, sample_s)) if window_s > 0 else None
+        self._fed_slot = None
+
     def collect(self):
+        try:
+            gens = client.mget(GENERATION_KEYS)
+        except redis.RedisError:
+            gens = [None]          # no reuse; fetch() reports the failure
+        key = (tuple(gens), leak_state["subscribed"], leak_state["leak"], leak_state["events"],
+               leak_state["latency"])
+        now = time.monotonic()
+        if (self._cache is not None and None not in gens and key == self._cache_key
+                and now - self._built < _GENERATION_REUSE_S):
+            self.reused += 1
+            families = self._cache
+        else:
+            families = list(self._build())
+            self._cache_key, self._cache, self._built = key, families, now
+        yield from families
+        if self.window is not None:
+            yield self._window_family(families[0], now)
+
+    def _window_family(self, g, now):
+        """Feed g's fast-moving samples (once per bucket), then min/max/avg/count per series."""
+        w = self.window
+        slot = int(now // w.bucket_s)
+        if slot != self._fed_slot:
+            self._fed_slot = slot
+            for sample in g.samples:
+                if sample.labels["metric"] in WINDOW_METRICS:
+                    w.add(tuple(sample.labels[k] for k in SENSOR_LABELS), sample.value, now)
+        h = GaugeMetricFamily(
+            "dlc_system_sensor_window",
+            f"dlc_system_sensor over the last {w.window_s:g} s ({w.bucket_s:g} s samples)",
+            labels=SENSOR_LABELS + ["stat"]
+        )
+        for labels, lo, hi, mean, count in w.stats(now):
+            h.add_metric(list(labels) + ["min"], lo)
+            h.add_metric(list(labels) + ["max"], hi)
+            h.add_metric(list(labels) + ["avg"], mean)
+            h.add_metric(list(labels) + ["count"], count)
+        return h
+
+    def _build(self):
         g = GaugeMetricFamily(
             "dlc_system_sensor",
             "DeepGadget DLC server sensors & telemetry",
-            labels=["server", "component", "metric", "unit", "extra"]
+            labels=SENSOR_LABELS
         )
         srv = MACHINE_LABEL
+        v, found, timing, redis_ok = fetch()
+
+        def f(key):
+            return as_float(v.get(key))
+
+        def i_(key):
+            return as_int(v.get(key))
 
         # Cooling - leak & level
-        g.add_metric([srv, "cooling", "leak_detected", "bool", ""], get_int("coolant_leak"))
-        g.add_metric([srv, "cooling", "level_full",    "bool", ""], get_int("coolant_level"))
+        leak = leak_state["leak"] if leak_state["subscribed"] else None
+        g.add_metric([srv, "cooling", "leak_detected", "bool", ""],
+                     leak if leak is not None else i_("coolant_leak"))
+        if leak_state["events"]:
+            g.add_metric([srv, "cooling", "leak_events", "count", ""], leak_state["events"])
+        if leak_state["latency"] is not None:
+            g.add_metric([srv, "cooling", "leak_event_latency", "s", ""], leak_state["latency"])
+        g.add_metric([srv, "cooling", "level_full",    "bool", ""], i_("coolant_level"))
 
         # Cooling temperatures: only expose channels whose Redis key is currently present.
         # data_crawler deletes the key when the NTC reads as disconnected, so older units
         # with no outlet wiring naturally drop out of the metric set.
         for name in CHANNELS:
             key = f"coolant_temp_{name}"
-            if client.exists(key):
-                g.add_metric([srv, "cooling", f"{name}_temp", "°C", ""], get_float(key))
+            if v.get(key) is not None:
+                g.add_metric([srv, "cooling", f"{name}_temp", "°C", ""], f(key))
 
         # delta_t is written by the crawler only when the inlet+outlet pair is present
-        if client.exists("coolant_delta_t1"):
-            g.add_metric([srv, "cooling", "delta_t1", "°C", ""], get_float("coolant_delta_t1"))
-        if client.exists("coolant_delta_t2"):
-            g.add_metric([srv, "cooling", "delta_t2", "°C", ""], get_float("coolant_delta_t2"))
+        if v.get("coolant_delta_t1") is not None:
+            g.add_metric([srv, "cooling", "delta_t1", "°C", ""], f("coolant_delta_t1"))
+        if v.get("coolant_delta_t2") is not None:
+            g.add_metric([srv, "cooling", "delta_t2", "°C", ""], f("coolant_delta_t2"))
 
         # Chassis stability (dg5w only)
         if MACHINE == 'dg5w':
-            g.add_metric([srv, "chassis", "stability", "bool", ""], get_int("chassis_stabil"))
+            g.add_metric([srv, "chassis", "stability", "bool", ""], i_("chassis_stabil"))
 
         # Coolant flow (control_board SETs an estimate based on pump duty)
-        if client.exists("coolant_flow_lpm"):
-            g.add_metric([srv, "cooling", "coolant_flow", "L/min", ""], get_float("coolant_flow_lpm"))
+        if v.get("coolant_flow_lpm") is not None:
+            g.add_metric([srv, "cooling", "coolant_flow", "L/min", ""], f("coolant_flow_lpm"))
         # Fan tach RPM (PCBDriver.poll reads pulse freq IR 13~24 and SETs; idx = wiring order)
-        for fan_key in sorted(client.keys("fan_rpm_*")):
-            idx = fan_key.split("_")[-1]
-            g.add_metric([srv, "cooling", "fan_rpm", "rpm", idx], get_int(fan_key))
+        for fan_key in found["fan_rpm"]:
+            g.add_metric([srv, "cooling", "fan_rpm", "rpm", _board_idx(fan_key, "fan_rpm")], i_(fan_key))
 
         # PWM duty readback (control_board polling reads HR 0~11 and SETs, 0~1000 = 0~100.0%)
-        for duty_key in sorted(client.keys("pwm_duty_pump_*")):
-            idx = duty_key.split("_")[-1]
-            g.add_metric([srv, "cooling", "pump_pwm_duty", "0.1%", idx], get_int(duty_key))
-        for duty_key in sorted(client.keys("pwm_duty_fan_*")):
-            idx = duty_key.split("_")[-1]
-            g.add_metric([srv, "cooling", "fan_pwm_duty", "0.1%", idx], get_int(duty_key))
+        for duty_key in found["pwm_duty_pump"]:
+            g.add_metric([srv, "cooling", "pump_pwm_duty", "0.1%", _board_idx(duty_key, "pwm_duty_pump")],
+                         i_(duty_key))
+        for duty_key in found["pwm_duty_fan"]:
+            g.add_metric([srv, "cooling", "fan_pwm_duty", "0.1%", _board_idx(duty_key, "pwm_duty_fan")],
+                         i_(duty_key))
 
         # control_board ↔ PCB Modbus communication status (1=ok, 0=timeout/disconnected)
-        if client.exists("comm_status"):
-            comm_ok = 1 if (client.get("comm_status") == "ok") else 0
+        if v.get("comm_status") is not None:
+            comm_ok = 1 if (v["comm_status"] == "ok") else 0
             g.add_metric([srv, "control_board", "comm_online", "1=ok", ""], comm_ok)
             g.add_metric([srv, "control_board", "comm_consecutive_failures", "count", ""],
-                         get_int("comm_consecutive_failures"))
+                         i_("comm_consecutive_failures"))
 
         # Environment
-        g.add_metric([srv, "environment", "air_temp",     "°C",  ""], get_float("air_temp"))
-        g.add_metric([srv, "environment", "air_humidity", "%RH", ""], get_float("air_humit"))
+        g.add_metric([srv, "environment", "air_temp",     "°C",  ""], f("air_temp"))
+        g.add_metric([srv, "environment", "air_humidity", "%RH", ""], f("air_humit"))
 
         # GPUs
         for i in range(GPU_COUNT):
-            gpu_name = (client.get(f"gpu_name_{i}") or f"GPU{i}").strip()
+            gpu_name = (v.get(f"gpu_name_{i}") or f"GPU{i}").strip()
             extra = (gpu_name.replace(" ", "_").replace("/", "-")
                              .replace(",", "").replace("(", "").replace(")", ""))
-            mem_used  = get_float(f"gpu_curr_mem_{i}")
-            mem_total = get_float(f"gpu_max_mem_{i}")
+            mem_used  = f(f"gpu_curr_mem_{i}")
+            mem_total = f(f"gpu_max_mem_{i}")
             mem_pct   = (mem_used / mem_total * 100) if mem_total > 0 else 0.0
-            g.add_metric([srv, f"gpu{i}", "temperature",      "°C",  extra], get_float(f"gpu_temp_{i}"))
-            g.add_metric([srv, f"gpu{i}", "power_current",    "W",   extra], get_float(f"gpu_curr_pwr_{i}"))
-            g.add_metric([srv, f"gpu{i}", "power_limit",      "W",   extra], get_float(f"gpu_max_pwr_{i}"))
+            g.add_metric([srv, f"gpu{i}", "temperature",      "°C",  extra], f(f"gpu_temp_{i}"))
+            g.add_metric([srv, f"gpu{i}", "power_current",    "W",   extra], f(f"gpu_curr_pwr_{i}"))
+            g.add_metric([srv, f"gpu{i}", "power_limit",      "W",   extra], f(f"gpu_max_pwr_{i}"))
             g.add_metric([srv, f"gpu{i}", "memory_used",      "MiB", extra], mem_used)
             g.add_metric([srv, f"gpu{i}", "memory_total",     "MiB", extra], mem_total)
             g.add_metric([srv, f"gpu{i}", "memory_available", "%",   extra], mem_pct)
 
         # CPU
-        g.add_metric([srv, "cpu", "usage_total", "%", ""], get_float("cpu_usage"))
+        g.add_metric([srv, "cpu", "usage_total", "%", ""], f("cpu_usage"))
         for i in range(CPU_COUNT):
-            g.add_metric([srv, f"cpu{i}", "temperature", "°C", ""], get_float(f"cpu_temp_{i}"))
-            g.add_metric([srv, f"cpu{i}", "power",       "W",  ""], get_float(f"cpu_curr_pwr_{i}"))
+            g.add_metric([srv, f"cpu{i}", "temperature", "°C", ""], f(f"cpu_temp_{i}"))
+            g.add_metric([srv, f"cpu{i}", "power",       "W",  ""], f(f"cpu_curr_pwr_{i}"))
 
         # Memory
-        g.add_metric([srv, "memory", "total",     "GiB", ""], get_float("mem_total"))
-        g.add_metric([srv, "memory", "available", "GiB", ""], get_float("mem_available"))
-        g.add_metric([srv, "memory", "usage",     "GiB", ""], get_float("mem_usage"))
+        g.add_metric([srv, "memory", "total",     "GiB", ""], f("mem_total"))
+        g.add_metric([srv, "memory", "available", "GiB", ""], f("mem_available"))
+        g.add_metric([srv, "memory", "usage",     "GiB", ""], f("mem_usage"))
 
         # Network
-        seen_nics = set()
-        for key in client.keys("nic_*_stat"):
-            if not key.startswith("nic_") or not key.endswith("_stat"):
-                continue
-            nic = key[4:-5]
-            if nic in seen_nics:
-                continue
-            seen_nics.add(nic)
-            g.add_metric([srv, "network", "link_status", "1=up", nic], get_int(key))
+        for key in found["nic"]:
+            g.add_metric([srv, "network", "link_status", "1=up", key[4:-5]], i_(key))
 
         # IB
-        if client.exists("ib_nic_temp"):
-            g.add_metric([srv, "ib", "temperature", "°C", ""], get_float("ib_nic_temp"))
+        if v.get("ib_nic_temp") is not None:
+            g.add_metric([srv, "ib", "temperature", "°C", ""], f("ib_nic_temp"))
 
         # NVMe storage
         # Export whatever current nvme_*_temp keys exist. Do not gate on host_ttl:
         # on this deployment host_stat/host_ttl can be absent or unsynced while
         # host metrics are still present. Staleness is handled by TTL on nvme_* keys.
-        nvme_temp_keys = []
-        for nvme_key in client.keys("nvme_*_temp"):
-            parts = nvme_key.split("_")
-            if len(parts) == 3 and parts[0] == "nvme" and parts[1].isdigit() and parts[2] == "temp":
-                nvme_temp_keys.append((int(parts[1]), nvme_key))
-
-        for i, nvme_key in sorted(nvme_temp_keys):
-            nvme_name = client.get(f"nvme_{i}_name") or f"nvme{i}"
-            g.add_metric([srv, "storage", "nvme_temperature", "°C", nvme_name], get_float(nvme_key))
+        for i, nvme_key in found["nvme"]:
+            nvme_name = v.get(f"nvme_{i}_name") or f"nvme{i}"
+            g.add_metric([srv, "storage", "nvme_temperature", "°C", nvme_name], f(nvme_key))
 
         # Host
-        host_online = 1 if client.exists("host_ttl") else get_int("host_stat")
+        host_online = 1 if v.get("host_ttl") is not None else i_("host_stat")
         g.add_metric([srv, "system", "host_online", "1=yes", ""], host_online)
+        # Redis reachable for this scrape (0 = the values above are the last good ones)
+        g.add_metric([srv, "exporter", "redis_online", "1=ok", ""], 1 if redis_ok else 0)
 
         yield g
+        yield from crawler_timing_metrics(srv, timing)
+
+
+def crawler_timing_metrics(srv, raw):
+    """crawler_timing hash (fetched with the scrape) -> per-step histograms + cycle/overrun counters."""
+    if not raw or "le" not in raw:
+        return
+    bounds = json.loads(raw["le"])
+    h = HistogramMetricFamily(
+        "dlc_crawler_step_seconds",
+        "data_crawler wall time per stage/step (cycle, jitter = start vs cadence)",
+        labels=["server", "step"],
+    )
+    queues = {}
+    for step, v in sorted(raw.items()):
+        if step in ("le", "cycles", "overruns"):
+            continue
+        if step.startswith("write_queue"):
+            queues[step[len("write_queue_"):]] = v
+            continue
+        if step.startswith("bus_"):
+            continue
+        try:
+            d = json.loads(v)
+        except ValueError:
+            continue
+        buckets, acc = [], 0
+        for le, n in zip([str(b) for b in bounds] + ["+Inf"], d["counts"]):
+            acc += n
+            buckets.append((le, acc))
+        h.add_metric([srv, step], buckets, d["sum"])
+    yield h
+    for name in ("cycles", "overruns"):
+        if name in raw:
+            c = CounterMetricFamily(f"dlc_crawler_{name}", f"data_crawler {name} since start",
+                                    labels=["server"])
+            c.add_metric([srv], int(raw[name]))
+            yield c
+    if queues:
+        yield from write_queue_metrics(srv, queues)
+    for field, name, doc in (("bus_utilisation", "bus_utilisation_percent",
+                              "RS485 segment: % of wall time inside Modbus requests (last cycles)"),
+                             ("bus_boards_fit", "bus_boards_fit",
+                              "RS485 segment: boards with the current per-board cost that fit at 80 %")):
+        if field in raw:
+            g = GaugeMetricFamily(f"dlc_crawler_{name}", doc, labels=["server"])
+            g.add_metric([srv], float(raw[field]))
+            yield g
+
+
+def write_queue_metrics(srv, queues):
+    """{board ('' = primary, pcb2, ...): CommandQueue.stats() JSON} -> PCB write queue gauges/counters."""
+    depth = GaugeMetricFamily("dlc_crawler_write_queue_depth",
+                              "PCB write queue: pending registers (depth) and high-water mark (max)",
+                              labels=["server", "board", "stat"])
+    latency = GaugeMetricFamily("dlc_crawler_write_latency_seconds",
+                                "PCB write latency, enqueue -> written, over the recent writes",
+                                labels=["server", "board", "stat"])
+    writes = CounterMetricFamily("dlc_crawler_writes",
+                                 "PCB register writes since start (written, coalesced away, write transactions)",
+                                 labels=["server", "board", "kind"])
+    for board, v in sorted(queues.items()):
+        try:
+            st = json.loads(v)
+        except ValueError:
+            continue
+        depth.add_metric([srv, board, "depth"], st.get("depth") or 0)
+        depth.add_metric([srv, board, "max"], st.get("max_depth") or 0)
+        for stat in ("avg", "max"):
+            ms = st.get(f"latency_ms_{stat}")
+            if ms is not None:
+                latency.add_metric([srv, board, stat], ms / 1000.0)
+        for kind in ("written", "coalesced", "transactions"):
+            writes.add_metric([srv, board, kind], st.get(kind) or 0)
+    yield depth
+    yield latency
+    yield writes
+
+
+# ── Cached exposition ──────────────────────────────────────────────
+# One background thread runs the Redis fetch + metric build every SNAPSHOT_SECONDS and
+# serializes the text exposition once (plain + gzip). Every HTTP request — Prometheus,
+# Grafana, the cluster UI pollers — is served those bytes, so scrape cost no longer
+# grows with the number of clients. Age: / X-Snapshot-Age tell a client how old the
+# snapshot is; a failed rebuild keeps the previous one, so the age keeps growing.
+# generate_latest()'s text format (CONTENT_TYPE_LATEST moved to 1.0.0 in newer clients)
+_TEXT_FORMAT = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class SnapshotExposition:
+    def __init__(self, registry, interval_s):
+        self.registry = registry
+        self.interval_s = interval_s
+        self.builds = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        self._snap = None          # (body, gzip body, built epoch s, build s)
+
+    def refresh(self):
+        t0 = time.time()
+        body = generate_latest(self.registry)
+        gz = gzip.compress(body, compresslevel=6)
+        with self._lock:
+            self._snap = (body, gz, t0, time.time() - t0)
+        self.builds += 1
+
+    def snapshot(self):
+        with self._lock:
+            return self._snap
+
+    def _loop(self):
+        next_t = time.monotonic()
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                self.failures += 1
+                print(f"metric snapshot rebuild failed: {e}")
+            next_t += self.interval_s
+            delay = next_t - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_t = time.monotonic()
+
+    def start(self):
+        threading.Thread(target=self._loop, name="metric-snapshot", daemon=True).start()
+        return self
+
+
+class _SnapshotHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        snap = self.server.exposition.snapshot()
+        if snap is None:
+            self.send_error(503, "no metric snapshot yet")
+            return
+        body, gz, built, build_s = snap
+        use_gzip = "gzip" in self.headers.get("Accept-Encoding", "")
+        age = max(0.0, time.time() - built)
+        self.send_response(200)
+        self.send_header("Content-Type", _TEXT_FORMAT)
+        if use_gzip:
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(gz if use_gzip else body)))
+        self.send_header("Last-Modified", formatdate(built, usegmt=True))
+        self.send_header("Age", str(int(age)))
+        self.send_header("X-Snapshot-Age", f"{age:.3f}")
+        self.send_header("X-Snapshot-Build-Seconds", f"{build_s:.4f}")
+        self.end_headers()
+        self.wfile.write(gz if use_gzip else body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_snapshot_server(port, registry, interval_s, addr=""):
+    exposition = SnapshotExposition(registry, interval_s)
+    try:
+        exposition.refresh()       # serve real data from the first request on
+    except Exception as e:
+        print(f"first metric snapshot failed: {e}")
+    exposition.start()
+    httpd = ThreadingHTTPServer((addr, port), _SnapshotHandler)
+    httpd.daemon_threads = True
+    httpd.exposition = exposition
+    threading.Thread(target=httpd.serve_forever, name="metric-http", daemon=True).start()
+    return httpd
 
 
 if __name__ == "__main__":
     registry = CollectorRegistry()
     registry.register(DLCCollector())
     port = 9003
-    start_http_server(port, registry=registry)
-    print(f"DLC sensor exporter listening on :{port}")
+    threading.Thread(target=leak_event_listener, daemon=True).start()
+    if SNAPSHOT_SECONDS > 0:
+        start_snapshot_server(port, registry, SNAPSHOT_SECONDS)
+        print(f"DLC sensor exporter listening on :{port} (snapshot every {SNAPSHOT_SECONDS:g} s)")
+    else:
+        start_http_server(port, registry=registry)
+        print(f"DLC sensor exporter listening on :{port}")
     while True:
         time.sleep(2.5)
 
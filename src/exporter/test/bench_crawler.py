@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""data_crawler PCB bus stage + Redis publish against the PCB emulator, unpaced.
+
+Runs data_crawler.PCBBus (per board: health/poll/control/flush) and the publish stage
+back to back for N cycles on a test/pcb_emulator.py pty — fakeredis by default, --redis
+for a local server — and reports cycles/s, Modbus transactions per cycle (driver count
+and what the emulator saw), Redis round trips and cycle latency percentiles. The first
+(connect + initial state) cycle is reported separately. --boards N puts slaves 1..N
+on the segment (modbus.slaves, slot window 0 so the run stays unpaced) and adds the
+bus utilisation / boards-fit estimate — of the unpaced run, where the bus is busy back
+to back, not of the 1 s production cadence.
+
+    cd src/exporter && python3 test/bench_crawler.py [--cycles 200] [--baud 9600]
+        [--latency-ms 2] [--drop-rate 0.01] [--liveness probe] [--read-gap 0] [--boards 3]
+"""
+import argparse
+import copy
+import logging
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, HERE)
+os.environ.setdefault('GADGETINI_BACKEND', 'pcb')
+
+import change_watch  # noqa: E402
+import data_crawler  # noqa: E402
+import leak_watch  # noqa: E402
+import redis_batch  # noqa: E402
+from pcb_emulator import PCBEmulator  # noqa: E402
+
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return float('nan')
+    k = min(len(sorted_vals) - 1, max(0, int(round(p / 100.0 * (len(sorted_vals) - 1)))))
+    return sorted_vals[k]
+
+
+def transactions(pcb):
+    return sum(board.driver.transactions for board in pcb.boards)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--cycles', type=int, default=200)
+    ap.add_argument('--boards', type=int, default=1, help='control boards (slaves 1..N) on the segment')
+    ap.add_argument('--baud', type=int, default=115200)
+    ap.add_argument('--latency-ms', type=float, default=1.0, help='slave turnaround')
+    ap.add_argument('--drop-rate', type=float, default=0.0)
+    ap.add_argument('--off-every', type=float, default=0.0)
+    ap.add_argument('--off-for', type=float, default=0.0)
+    ap.add_argument('--liveness', choices=('probe', 'poll'))
+    ap.add_argument('--read-gap', type=int)
+    ap.add_argument('--leak-watch', action='store_true', help='run the leak fast path alongside (its samples count as transactions)')
+    ap.add_argument('--redis', action='store_true', help='local Redis instead of fakeredis')
+    ap.add_argument('-v', '--verbose', action='store_true')
+    args = ap.parse_args()
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+
+    emu = PCBEmulator(slaves=range(1, args.boards + 1), baud=args.baud, latency_ms=args.latency_ms, drop_rate=args.drop_rate,
+                      off_every=args.off_every, off_for=args.off_for, seed=1).start()
+    if args.redis:
+        rd = data_crawler.rd
+    else:
+        import fakeredis
+        rd = fakeredis.FakeStrictRedis(decode_responses=True)
+
+    cfg = copy.deepcopy(data_crawler._load_yaml(data_crawler.PCB_CONFIG_PATH))
+    cfg['modbus']['port'] = [emu.port]
+    cfg['modbus']['baud'] = [args.baud]
+    # the emulator's /dev/pts port must not replace the production lock (.pcb_lock.json)
+    lock_dir = tempfile.TemporaryDirectory(prefix='bench_crawler_')
+    cfg['modbus']['lock_cache'] = os.path.join(lock_dir.name, 'pcb_lock.json')
+    if args.liveness:
+        cfg['modbus']['liveness'] = args.liveness
+    if args.read_gap is not None:
+        cfg['modbus']['read_gap'] = args.read_gap
+    if args.leak_watch:
+        cfg.setdefault('leak', {})['fast_path'] = True     # off in the shipped config
+    if args.boards > 1:
+        cfg['modbus']['slaves'] = list(range(1, args.boards + 1))
+        cfg['modbus']['schedule_window_seconds'] = 0
+    publisher = redis_batch.ChangePublisher((cfg.get('loop') or {}).get('publish_refresh_cycles', 30))
+    # an "active" watcher that never posts: the bench cfg (emulator port) is never reloaded
+    config_watch = change_watch.ConfigWatcher(data_crawler.PCB_CONFIG_PATH, change_watch.PendingChanges())
+    config_watch.active = True
+    pcb = data_crawler.PCBBus(cfg, publisher, config_watch)
+    if args.leak_watch:
+        for board in pcb.boards:
+            leak_watch.LeakWatcher(board.driver, rd, board.key_prefix).start()
+    rd.set('control_mode', 'auto')
+    read_keys = data_crawler.CYCLE_READ_KEYS + data_crawler.CONTROL_KEYS + pcb.read_keys()
+
+    durations, tx, round_trips = [], [], []
+    first = None
+    req0 = 0
+    t_start = None
+    for i in range(args.cycles + 1):
+        t0 = time.monotonic()
+        tx0 = transactions(pcb)
+        batch = redis_batch.CycleBatch(rd, read_keys, publisher)
+        pcb.run(batch)
+        data_crawler._publish({}, batch)
+        dt = time.monotonic() - t0
+        if i == 0:
+            first = (dt, transactions(pcb) - tx0)
+            req0 = emu.requests
+            t_start = time.monotonic()
+            continue
+        durations.append(dt)
+        tx.append(transactions(pcb) - tx0)
+        round_trips.append(batch.round_trips)
+    wall = time.monotonic() - t_start
+    n = len(durations)
+    durations.sort()
+    emu.stop()
+    pcb.driver.close()
+    lock_dir.cleanup()
+
+    print(f"emulator: {args.baud} baud, {args.latency_ms} ms turnaround, drop {args.drop_rate}, "
+          f"liveness={pcb.driver.liveness}, read_gap={pcb.driver.read_gap}, "
+          f"redis={'local' if args.redis else 'fakeredis'}")
+    print(f"first cycle (connect + initial state): {first[0] * 1000:.1f} ms, {first[1]} transactions")
+    print(f"{n} cycles in {wall:.2f} s -> {n / wall:.1f} cycles/s")
+    print(f"Modbus transactions/cycle: {sum(tx) / n:.2f} (driver), "
+          f"{(emu.requests - req0) / n:.2f} (emulator), {emu.dropped} dropped; "
+          f"fc counts {dict(sorted(emu.fc_counts.items()))}")
+    print(f"Redis round trips/cycle: {sum(round_trips) / n:.2f}")
+    print("cycle ms: p50 %.1f  p90 %.1f  p99 %.1f  max %.1f" % tuple(
+        percentile(durations, p) * 1000 for p in (50, 90, 99, 100)))
+    for board in pcb.boards:
+        print(f"slave {board.driver.slave} write queue: {board.driver.queue.stats()}")
+    if len(pcb.boards) > 1:
+        bus = rd.hgetall('crawler_timing')
+        print(f"bus utilisation {bus.get('bus_utilisation')} %, boards fit at 80 %: {bus.get('bus_boards_fit')}")
+
+
+if __name__ == '__main__':
+    main()
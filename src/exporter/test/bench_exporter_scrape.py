@@ -0,0 +1,181 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""sensor_exporter scrape time — per-key GETs (previous collector) vs the fetch plan.
+
+Fills Redis with a full host (8 GPUs, 16 NVMe, 10 NICs by default, plus the PCB
+keys) and times DLCCollector.collect() against `sequential_collect` below, a
+reference copy of the previous collector's Redis access pattern (GET per key,
+EXISTS + GET, KEYS per family, GET per GPU / NVMe name). Round trips are counted per command /
+pipeline / MGET; over fakeredis each one also sleeps --rtt-ms (the Pi's loopback
+Redis is ~0.1-0.3 ms per call under load), --redis uses a local server instead.
+
+    cd src/exporter && python3 test/bench_exporter_scrape.py [--gpus 8] [--nvme 16]
+        [--nics 10] [--rtt-ms 0.2] [--scrapes 50]
+"""
+import argparse
+import os
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import sensor_exporter as se  # noqa: E402
+from machine_config import COOLANT_CHANNELS  # noqa: E402
+
+
+class RoundTrips:
+    """Redis client proxy: counts round trips, optionally adds a fixed RTT to each."""
+
+    def __init__(self, rd, rtt_s):
+        self.rd = rd
+        self.rtt_s = rtt_s
+        self.count = 0
+
+    def _trip(self):
+        self.count += 1
+        if self.rtt_s:
+            time.sleep(self.rtt_s)
+
+    def __getattr__(self, name):
+        attr = getattr(self.rd, name)
+        if name == 'pipeline':
+            def pipeline(*a, **kw):
+                pipe = attr(*a, **kw)
+                execute = pipe.execute
+
+                def counted(*ea, **ekw):
+                    self._trip()
+                    return execute(*ea, **ekw)
+                pipe.execute = counted
+                return pipe
+            return pipeline
+        if not callable(attr):
+            return attr
+
+        def call(*a, **kw):
+            self._trip()
+            return attr(*a, **kw)
+        return call
+
+
+def populate(rd, gpus, nvme, nics):
+    rd.flushdb()
+    vals = {'coolant_temp_inlet1': 30.1, 'coolant_temp_outlet1': 35.2, 'coolant_temp_outlet2': 35.0,
+            'coolant_temp_inlet2': 30.3, 'coolant_delta_t1': 5.1, 'coolant_delta_t2': 4.7,
+            'coolant_leak': 0, 'coolant_level': 1, 'coolant_flow_lpm': 8.2, 'air_temp': 24.5,
+            'air_humit': 41.0, 'comm_status': 'ok', 'comm_consecutive_failures': 0,
+            'cpu_usage': 37.5, 'mem_total': 1007.5, 'mem_usage': 312.0, 'mem_available': 695.5,
+            'ib_nic_temp': 61, 'host_ttl': int(time.time() * 1000), 'host_stat': 1}
+    for i in range(gpus):
+        vals.update({f'gpu_name_{i}': 'NVIDIA H100 80GB HBM3', f'gpu_temp_{i}': 55 + i,
+                     f'gpu_curr_pwr_{i}': 420.5, f'gpu_max_pwr_{i}': 700, f'gpu_curr_mem_{i}': 40000,
+                     f'gpu_max_mem_{i}': 81559})
+    for i in range(2):
+        vals.update({f'cpu_temp_{i}': 61, f'cpu_curr_pwr_{i}': 280})
+    for i in range(8):
+        vals[f'fan_rpm_{i}'] = 1800 + i
+        vals[f'pwm_duty_fan_{i}'] = 420
+    for i in range(4):
+        vals[f'pwm_duty_pump_{i}'] = 600
+    for i in range(nvme):
+        vals.update({f'nvme_{i}_temp': 38 + i % 5, f'nvme_{i}_name': f'nvme{i}n1'})
+    for i in range(nics):
+        vals[f'nic_ens{i}f0_stat'] = 1
+    rd.mset(vals)
+    for index, pattern in (('index_fan_rpm', 'fan_rpm_*'), ('index_pwm_duty_pump', 'pwm_duty_pump_*'),
+                           ('index_pwm_duty_fan', 'pwm_duty_fan_*'), ('index_nic_stat', 'nic_*_stat'),
+                           ('index_nvme_temp', 'nvme_*_temp')):
+        rd.sadd(index, *rd.keys(pattern))
+    rd.hset('crawler_timing', mapping={'le': '[0.001, 0.01, 0.1, 1]', 'cycles': 10, 'overruns': 0,
+                                       'poll': '{"counts": [0, 9, 1, 0, 0], "sum": 0.08, "count": 10}'})
+
+
+def sequential_collect():
+    """Reference: the previous DLCCollector.collect()'s Redis calls, in order."""
+    c = se.client
+
+    def get_float(key):
+        v = c.get(key)
+        return float(v) if v is not None else 0.0
+
+    def get_int(key):
+        v = c.get(key)
+        return int(v) if v is not None else 0
+
+    out = [get_int('coolant_leak'), get_int('coolant_level')]
+    for name in se.CHANNELS:
+        if c.exists(f'coolant_temp_{name}'):
+            out.append(get_float(f'coolant_temp_{name}'))
+    for key in ('coolant_delta_t1', 'coolant_delta_t2', 'coolant_flow_lpm'):
+        if c.exists(key):
+            out.append(get_float(key))
+    for pattern in ('fan_rpm_*', 'pwm_duty_pump_*', 'pwm_duty_fan_*'):
+        out += [get_int(k) for k in sorted(c.keys(pattern))]
+    if c.exists('comm_status'):
+        out += [c.get('comm_status'), get_int('comm_consecutive_failures')]
+    out += [get_float('air_temp'), get_float('air_humit')]
+    for i in range(se.GPU_COUNT):
+        out.append(c.get(f'gpu_name_{i}'))
+        out += [get_float(f'gpu_{k}_{i}') for k in ('curr_mem', 'max_mem', 'temp', 'curr_pwr', 'max_pwr')]
+    out.append(get_float('cpu_usage'))
+    for i in range(se.CPU_COUNT):
+        out += [get_float(f'cpu_temp_{i}'), get_float(f'cpu_curr_pwr_{i}')]
+    out += [get_float('mem_total'), get_float('mem_available'), get_float('mem_usage')]
+    out += [get_int(k) for k in c.keys('nic_*_stat')]
+    if c.exists('ib_nic_temp'):
+        out.append(get_float('ib_nic_temp'))
+    for k in c.keys('nvme_*_temp'):
+        i = k.split('_')[1]
+        out += [c.get(f'nvme_{i}_name'), get_float(k)]
+    out.append(1 if c.exists('host_ttl') else get_int('host_stat'))
+    out.append(c.hgetall('crawler_timing'))
+    return out
+
+
+def fetch_plan_collect():
+    return list(se.DLCCollector().collect())
+
+
+def run(label, fn, proxy, scrapes):
+    fn()                                   # warm-up
+    proxy.count = 0
+    t0 = time.perf_counter()
+    for _ in range(scrapes):
+        fn()
+    ms = (time.perf_counter() - t0) / scrapes * 1000
+    print(f"{label:<28} {ms:8.2f} ms/scrape  {proxy.count / scrapes:6.1f} round trips/scrape")
+    return ms
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--gpus', type=int, default=8)
+    ap.add_argument('--nvme', type=int, default=16)
+    ap.add_argument('--nics', type=int, default=10)
+    ap.add_argument('--rtt-ms', type=float, default=0.2, help='added per round trip (fakeredis only)')
+    ap.add_argument('--scrapes', type=int, default=50)
+    ap.add_argument('--redis', action='store_true', help='local Redis (db 15, flushed) instead of fakeredis')
+    args = ap.parse_args()
+
+    if args.redis:
+        import redis
+        rd, rtt = redis.StrictRedis(db=15, decode_responses=True), 0.0
+    else:
+        import fakeredis
+        rd, rtt = fakeredis.FakeStrictRedis(decode_responses=True), args.rtt_ms / 1000.0
+    populate(rd, args.gpus, args.nvme, args.nics)
+    proxy = RoundTrips(rd, rtt)
+    se.client = proxy
+    se.GPU_COUNT = args.gpus
+    se.CHANNELS = COOLANT_CHANNELS['dg5r']
+
+    print(f"{args.gpus} GPUs, {args.nvme} NVMe, {args.nics} NICs; "
+          f"{'local Redis' if args.redis else f'fakeredis + {args.rtt_ms} ms/round trip'}")
+    before = run('per-key (previous)', sequential_collect, proxy, args.scrapes)
+    after = run('fetch plan (pipeline + MGET)', fetch_plan_collect, proxy, args.scrapes)
+    print(f"speedup x{before / after:.1f}")
+
+
+if __name__ == '__main__':
+    main()
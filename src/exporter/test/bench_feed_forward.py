@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Peak outlet temperature on a load step — fan curve alone vs curve + feed-forward.
+
+Replays a host power trace through pcb_control's real controller (make_controller on
+pcb_config.yaml, feed_forward off, then on) closed-loop against a lumped model of the
+coolant loop, at the crawler's 1 s cycle:
+
+  coolant bulk   C dT/dt = P - UA(duty) (T - T_air)
+  outlet NTC     T_bulk + P / (mdot cp), seen through transport_s delay and a
+                 first-order ntc_tau_s sensor lag (this is what the curve reads)
+
+--trace takes a CSV recorded from the host (columns t,watts: seconds, total CPU+GPU
+power, e.g. the sum of the gpu/cpu power series from sensor_exporter); the default
+is a 600 W -> 3600 W step held for 10 minutes. Reports peak outlet (true and as
+measured), time above --limit, and mean duty as the airflow cost.
+
+    cd src/exporter && python3 test/bench_feed_forward.py [--trace load.csv] [--limit 45]
+"""
+import argparse
+import copy
+import csv
+import os
+import sys
+from collections import deque
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+import data_crawler  # noqa: E402
+import pcb_control  # noqa: E402
+import pcb_driver  # noqa: E402
+import redis_keys as K  # noqa: E402
+
+DT = 0.1               # plant integration step (s)
+CYCLE_S = 1.0          # controller cadence (loop.cycle_seconds)
+GPUS = 8
+
+
+def step_trace(idle_w=600.0, load_w=3600.0, t_step=60.0, hold_s=600.0, tail_s=300.0):
+    return [(0.0, idle_w), (t_step, load_w), (t_step + hold_s, idle_w), (t_step + hold_s + tail_s, idle_w)]
+
+
+def load_trace(path):
+    with open(path) as f:
+        rows = [(float(r['t']), float(r['watts'])) for r in csv.DictReader(f)]
+    t0 = rows[0][0]
+    return [(t - t0, w) for t, w in rows]
+
+
+def watts_at(trace, t):
+    """Sample-and-hold, as the host publishes once a second."""
+    w = trace[0][1]
+    for tt, ww in trace:
+        if tt > t:
+            break
+        w = ww
+    return w
+
+
+class Plant:
+
+    def __init__(self, args):
+        self.a = args
+        self.bulk = args.t_air + 3.0
+        self.ntc = None
+        self._delay = deque([None] * max(1, int(args.transport_s / DT)))
+
+    def ua(self, duty):
+        frac = max(0.0, min(1.0, duty / 1000.0))
+        return self.a.ua_min + (self.a.ua_max - self.a.ua_min) * frac ** 0.8
+
+    def step(self, watts, duty):
+        a = self.a
+        self.bulk += (watts - self.ua(duty) * (self.bulk - a.t_air)) / a.heat_capacity * DT
+        outlet = self.bulk + watts / a.mdot_cp
+        self._delay.append(outlet)
+        seen = self._delay.popleft()
+        seen = outlet if seen is None else seen
+        self.ntc = seen if self.ntc is None else self.ntc + (seen - self.ntc) * DT / a.ntc_tau_s
+        return outlet
+
+
+class FakePCB:
+    def __init__(self):
+        self.hr = {}
+
+    def write_registers(self, address, values):
+        for i, v in enumerate(values):
+            self.hr[address + i] = v
+
+
+class DictRedis:
+    def __init__(self):
+        self.d = {}
+
+    def mget(self, keys):
+        return [self.d.get(k) for k in keys]
+
+
+def run(cfg, trace, args, feed_forward):
+    cfg = copy.deepcopy(cfg)
+    cfg.setdefault('feed_forward', {})['enabled'] = feed_forward
+    controller = pcb_control.make_controller(cfg)
+    zone = next(z for z in controller.zones if z.channels and min(z.channels) > 4)
+    hr = pcb_driver.hr_pwm_duty(zone.channels[0])
+    plant, pcb, rd = Plant(args), FakePCB(), DictRedis()
+    duty = zone.curve.table[0]
+    t, next_cycle = 0.0, 0.0
+    peak = peak_seen = 0.0
+    above = duty_sum = cycles = 0
+    end = trace[-1][0]
+    while t <= end:
+        watts = watts_at(trace, t)
+        outlet = plant.step(watts, duty)
+        peak = max(peak, outlet)
+        if outlet > args.limit:
+            above += 1
+        if t >= next_cycle:
+            rd.d[K.COOLANT_TEMP_OUTLET1] = f'{plant.ntc:.1f}'
+            for i in range(GPUS):
+                rd.d[f'gpu_curr_pwr_{i}'] = f'{watts / GPUS:.1f}'
+            controller.update(pcb, rd, now=t)
+            duty = pcb.hr.get(hr, duty)
+            peak_seen = max(peak_seen, plant.ntc)
+            duty_sum += duty
+            cycles += 1
+            next_cycle += CYCLE_S
+        t += DT
+    return peak, peak_seen, above * DT, duty_sum / cycles
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--trace', help='CSV with columns t,watts (default: 600 -> 3600 W step)')
+    ap.add_argument('--limit', type=float, default=45.0, help='outlet C counted as "too hot"')
+    ap.add_argument('--t-air', type=float, default=25.0)
+    ap.add_argument('--heat-capacity', type=float, default=40000.0, help='J/K, coolant + cold plates')
+    ap.add_argument('--mdot-cp', type=float, default=560.0, help='W/K, ~8 L/min of water')
+    ap.add_argument('--ua-min', type=float, default=40.0, help='W/K radiator at duty 0')
+    ap.add_argument('--ua-max', type=float, default=300.0, help='W/K radiator at duty 1000')
+    ap.add_argument('--transport-s', type=float, default=8.0)
+    ap.add_argument('--ntc-tau-s', type=float, default=10.0)
+    args = ap.parse_args()
+
+    cfg = data_crawler._load_yaml(data_crawler.PCB_CONFIG_PATH)
+    trace = load_trace(args.trace) if args.trace else step_trace()
+    ff = pcb_control.FeedForward.from_config(dict(cfg, feed_forward=dict(cfg.get('feed_forward') or {},
+                                                                          enabled=True)), [])
+    print(f"trace: {args.trace or 'built-in step'} ({trace[-1][0]:.0f} s, {min(w for _, w in trace):.0f}"
+          f"~{max(w for _, w in trace):.0f} W); feed_forward idle {ff.idle_w:.0f} W, full {ff.full_w:.0f} W, "
+          f"gain {ff.gain_duty}, lead {ff.lead_duty}, lag {ff.lag_s:.0f} s")
+    print(f"{'':<22}{'peak outlet':>12}{'peak NTC':>10}{'s > ' + format(args.limit, 'g') + ' C':>10}{'mean duty':>11}")
+    for label, on in (('fan curve', False), ('curve + feed-forward', True)):
+        peak, seen, above, mean_duty = run(cfg, trace, args, on)
+        print(f"{label:<22}{peak:>11.1f}C{seen:>9.1f}C{above:>10.0f}{mean_duty:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
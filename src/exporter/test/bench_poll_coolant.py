@@ -0,0 +1,77 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""ms per poll_coolant() — scalar path (30 x GetAll) vs LegacyCoolantEngine.
+
+Runs on the real ADS1256 when present; otherwise on a fake ADC that costs
+CH_READ_MS per channel conversion (SPI + DRDY wait, measured ~0.5 ms on a Pi 4).
+
+    cd src/exporter && python3 test/bench_poll_coolant.py [ch_read_ms] [calls]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+import dlc_sensors  # noqa: E402
+
+CH_READ_MS = float(sys.argv[1]) if len(sys.argv) > 1 else 0.5
+CALLS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+class FakeADS1256:
+    """Mid-scale NTCs, dry leak sensor, level OK."""
+    CODES = [0x300000, 0x300000, 0x2a0000, 0x2b0000, 0x2c0000, 0x2d0000, 0x100000, 0x600000]
+
+    def ADS1256_GetChannalValue(self, ch):
+        t_end = time.perf_counter() + CH_READ_MS / 1000.0
+        while time.perf_counter() < t_end:
+            pass
+        return self.CODES[ch]
+
+    def ADS1256_GetAll(self):
+        return [self.ADS1256_GetChannalValue(ch) for ch in range(8)]
+
+
+class NullPipe:
+    def set(self, *a, **kw):
+        pass
+
+    def delete(self, *a):
+        pass
+
+    def execute(self):
+        pass
+
+
+class NullRedis:
+    def pipeline(self, transaction=False):
+        return NullPipe()
+
+
+def bench(label):
+    rd = NullRedis()
+    dlc_sensors.poll_coolant(rd)   # warm-up (LUT build)
+    t0 = time.perf_counter()
+    for _ in range(CALLS):
+        dlc_sensors.poll_coolant(rd)
+    ms = (time.perf_counter() - t0) / CALLS * 1000
+    print(f"{label:<28} {ms:8.1f} ms/call")
+
+
+if __name__ == '__main__':
+    if not dlc_sensors._ADC_AVAILABLE:
+        dlc_sensors._ADC = FakeADS1256()
+        dlc_sensors._ADC_AVAILABLE = True
+        print(f"fake ADS1256, {CH_READ_MS} ms/channel, machine={dlc_sensors.MACHINE}")
+    if dlc_sensors.MACHINE not in dlc_sensors.COOLANT_CHANNELS:
+        dlc_sensors.MACHINE = os.environ.get('BENCH_MACHINE', 'dg5r')   # no config.ini
+    channels = dlc_sensors.COOLANT_CHANNELS.get(dlc_sensors.MACHINE, {})
+    print(f"NTC channels: {channels}")
+
+    dlc_sensors._HAS_NP = False          # forces the scalar path
+    bench("before (scalar, GetAll)")
+    dlc_sensors._HAS_NP = True
+    bench("after (engine, LUT)")
+    temps, leak, level = dlc_sensors.legacy_engine().read()
+    print(f"engine: {temps} leak={leak} level={level}")
+    print(f"scalar: {dlc_sensors._read_coolant_scalar()}")
@@ -0,0 +1,13 @@
+"""pytest setup for the unit tests (test_*.py) — the exporter modules live one level up.
+
+    cd src/exporter && python3 -m pytest -q test
+
+The other scripts here (bench_*, pcb_emulator, the *_test.py hardware checks) are run
+by hand and are not collected.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+collect_ignore_glob = ['*_test.py', 'redis_test2.py', 'bench_*.py']
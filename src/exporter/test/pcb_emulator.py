@@ -0,0 +1,256 @@
+#!/usr/bin/python3
+# -*- coding: utf-8 -*-
+"""Software control board (Gen3) — Modbus RTU slave on a pseudo-terminal.
+
+Implements the pcb_driver register map (IR 0, 13~39, HR 0~15; FC03/04/06/16) behind
+a pty, so PCBDriver, FanCurveController and data_crawler run unmodified with
+modbus.port pointed at PCBEmulator.port. Addresses past IR 39 / HR 15 answer with
+exception 02; reserved IR 1~12 read as 0, or also raise 02 with strict=True (the
+firmware case modbus.read_gap: 0 exists for).
+
+Board model: IR 0 counts seconds since power-on; fan tach follows the written duty;
+outlet NTCs cool with fan duty and heat with `load`; the leak AIN reads dry (3.30 V)
+unless `leak` is set; DIN bit 0 (level) is OK. HR is not flash-persisted: a power
+cycle zeroes it, as on Rev_C.
+
+Wire/fault knobs: `baud` paces every frame at 10 bits/byte (a pty itself has no
+baud rate), `latency_ms` adds slave turnaround, `drop_rate` silently drops a share of
+requests (client timeout), power_off()/`off_every`+`off_for` stop answering for a
+while.
+
+    cd src/exporter && python3 test/pcb_emulator.py [--baud 9600] [--latency-ms 2]
+      -> prints the pty path to put in pcb_config.yaml modbus.port
+
+The frame handling is a small RTU slave on the pty master rather than a pymodbus
+server: the pymodbus server datastore API is being replaced (deprecated in 3.x,
+removed in v4), while the client side under test is the real pymodbus client.
+"""
+import argparse
+import math
+import os
+import random
+import select
+import struct
+import threading
+import time
+import tty
+
+IR_COUNT = 40                # IR 0~39
+HR_COUNT = 16                # HR 0~15
+_IR_VALID = {0} | set(range(13, IR_COUNT))
+
+_DRY_LEAK_REG = 330          # 3.30 V
+_WET_LEAK_REG = 40
+
+
+def crc16(data):
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return struct.pack('<H', crc)
+
+
+class PCBEmulator:
+
+    def __init__(self, slaves=(1,), baud=115200, latency_ms=0.0, drop_rate=0.0,
+                 off_every=0.0, off_for=0.0, load=0.5, fan_max_rpm=3000, strict=False, seed=None):
+        self.slaves = set(slaves)
+        self.baud = int(baud)
+        self.latency_s = float(latency_ms) / 1000.0
+        self.drop_rate = float(drop_rate)
+        self.off_every = float(off_every)
+        self.off_for = float(off_for)
+        self.load = float(load)
+        self.fan_max_rpm = fan_max_rpm
+        self.strict = strict
+        self.leak = False
+        self.requests = 0            # frames addressed to us (answered or not)
+        self.dropped = 0
+        self.fc_counts = {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._off_until = 0.0
+        self._started = time.monotonic()
+        self._was_off = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._boot()
+        self._master, slave_fd = os.openpty()
+        tty.setraw(slave_fd)
+        self.port = os.ttyname(slave_fd)
+        self._slave_fd = slave_fd    # keep the pty alive between client reconnects
+
+    # ── board state ────────────────────────────────────────────────
+    def _boot(self):
+        self.hr = [0] * HR_COUNT
+        self._boot_at = time.monotonic()
+
+    def power_off(self, seconds):
+        """No answers for `seconds`; HR is cleared when power returns."""
+        with self._lock:
+            self._off_until = time.monotonic() + seconds
+
+    def _powered(self, now):
+        if self.off_every > 0 and self.off_for > 0:
+            phase = (now - self._started) % (self.off_every + self.off_for)
+            if phase >= self.off_every:
+                self._was_off = True
+                return False
+        if now < self._off_until:
+            self._was_off = True
+            return False
+        if self._was_off:
+            self._was_off = False
+            self._boot()
+        return True
+
+    def _input_registers(self, now):
+        ir = [0] * IR_COUNT
+        ir[0] = int(now - self._boot_at) & 0xFFFF
+        duties = self.hr[0:12]
+        for ch in range(5, 13):
+            rpm = self.fan_max_rpm * duties[ch - 1] / 1000.0
+            ir[13 + ch - 1] = int(rpm / 30)                 # 2 pulses/rev
+        ir[25] = 0b000001                                    # DIN1 = level OK
+        fan = sum(duties[4:12]) / 8000.0
+        drift = 0.5 * math.sin(now / 30.0)
+        inlet = 30.0 + drift
+        outlet = inlet + 2.0 + 15.0 * self.load * (1.2 - fan)
+        for i, t in enumerate((inlet, outlet, outlet - 0.3, inlet + 0.2)):
+            ir[28 + i] = int(round(t * 10)) & 0xFFFF
+        ir[32:40] = [330] * 8
+        ir[39] = _WET_LEAK_REG if self.leak else _DRY_LEAK_REG
+        return ir
+
+    # ── RTU ────────────────────────────────────────────────────────
+    def start(self):
+        self._started = time.monotonic()
+        self._thread = threading.Thread(target=self._serve, name='pcb-emulator', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(1.0)
+        for fd in (self._master, self._slave_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _wire(self, nbytes):
+        if self.baud:
+            time.sleep(nbytes * 10.0 / self.baud)
+
+    def _serve(self):
+        buf = b''
+        while not self._stop.is_set():
+            r, _, _ = select.select([self._master], [], [], 0.05)
+            if not r:
+                buf = b''            # inter-frame silence: resync
+                continue
+            try:
+                buf += os.read(self._master, 256)
+            except OSError:
+                continue
+            while True:
+                n = self._frame_len(buf)
+                if n is None or len(buf) < n:
+                    break
+                frame, buf = buf[:n], buf[n:]
+                self._handle(frame)
+
+    @staticmethod
+    def _frame_len(buf):
+        if len(buf) < 2:
+            return None
+        if buf[1] in (3, 4, 6):
+            return 8
+        if buf[1] == 16:
+            return 9 + buf[6] if len(buf) >= 7 else None
+        return len(buf)              # unknown FC: take it all, answer 01
+
+    def _handle(self, frame):
+        if len(frame) < 4 or crc16(frame[:-2]) != frame[-2:]:
+            return
+        slave, fc = frame[0], frame[1]
+        if slave not in self.slaves:
+            return
+        self._wire(len(frame))
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            self.fc_counts[fc] = self.fc_counts.get(fc, 0) + 1
+            if not self._powered(now) or (self.drop_rate and self._rng.random() < self.drop_rate):
+                self.dropped += 1
+                return
+            pdu = self._execute(fc, frame[2:-2], now)
+        if self.latency_s:
+            time.sleep(self.latency_s)
+        reply = bytes([slave]) + pdu
+        reply += crc16(reply)
+        self._wire(len(reply))
+        os.write(self._master, reply)
+
+    def _execute(self, fc, data, now):
+        def exc(code):
+            return bytes([fc | 0x80, code])
+
+        if fc in (3, 4):
+            addr, count = struct.unpack('>HH', data[:4])
+            if not 1 <= count <= 125:
+                return exc(3)
+            addrs = range(addr, addr + count)
+            if fc == 4:
+                if addr + count > IR_COUNT or (self.strict and any(a not in _IR_VALID for a in addrs)):
+                    return exc(2)
+                regs = self._input_registers(now)
+            else:
+                if addr + count > HR_COUNT:
+                    return exc(2)
+                regs = self.hr
+            values = [regs[a] for a in addrs]
+            return bytes([fc, 2 * count]) + struct.pack(f'>{count}H', *values)
+        if fc == 6:
+            addr, value = struct.unpack('>HH', data[:4])
+            if addr >= HR_COUNT:
+                return exc(2)
+            self.hr[addr] = value
+            return bytes([fc]) + data[:4]
+        if fc == 16:
+            addr, count, nbytes = struct.unpack('>HHB', data[:5])
+            if addr + count > HR_COUNT or nbytes != 2 * count:
+                return exc(2)
+            self.hr[addr:addr + count] = struct.unpack(f'>{count}H', data[5:5 + nbytes])
+            return bytes([fc]) + data[:4]
+        return exc(1)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    ap.add_argument('--slave', type=int, action='append', help='slave id (repeatable, default 1)')
+    ap.add_argument('--baud', type=int, default=115200)
+    ap.add_argument('--latency-ms', type=float, default=0.0)
+    ap.add_argument('--drop-rate', type=float, default=0.0)
+    ap.add_argument('--off-every', type=float, default=0.0, help='power off after N s on ...')
+    ap.add_argument('--off-for', type=float, default=0.0, help='... for M s, repeating')
+    ap.add_argument('--load', type=float, default=0.5)
+    ap.add_argument('--strict', action='store_true', help='reject reads of reserved IR 1~12')
+    args = ap.parse_args()
+    emu = PCBEmulator(slaves=args.slave or [1], baud=args.baud, latency_ms=args.latency_ms,
+                      drop_rate=args.drop_rate, off_every=args.off_every, off_for=args.off_for,
+                      load=args.load, strict=args.strict).start()
+    print(f"PCB emulator on {emu.port} (slave {sorted(emu.slaves)}, {emu.baud} baud)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"requests={emu.requests} dropped={emu.dropped} fc={emu.fc_counts} hr={emu.hr}")
+    except KeyboardInterrupt:
+        emu.stop()
+
+
+if __name__ == '__main__':
+    main()
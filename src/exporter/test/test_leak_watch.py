@@ -0,0 +1,55 @@
+"""leak_watch.LeakDebouncer: confirm / clear holds, sample slack, failed reads."""
+from leak_watch import LeakDebouncer
+
+
+def feed(d, samples, period):
+    """[(raw, ...)] at period s -> [(time, transition)] of the confirmed transitions."""
+    out = []
+    for i, raw in enumerate(samples):
+        change = d.step(raw, i * period)
+        if change is not None:
+            out.append((round(i * period, 3), change[0]))
+    return out
+
+
+def test_dry_at_start_is_decided_at_once():
+    d = LeakDebouncer(0.2, 2.0)
+    assert d.step(0, 0.0) == (0, 0.0)
+    assert d.state == 0
+
+
+def test_leak_at_start_still_needs_the_confirm_hold():
+    d = LeakDebouncer(0.2, 2.0)
+    assert feed(d, [1, 1, 1], 0.1) == [(0.2, 1)]
+
+
+def test_confirm_hold_with_half_a_sample_of_slack():
+    # 200 ms at 100 ms sampling = 3 samples; slack lets the 3rd (at +0.2 - jitter) count
+    d = LeakDebouncer(0.2, 2.0, slack_s=0.05)
+    d.step(0, 0.0)
+    assert d.step(1, 0.1) is None
+    assert d.step(1, 0.2) is None
+    assert d.step(1, 0.29) == (1, 0.1)
+
+
+def test_short_blip_is_not_a_leak():
+    d = LeakDebouncer(0.2, 2.0)
+    assert feed(d, [0, 1, 1, 0, 1, 1, 0], 0.1) == [(0.0, 0)]
+    assert d.state == 0
+
+
+def test_clear_needs_the_longer_hold():
+    d = LeakDebouncer(0.2, 2.0, slack_s=0.05)
+    samples = [1] * 3 + [0] * 19 + [1] + [0] * 21
+    # leak at 0.2 s; 1.8 s of dry is not enough, the blip at 2.2 s restarts the clear
+    # hold: cleared by the first sample >= 2.3 + 2.0 - slack
+    assert feed(d, samples, 0.1) == [(0.2, 1), (4.3, 0)]
+
+
+def test_failed_reads_are_ignored():
+    d = LeakDebouncer(0.2, 2.0)
+    d.step(0, 0.0)
+    assert d.step(None, 0.1) is None
+    d.step(1, 0.2)
+    assert d.step(None, 0.3) is None
+    assert d.step(1, 0.4) == (1, 0.2)
@@ -0,0 +1,77 @@
+"""pcb_control.CurveTable / FanZone: table ends, hysteresis play band, write deadband."""
+import pytest
+
+import pcb_control
+import pcb_driver
+from pcb_control import CurveTable, FanZone
+
+
+class Recorder:
+    """Stands in for PCBDriver: keeps the queued duty writes."""
+
+    def __init__(self):
+        self.writes = []
+
+    def write_registers(self, address, values):
+        self.writes.append((address, list(values)))
+
+
+def test_curve_holds_the_end_duties():
+    c = CurveTable([(30, 200), (60, 1000)])
+    assert c.duty(0) == 200 and c.duty(30) == 200
+    assert c.duty(45) == 600
+    assert c.duty(60) == 1000 and c.duty(99) == 1000
+    assert (c.min_duty, c.max_duty) == (200, 1000)
+
+
+def test_curve_is_indexed_by_tenths():
+    c = CurveTable([(30, 200), (40, 1200)])      # clipped to 1000
+    assert c.duty(30.04) == 200 and c.duty(30.06) == 210
+    assert c.duty(40) == 1000
+
+
+def test_curve_rejects_bad_points():
+    with pytest.raises(ValueError):
+        CurveTable([(30, 200)])
+    with pytest.raises(ValueError):
+        CurveTable([(30, 200), (30, 400)])
+
+
+def zone(hysteresis_c=0.0, channels=(5, 6, 7)):
+    return FanZone('fans', channels, ['t'], CurveTable([(30, 200), (60, 1000)]), hysteresis_c)
+
+
+def test_hysteresis_rises_at_once_and_falls_after_the_band():
+    z = zone(hysteresis_c=2.0)
+    assert z._effective(40) == 40
+    assert z._effective(41) == 41
+    assert z._effective(39.5) == 41          # inside the play band
+    assert z._effective(39) == 41            # exactly hysteresis_c below: still held
+    assert z._effective(38.9) == pytest.approx(40.9)
+
+
+def test_deadband_boundary():
+    z, pcb = zone(), Recorder()
+    z.update(pcb, {'t': 45})                 # 600
+    n = len(pcb.writes)
+    step = pcb_control._WRITE_DEADBAND * 30 / 800          # C per deadband
+    z.update(pcb, {'t': 45 + step - 0.1})    # 603: inside the deadband, held
+    assert len(pcb.writes) == n
+    z.update(pcb, {'t': 45 + step})          # exactly the deadband: written
+    assert len(pcb.writes) == n + 1 and z._last_written == 600 + pcb_control._WRITE_DEADBAND
+
+
+def test_deadband_still_reaches_the_clamp():
+    z, pcb = zone(), Recorder()
+    z.update(pcb, {'t': 59.9})               # 997
+    z.update(pcb, {'t': 70})                 # +3 < deadband, but it is the max duty
+    assert z._last_written == 1000
+    n = len(pcb.writes)
+    z.update(pcb, {'t': 80})
+    assert len(pcb.writes) == n
+
+
+def test_contiguous_channels_are_one_run_and_missing_input_idles():
+    z, pcb = zone(channels=(5, 6, 8)), Recorder()
+    z.update(pcb, {'t': 'bad'})
+    assert pcb.writes == [(pcb_driver.hr_pwm_duty(5), [200, 200]), (pcb_driver.hr_pwm_duty(8), [200])]
@@ -0,0 +1,95 @@
+"""pcb_driver.plan_blocks / CommandQueue / overrides — no serial port is opened."""
+import pcb_driver
+from pcb_driver import PRIO_CONFIG, PRIO_SAFETY, CommandQueue, plan_blocks
+
+
+def test_plan_blocks_gap_zero_reads_only_mapped_registers():
+    assert plan_blocks({0, 17, 18, 25}) == [(0, 1), (17, 2), (25, 1)]
+    assert plan_blocks({3, 4, 5}, 0) == [(3, 3)]
+
+
+def test_plan_blocks_merges_within_the_gap():
+    assert plan_blocks({0, 17, 18, 25}, 16) == [(0, 26)]
+    assert plan_blocks({0, 17}, 15) == [(0, 1), (17, 1)]    # 16 unused registers between
+    assert plan_blocks({0, 17}, 16) == [(0, 18)]
+
+
+def test_plan_blocks_respects_max_count():
+    assert plan_blocks({0, 1, 2, 3}, 0, max_count=3) == [(0, 3), (3, 1)]
+    assert plan_blocks([]) == []
+
+
+def test_queue_coalesces_a_register_and_keeps_the_first_enqueue():
+    q = CommandQueue()
+    q.put(5, 100)
+    t0 = q._pending[5][2]
+    q.put(5, 200)
+    assert q.depth() == 1 and q.coalesced == 1
+    assert q._pending[5] == (200, PRIO_SAFETY, t0)
+
+
+def test_queue_merges_adjacent_writes_into_one_run():
+    q = CommandQueue()
+    for addr, v in ((6, 60), (4, 40), (5, 50), (9, 90)):
+        q.put(addr, v)
+    assert q.runs() == [(PRIO_SAFETY, 4, [40, 50, 60]), (PRIO_SAFETY, 9, [90])]
+
+
+def test_queue_drains_safety_before_config():
+    q = CommandQueue()
+    q.put(pcb_driver.HR_PWM_FREQ_TIM1, 1000)
+    q.put(pcb_driver.hr_pwm_duty(1), 600)
+    assert [(p, a) for p, a, _ in q.runs()] == [(PRIO_SAFETY, 0), (PRIO_CONFIG, 12)]
+    # adjacent but different priority: not one run
+    q.put(pcb_driver.hr_pwm_duty(12), 500)
+    assert (PRIO_SAFETY, 11, [500]) in q.runs()
+
+
+def test_queue_done_keeps_a_write_superseded_on_the_wire():
+    q = CommandQueue()
+    q.put(3, 10)
+    (_, start, values), = q.runs()
+    q.put(3, 20)                     # arrives while [10] is being written
+    q.done(start, values)
+    assert q.last_written[3] == 10
+    assert q.runs() == [(PRIO_SAFETY, 3, [20])]
+    q.done(3, [20])
+    assert q.depth() == 0 and q.written == 1 and q.transactions == 2
+
+
+def driver(tmp_path):
+    cfg = {'modbus': {'port': '/dev/null', 'baud': 115200, 'slave': 1,
+                      'lock_cache': str(tmp_path / 'pcb_lock.json')}}
+    return pcb_driver.PCBDriver(cfg)
+
+
+def test_override_beats_a_queued_write(tmp_path):
+    d = driver(tmp_path)
+    pump = pcb_driver.hr_pwm_duty(1)
+    d.write_register(pump, 600)
+    d.set_overrides({pump: 0})
+    assert d.queue.runs()[0] == (PRIO_SAFETY, pump, [0])
+    d.write_register(pump, 800)                      # control write while interlocked
+    assert d.queue._pending[pump][0] == 0
+    d.release_overrides({pump: 600})
+    assert d.queue._pending[pump][0] == 800          # the held value, not the fallback
+
+
+def test_release_falls_back_when_nobody_wrote(tmp_path):
+    d = driver(tmp_path)
+    d.set_overrides({pcb_driver.HR_DOUT_BITMASK: 1})
+    d.release_overrides({pcb_driver.HR_DOUT_BITMASK: 0})
+    assert d.queue._pending[pcb_driver.HR_DOUT_BITMASK][0] == 0
+
+
+def test_leak_fastpath_plan_switch_waits_for_the_bus_thread(tmp_path):
+    d = driver(tmp_path)
+    d.cfg['wiring'] = {'ain': {'leak_ch': 1}}
+    d.set_config(d.cfg)
+    leak_reg = pcb_driver.IR_VOLTAGE_BASE
+    in_plan = lambda: any(s <= leak_reg < s + n for s, n in d._ir_blocks)  # noqa: E731
+    assert in_plan()
+    d.request_leak_fastpath(True)
+    assert in_plan() and not d.leak_fastpath
+    d.sync_read_plan()
+    assert not in_plan() and d.leak_fastpath
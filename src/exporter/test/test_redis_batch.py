@@ -0,0 +1,96 @@
+"""redis_batch.ChangePublisher / CycleBatch: change filter, forced refresh, generation."""
+import fakeredis
+
+import redis_batch
+import redis_keys as K
+
+
+def writes(**kv):
+    return {k: (v, None) for k, v in kv.items()}
+
+
+def test_filter_drops_unchanged_writes():
+    pub = redis_batch.ChangePublisher(refresh_every=10)
+    out, changed = pub.filter(writes(a=1, b=2))          # first commit is a full refresh
+    assert set(out) == {'a', 'b'} and set(changed) == {'a', 'b'}
+    out, changed = pub.filter(writes(a=1, b=3))
+    assert set(out) == {'b'} and set(changed) == {'b'}
+    assert pub.suppressed == 1
+
+
+def test_filter_compares_the_stored_string():
+    pub = redis_batch.ChangePublisher()
+    pub.filter(writes(a=1))
+    out, _ = pub.filter(writes(a='1'))
+    assert out == {}
+
+
+def test_refresh_every_n_commits_and_on_demand():
+    pub = redis_batch.ChangePublisher(refresh_every=3)
+    pub.filter(writes(a=1))
+    assert pub.filter(writes(a=1))[0] == {}
+    assert pub.filter(writes(a=1))[0] == {}
+    out, changed = pub.filter(writes(a=1))               # 3rd commit since the refresh
+    assert set(out) == {'a'} and changed == {}
+    assert pub.filter(writes(a=1))[0] == {}
+    pub.force_refresh()
+    assert set(pub.filter(writes(a=1))[0]) == {'a'}
+
+
+def test_expiring_writes_always_go_through():
+    pub = redis_batch.ChangePublisher()
+    pub.filter({'ttl': (1, 7)})
+    out, changed = pub.filter({'ttl': (1, 7)})
+    assert set(out) == {'ttl'} and changed == {}
+
+
+def test_delete_is_a_change_once():
+    pub = redis_batch.ChangePublisher()
+    pub.filter(writes(a=1))
+    out, changed = pub.filter({'a': redis_batch._DELETE})
+    assert set(out) == {'a'} and set(changed) == {'a'}
+    assert pub.filter({'a': redis_batch._DELETE})[0] == {}
+
+
+def commit(rd, pub, **kv):
+    batch = redis_batch.CycleBatch(rd, (), pub)
+    for k, v in kv.items():
+        batch.set(k, v)
+    batch.hset(K.CRAWLER_TIMING, {'cycles': 1})
+    batch.commit()
+    return rd.get(K.PI_GENERATION)
+
+
+def test_generation_moves_only_with_a_changed_key():
+    rd = fakeredis.FakeStrictRedis(decode_responses=True)
+    pub = redis_batch.ChangePublisher(refresh_every=2)
+    assert commit(rd, pub, a=1) == '1'
+    assert commit(rd, pub, a=1) == '1'           # timing hash + periodic refresh only
+    assert commit(rd, pub, a=2) == '2'
+    assert rd.hget(K.LAST_CHANGED, 'a') is not None
+
+
+def test_set_members_are_one_value_to_the_filter():
+    rd = fakeredis.FakeStrictRedis(decode_responses=True)
+    pub = redis_batch.ChangePublisher(refresh_every=100)
+    for members in (('x', 'y'), ('y', 'x')):
+        batch = redis_batch.CycleBatch(rd, (), pub)
+        batch.delete('idx')
+        batch.sadd('idx', *members)
+        batch.commit()
+    assert rd.get(K.PI_GENERATION) == '1'
+    assert rd.smembers('idx') == {'x', 'y'}
+
+
+def test_absorb_keeps_the_newer_write():
+    rd = fakeredis.FakeStrictRedis(decode_responses=True)
+    older = redis_batch.CycleBatch(rd)
+    older.set('a', 1)
+    older.set('b', 1)
+    newer = redis_batch.CycleBatch(rd)
+    newer.set('a', 2)
+    newer.absorb(older)
+    newer.commit()
+    assert rd.mget('a', 'b') == ['2', '1']
+    older.set('c', 3)                             # late write to the absorbed batch
+    assert rd.get('c') == '3'
@@ -0,0 +1,87 @@
+"""Rolling min / max / mean / count per series — what happened between two scrapes.
+
+Prometheus scrapes every 15 s or more while the crawlers publish at 1 Hz, so a GPU
+power spike or a fan RPM dip between scrapes never reaches a dashboard.
+sensor_exporter feeds every 1 s snapshot of its fast-moving series into a
+WindowStats and exports the statistics of the last window_s (set it to the scrape
+interval) next to the latest value:
+
+  dlc_system_sensor_window{..., stat="min|max|avg|count"}
+
+A window (not "since the last scrape") keeps the numbers identical for every
+client polling :9003. Each series keeps window_s / bucket_s buckets of
+(min, max, sum, count) in flat arrays; adding a sample is O(1), reading the window
+O(buckets). A series with no sample in the window is dropped.
+"""
+import math
+import threading
+from array import array
+
+DEFAULT_WINDOW_S = 15.0
+DEFAULT_BUCKET_S = 1.0
+
+
+class _Series:
+    __slots__ = ('slot', 'mins', 'maxs', 'sums', 'counts')
+
+    def __init__(self, n):
+        self.slot = array('q', [-1]) * n          # bucket start (in buckets) held by each entry
+        self.mins = array('d', [0.0]) * n
+        self.maxs = array('d', [0.0]) * n
+        self.sums = array('d', [0.0]) * n
+        self.counts = array('I', [0]) * n
+
+
+class WindowStats:
+    """{series key: rolling (min, max, mean, count)} over the last window_s."""
+
+    def __init__(self, window_s=DEFAULT_WINDOW_S, bucket_s=DEFAULT_BUCKET_S):
+        self.bucket_s = float(bucket_s)
+        self.n = max(1, int(round(window_s / self.bucket_s)))
+        self.window_s = self.n * self.bucket_s
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def add(self, key, value, now):
+        """One sample of series key at now (s, any monotonic clock); NaN is ignored."""
+        if value is None or math.isnan(value):
+            return
+        slot = int(now // self.bucket_s)
+        i = slot % self.n
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series(self.n)
+            if s.slot[i] != slot:
+                s.slot[i] = slot
+                s.mins[i] = s.maxs[i] = s.sums[i] = value
+                s.counts[i] = 1
+                return
+            if value < s.mins[i]:
+                s.mins[i] = value
+            if value > s.maxs[i]:
+                s.maxs[i] = value
+            s.sums[i] += value
+            s.counts[i] += 1
+
+    def stats(self, now):
+        """[(key, min, max, mean, count)] over the buckets inside the window ending at now."""
+        oldest = int(now // self.bucket_s) - self.n + 1
+        out, idle = [], []
+        with self._lock:
+            for key, s in self._series.items():
+                lo, hi, total, count = math.inf, -math.inf, 0.0, 0
+                for i in range(self.n):
+                    if s.slot[i] < oldest or not s.counts[i]:
+                        continue
+                    lo = min(lo, s.mins[i])
+                    hi = max(hi, s.maxs[i])
+                    total += s.sums[i]
+                    count += s.counts[i]
+                if count:
+                    out.append((key, lo, hi, total / count, count))
+                else:
+                    idle.append(key)
+            for key in idle:
+                del self._series[key]
+        return out